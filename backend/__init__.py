@@ -1,40 +1,48 @@
 import time
-import firebase_admin
-from firebase_admin import credentials
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from werkzeug.exceptions import HTTPException
 from backend.logger import getLogger
+from backend.encoding import OrjsonProvider
 from backend.config import (
 	DEBUG,
 	SECRET_KEY,
 	PORT,
 	CORS_ORIGINS,
 	FIREBASE_CREDS,
-	LOGGER_CREDS
+	LOGGER_CREDS,
+	STORAGE_BACKEND,
+	SQLITE_PATH,
 )
 
 logger = getLogger(__name__)
 exceptLogger = getLogger('exceptions')
 
-def createApp():
+def createApp(db=None):
+	"""
+	db swaps in another Firestore client (e.g. backend.fakestore.FakeClient) for the real one.
+	Without one, STORAGE_BACKEND picks Firestore or the SQLite store at SQLITE_PATH.
+	"""
 	app = Flask(__name__)
+	app.json = OrjsonProvider(app)
 	app.config["DEBUG"] = DEBUG
 	app.config["SECRET_KEY"] = SECRET_KEY
 	app.config["PORT"] = PORT
 
-	if FIREBASE_CREDS:
-		cred = credentials.Certificate(FIREBASE_CREDS)
-	else:
-		cred = credentials.ApplicationDefault()
-	firebase_admin.initialize_app(cred)
+	if db is None and STORAGE_BACKEND == "sqlite":
+		from backend.sqlitestore import SQLiteClient
+		db = SQLiteClient(SQLITE_PATH)
+
+	from backend.firebase import useClient
+	useClient(db)
 
 	CORS(
 		app,
 		origins=CORS_ORIGINS,
 		supports_credentials=True,
 		intercept_exceptions=True,
-		allow_headers=["Content-Type", "Authorization"],
+		allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+		expose_headers=["ETag", "Server-Timing"],
 		methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
 	)
 
@@ -72,6 +80,14 @@ def createApp():
 	logger.debug(f"Found logger credentials" if LOGGER_CREDS else f"Did not find logger credentials")
 	logger.debug(f"Found secret key" if SECRET_KEY else f"Did not find secret key")
 
+	# Sample requests for replay when CAPTURE_RATE > 0
+	from backend.capture import initCapture
+	initCapture(app)
+
+	# Phase timings, Server-Timing header and latency histograms
+	from backend.metrics import initMetrics
+	initMetrics(app)
+
 	# Import and reg blueprints
 	from backend.routes.test import testBP
 	from backend.routes.checklist import checklistBP
@@ -80,6 +96,9 @@ def createApp():
 	from backend.routes.events import eventsBP
 	from backend.routes.schedules import schedulesBP
 	from backend.routes.completions import completionsBP
+	from backend.routes.calendar import calendarBP
+	from backend.routes.sync import syncBP
+	from backend.routes.metrics import metricsBP
 	
 	app.register_blueprint(testBP)
 	app.register_blueprint(checklistBP)
@@ -88,5 +107,8 @@ def createApp():
 	app.register_blueprint(eventsBP)
 	app.register_blueprint(schedulesBP)
 	app.register_blueprint(completionsBP)
+	app.register_blueprint(calendarBP)
+	app.register_blueprint(syncBP)
+	app.register_blueprint(metricsBP)
 
 	return app
@@ -0,0 +1,221 @@
+# backend/accounting.py
+"""
+Firestore operation accounting.
+
+backend/firebase.py hands out CountedClient/CountedCollection proxies instead of the raw
+SDK objects. Every query, get, get_all, direct write and batch commit made through them
+is timed and counted (documents read, written, deleted) against the current request,
+its route and the "firestore" Server-Timing phase. Anything the proxies don't intercept
+falls through to the wrapped SDK object unchanged.
+"""
+import time
+import threading
+from flask import g, has_app_context, has_request_context
+from backend.metrics import Histogram, currentTimings, routeLabel
+
+opFields = ("reads", "writes", "deletes", "queries", "commits")
+
+class OpStats:
+	"""
+	Firestore work for one request or one route.
+	"""
+	def __init__(self):
+		self.reads = self.writes = self.deletes = self.queries = self.commits = 0
+		self.ms = 0.0
+		self._lock = threading.Lock()
+
+	def add(self, ms, reads=0, writes=0, deletes=0, queries=0, commits=0):
+		with self._lock:
+			self.ms += ms
+			self.reads += reads
+			self.writes += writes
+			self.deletes += deletes
+			self.queries += queries
+			self.commits += commits
+
+	def asDict(self):
+		with self._lock:
+			return {**{f: getattr(self, f) for f in opFields}, "ms": round(self.ms, 1)}
+
+	def summary(self):
+		""" Short totals for log lines """
+		d = self.asDict()
+		return " ".join(f"{f}={d[f]}" for f in opFields if d[f]) + f" firestore={d['ms']}ms"
+
+_routesLock = threading.Lock()
+_routeStats = {} # route label -> OpStats, "background" for work outside a request
+
+opSeconds = Histogram(
+	"portia_firestore_op_seconds", "Firestore call latency by route",
+	("route", "call"),
+)
+
+def requestOps():
+	""" OpStats for the active request (created on first use), None outside one """
+	if not has_app_context() or not has_request_context():
+		return None
+	ops = g.get("firestoreOps")
+	if ops is None:
+		ops = g.firestoreOps = OpStats()
+	return ops
+
+def routeStats():
+	""" {route: {reads, writes, deletes, queries, commits, ms}} since startup """
+	with _routesLock:
+		stats = dict(_routeStats)
+	return {route: s.asDict() for route, s in stats.items()}
+
+def record(call, ms, **counts):
+	"""
+	Charge one Firestore call to the request, its route and the firestore phase.
+	"""
+	inRequest = has_app_context() and has_request_context()
+	route = routeLabel() if inRequest else "background"
+	with _routesLock:
+		stats = _routeStats.get(route)
+		if stats is None:
+			stats = _routeStats[route] = OpStats()
+	stats.add(ms, **counts)
+	opSeconds.observe((route, call), ms / 1000)
+	if inRequest:
+		requestOps().add(ms, **counts)
+		timings = currentTimings()
+		if timings is not None:
+			timings.add("firestore", ms)
+
+def _timedStream(call, snaps, **counts):
+	"""
+	Yield from snaps, timing only the waits inside the SDK (not the caller's work between docs).
+	"""
+	ms, n = 0.0, 0
+	try:
+		while True:
+			start = time.perf_counter()
+			try:
+				snap = next(snaps)
+			except StopIteration:
+				break
+			finally:
+				ms += (time.perf_counter() - start) * 1000
+			n += 1
+			yield snap
+	finally:
+		# An empty query still bills one read
+		record(call, ms, reads=max(n, 1) if call == "query" else n, **counts)
+
+def _timedCall(call, fn, **counts):
+	start = time.perf_counter()
+	try:
+		return fn()
+	finally:
+		record(call, (time.perf_counter() - start) * 1000, **counts)
+
+class _Proxy:
+	__slots__ = ("_raw",)
+
+	def __init__(self, raw):
+		self._raw = raw
+
+	def __getattr__(self, name):
+		return getattr(self._raw, name)
+
+	def __repr__(self):
+		return f"{type(self).__name__}({self._raw!r})"
+
+# Query builders that return a new query to keep wrapping
+_chainable = frozenset((
+	"where", "order_by", "limit", "limit_to_last", "offset", "select",
+	"start_at", "start_after", "end_at", "end_before",
+))
+
+class CountedQuery(_Proxy):
+	__slots__ = ()
+
+	def __getattr__(self, name):
+		attr = getattr(self._raw, name)
+		if name in _chainable:
+			return lambda *args, **kwargs: CountedQuery(attr(*args, **kwargs))
+		return attr
+
+	def stream(self, *args, **kwargs):
+		return _timedStream("query", self._raw.stream(*args, **kwargs), queries=1)
+
+	def get(self, *args, **kwargs):
+		return list(self.stream(*args, **kwargs))
+
+class CountedDocument(_Proxy):
+	__slots__ = ()
+
+	def get(self, *args, **kwargs):
+		return _timedCall("get", lambda: self._raw.get(*args, **kwargs), reads=1)
+
+	def set(self, *args, **kwargs):
+		return _timedCall("set", lambda: self._raw.set(*args, **kwargs), writes=1)
+
+	def update(self, *args, **kwargs):
+		return _timedCall("update", lambda: self._raw.update(*args, **kwargs), writes=1)
+
+	def create(self, *args, **kwargs):
+		return _timedCall("create", lambda: self._raw.create(*args, **kwargs), writes=1)
+
+	def delete(self, *args, **kwargs):
+		return _timedCall("delete", lambda: self._raw.delete(*args, **kwargs), deletes=1)
+
+	def collection(self, *args, **kwargs):
+		return CountedCollection(self._raw.collection(*args, **kwargs))
+
+class CountedCollection(CountedQuery):
+	__slots__ = ()
+
+	def document(self, *args, **kwargs):
+		return CountedDocument(self._raw.document(*args, **kwargs))
+
+	def add(self, *args, **kwargs):
+		return _timedCall("add", lambda: self._raw.add(*args, **kwargs), writes=1)
+
+class CountedBatch(_Proxy):
+	"""
+	WriteBatch that tallies queued writes and charges them when committed.
+	"""
+	__slots__ = ("_writes", "_deletes")
+
+	def __init__(self, raw):
+		super().__init__(raw)
+		self._writes = self._deletes = 0
+
+	def set(self, *args, **kwargs):
+		self._writes += 1
+		return self._raw.set(*args, **kwargs)
+
+	def update(self, *args, **kwargs):
+		self._writes += 1
+		return self._raw.update(*args, **kwargs)
+
+	def create(self, *args, **kwargs):
+		self._writes += 1
+		return self._raw.create(*args, **kwargs)
+
+	def delete(self, *args, **kwargs):
+		self._deletes += 1
+		return self._raw.delete(*args, **kwargs)
+
+	def commit(self, *args, **kwargs):
+		return _timedCall(
+			"commit", lambda: self._raw.commit(*args, **kwargs),
+			writes=self._writes, deletes=self._deletes, commits=1,
+		)
+
+class CountedClient(_Proxy):
+	__slots__ = ()
+
+	def collection(self, *args, **kwargs):
+		return CountedCollection(self._raw.collection(*args, **kwargs))
+
+	def document(self, *args, **kwargs):
+		return CountedDocument(self._raw.document(*args, **kwargs))
+
+	def batch(self, *args, **kwargs):
+		return CountedBatch(self._raw.batch(*args, **kwargs))
+
+	def get_all(self, references, *args, **kwargs):
+		return _timedStream("get_all", self._raw.get_all(references, *args, **kwargs))
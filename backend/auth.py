@@ -1,15 +1,52 @@
+import time
+import hashlib
 from functools import wraps
 from flask import request, jsonify, abort
-import firebase_admin
-from firebase_admin import auth, credentials
-from backend.config import FIREBASE_CREDS
+from firebase_admin import auth
+from cachetools import TLRUCache
+from backend.config import TOKEN_CACHE_SIZE, TOKEN_REVOCATION_INTERVAL, AUTH_STUB
+from backend.cache import StatCache
 from backend.logger import getLogger
+from backend.metrics import phase
+from backend.firebase import initFirebase
 
 logger = getLogger(__name__)
 
-if not firebase_admin._apps:
-	cred = credentials.Certificate(FIREBASE_CREDS)
-	firebase_admin.initialize_app(cred)
+# Entries expire with the token itself
+_tokenCache = StatCache("tokens", TLRUCache(
+	maxsize=TOKEN_CACHE_SIZE,
+	ttu=lambda key, entry, now: entry["exp"],
+	timer=time.time,
+))
+
+def _verifyRemote(token):
+	""" Full verification incl. the revocation round trip """
+	initFirebase()
+	decoded = auth.verify_id_token(token, check_revoked=True)
+	return {"claims": decoded, "exp": decoded.get("exp", 0), "checkedAt": time.time()}
+
+def verifyToken(token):
+	"""
+	Decoded claims for token, revocation only re-checked every TOKEN_REVOCATION_INTERVAL.
+	"""
+	key = hashlib.sha256(token.encode()).hexdigest() # don't hold raw tokens in memory
+	verified = None
+
+	def load():
+		nonlocal verified
+		verified = _verifyRemote(token)
+		return verified
+
+	entry = _tokenCache.get(key, load)
+	if entry is not verified and time.time() - entry["checkedAt"] >= TOKEN_REVOCATION_INTERVAL:
+		try:
+			entry = _verifyRemote(token)
+		except Exception:
+			_tokenCache.discard(key)
+			raise
+		_tokenCache.refresh(key, entry)
+
+	return entry["claims"]
 
 def requireAuth():
 	"""
@@ -23,8 +60,14 @@ def requireAuth():
 	if not token:
 		return None, ({"error": "Firebase found no token"}, 401)
 
+	if AUTH_STUB and token.startswith("stub:"):
+		uid = token[len("stub:"):]
+		if not uid:
+			return None, ({"error": "Stub token has no uid"}, 401)
+		return uid, None
+
 	try:
-		decoded = auth.verify_id_token(token, check_revoked=True)
+		decoded = verifyToken(token)
 		uid = decoded.get("uid")
 		if not uid:
 			raise ValueError("UID not found in token")
@@ -38,7 +81,8 @@ def handleFirebaseAuth(f):
 
 	@wraps(f)
 	def wrapper(*args, **kwargs):
-		uid, err = requireAuth()
+		with phase("auth"):
+			uid, err = requireAuth()
 		if err:
 			payload, status = err
 			return jsonify(payload), status
@@ -0,0 +1,203 @@
+# backend/benchmarks/dataset.py
+"""
+Synthetic per-user datasets shaped like what the client writes through /composite
+(see makeEmptyForm / makeEmptyEvent / makeEmptySchedule / makeEmptyCompletion in
+portia/src/helpers/HandleComposite.js) and /checklist/new.
+
+	python -m backend.benchmarks.dataset --users 50 --events-per-day 8 --days 90
+
+generate() returns {collection: {docID: doc}} ready for FakeClient.load(); the CLI
+prints document counts and rough payload sizes so a spec can be sized before a load run.
+"""
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# info item types the client knows (portia/src/helpers/InputValidation.js)
+infoTypes = ("text", "input", "mc", "tf")
+timezones = ("America/New_York", "America/Chicago", "America/Los_Angeles", "Europe/London", "Asia/Tokyo")
+periods = ("daily", "weekly", "monthly")
+
+defaultStart = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+class DatasetSpec:
+	"""
+	Knobs for generate(). Counts are per user; infoItems/infoChars size every form,
+	event and completion info list.
+	"""
+	def __init__(
+		self, users=10, forms=20, schedules=10, eventsPerDay=8, days=90,
+		completionRatio=0.33, infoItems=3, infoChars=40, checklist=30, start=defaultStart, seed=0,
+	):
+		self.users = users
+		self.forms = forms
+		self.schedules = schedules
+		self.eventsPerDay = eventsPerDay
+		self.days = days
+		self.completionRatio = completionRatio
+		self.infoItems = infoItems
+		self.infoChars = infoChars
+		self.checklist = checklist
+		self.start = start
+		self.seed = seed
+
+	@property
+	def end(self):
+		return self.start + timedelta(days=self.days)
+
+	def userIDs(self):
+		return [f"loadUser{i:04d}" for i in range(self.users)]
+
+	def paths(self):
+		""" Form paths shared by every user, forms per user spread over them """
+		areas = max(1, self.forms // 4)
+		return [f"area{i % areas}/task{i // areas}" for i in range(max(self.forms, 1))]
+
+def _text(rng, n):
+	words = []
+	while sum(len(w) + 1 for w in words) < n:
+		words.append(rng.choice(("log", "note", "set", "rep", "mile", "page", "call", "done", "check", "plan")))
+	return " ".join(words)[:n]
+
+def formInfo(rng, spec):
+	""" Form info list: labels, types and per-type extras, no content """
+	info = []
+	for i in range(spec.infoItems):
+		kind = infoTypes[i % len(infoTypes)]
+		item = {"label": f"field{i}", "type": kind, "placeholder": _text(rng, min(spec.infoChars, 20))}
+		if kind == "mc":
+			item["options"] = [f"option{j}" for j in range(4)]
+		elif kind == "input":
+			item["suggestions"] = [_text(rng, 12) for _ in range(3)]
+		elif kind == "text":
+			item["baseValue"] = ""
+		info.append(item)
+	return info
+
+def eventInfo(rng, spec):
+	""" Event/completion info list: the form's fields with content filled in """
+	info = []
+	for i in range(spec.infoItems):
+		kind = infoTypes[i % len(infoTypes)]
+		content = (
+			rng.random() < 0.5 if kind == "tf" else
+			f"option{rng.randrange(4)}" if kind == "mc" else
+			_text(rng, spec.infoChars)
+		)
+		info.append({"label": f"field{i}", "type": kind, "content": content})
+	return info
+
+def generateUser(uID, spec, rng):
+	"""
+	{collection: {docID: doc}} for one user: forms, schedules, eventsPerDay * days events
+	(completionRatio of them completed), checklist items and the users doc.
+	"""
+	paths = spec.paths()
+	data = {"forms": {}, "schedules": {}, "events": {}, "completions": {}, "checklist": {}, "users": {}}
+
+	for i, path in enumerate(paths[:spec.forms]):
+		data["forms"][f"{uID}_form{i:03d}"] = {
+			"ownerID": uID, "path": path, "includeStart": rng.random() < 0.5,
+			"info": formInfo(rng, spec), "updatedAt": spec.start,
+		}
+
+	schedIDs = []
+	for i in range(spec.schedules):
+		start = spec.start + timedelta(days=rng.randrange(7), hours=rng.randrange(6, 20))
+		schedID = f"{uID}_sched{i:03d}"
+		schedIDs.append(schedID)
+		data["schedules"][schedID] = {
+			"ownerID": uID, "path": paths[i % len(paths)], "tz": rng.choice(timezones),
+			"period": rng.choice(periods), "interval": rng.choice((1, 1, 2)),
+			"startStamp": start, "endStamp": start + timedelta(minutes=rng.choice((15, 30, 60))),
+			"until": None, "updatedAt": spec.start,
+		}
+
+	numEvents = int(spec.eventsPerDay * spec.days)
+	minutesPerEvent = spec.days * 24 * 60 / max(numEvents, 1)
+	for i in range(numEvents):
+		start = spec.start + timedelta(minutes=i * minutesPerEvent + rng.randrange(int(minutesPerEvent) or 1))
+		end = start + timedelta(minutes=rng.choice((5, 15, 30, 60)))
+		eventID = f"{uID}_event{i:07d}"
+		schedID = rng.choice(schedIDs) if schedIDs and rng.random() < 0.3 else None
+		compID = f"{uID}_comp{i:07d}" if rng.random() < spec.completionRatio else None
+		event = {
+			"ownerID": uID, "path": rng.choice(paths), "scheduleID": schedID, "completionID": compID,
+			"complete": "complete" if compID else "pending",
+			"startStamp": start, "endStamp": end, "info": eventInfo(rng, spec), "updatedAt": start,
+		}
+		data["events"][eventID] = event
+		if compID:
+			data["completions"][compID] = {
+				"ownerID": uID, "path": event["path"], "scheduleID": schedID, "eventID": eventID,
+				"startStamp": start, "endStamp": end, "tz": rng.choice(timezones),
+				"info": eventInfo(rng, spec), "updatedAt": end,
+			}
+
+	for i in range(spec.checklist):
+		data["checklist"][f"{uID}_item{i:03d}"] = {
+			"ownerID": uID, "participants": [uID], "title": _text(rng, 24),
+			"note": _text(rng, spec.infoChars), "active": rng.random() < 0.75, "priority": rng.randrange(3),
+		}
+
+	data["users"][uID] = {"versions": {}}
+	return data
+
+def generate(spec):
+	"""
+	Every user's data merged into {collection: {docID: doc}}. Deterministic for a given spec.
+	"""
+	rng = random.Random(spec.seed)
+	merged = {}
+	for uID in spec.userIDs():
+		for collection, docs in generateUser(uID, spec, rng).items():
+			merged.setdefault(collection, {}).update(docs)
+	return merged
+
+def loadInto(fake, data):
+	""" Load generate() output into a FakeClient """
+	for collection, docs in data.items():
+		fake.load(collection, docs)
+
+def describe(data):
+	""" [(collection, docs, avg bytes as JSON)] """
+	rows = []
+	for collection, docs in data.items():
+		sample = list(docs.values())[:200]
+		size = sum(len(json.dumps(d, default=str)) for d in sample) / max(len(sample), 1)
+		rows.append((collection, len(docs), size))
+	return rows
+
+def addSpecArgs(parser):
+	""" DatasetSpec options, shared with the load driver """
+	parser.add_argument("--users", type=int, default=10)
+	parser.add_argument("--forms", type=int, default=20, help="forms per user")
+	parser.add_argument("--schedules", type=int, default=10, help="schedules per user")
+	parser.add_argument("--events-per-day", type=float, default=8)
+	parser.add_argument("--days", type=int, default=90)
+	parser.add_argument("--completion-ratio", type=float, default=0.33)
+	parser.add_argument("--info-items", type=int, default=3, help="info entries per form/event/completion")
+	parser.add_argument("--info-chars", type=int, default=40, help="text length of each info entry")
+	parser.add_argument("--checklist", type=int, default=30, help="checklist items per user")
+	parser.add_argument("--seed", type=int, default=0)
+
+def specFromArgs(args):
+	return DatasetSpec(
+		users=args.users, forms=args.forms, schedules=args.schedules,
+		eventsPerDay=args.events_per_day, days=args.days, completionRatio=args.completion_ratio,
+		infoItems=args.info_items, infoChars=args.info_chars, checklist=args.checklist, seed=args.seed,
+	)
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Generate and size a synthetic dataset")
+	addSpecArgs(parser)
+	args = parser.parse_args(argv)
+
+	data = generate(specFromArgs(args))
+	print(f"{'collection':12} {'docs':>9} {'avg bytes':>10}")
+	for collection, n, size in describe(data):
+		print(f"{collection:12} {n:9d} {size:10.0f}")
+
+if __name__ == "__main__":
+	main()
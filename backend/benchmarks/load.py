@@ -0,0 +1,218 @@
+# backend/benchmarks/load.py
+"""
+Closed-loop load against a synthetic dataset, entirely in-process.
+
+	FLASK_ENV=development AUTH_STUB=1 python -m backend.benchmarks.load --users 50 --workers 16 --duration 30
+
+Seeds a FakeClient (or a throwaway SQLiteClient file with --store sqlite) from
+backend.benchmarks.dataset, then runs --workers threads for --duration seconds. Each worker
+acts as one user (round robin over the dataset), sends its next request as soon as the last
+one returns (plus optional --think time) and picks it from a weighted mix of /events,
+/schedules, /checklist and /composite reads and writes.
+Reports overall throughput and per-operation p50/p90/p99.
+
+Workers share one process and the GIL, like threads in a single gunicorn worker, and
+Firestore is the in-memory fake: use it to compare builds and find the knee of the
+throughput curve, not as a prediction of production latency.
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from backend.benchmarks.dataset import addSpecArgs, specFromArgs, generate, loadInto
+from backend.benchmarks.routes import stores, makeStore
+
+def _iso(dt):
+	return dt.isoformat().replace("+00:00", "Z")
+
+class UserState:
+	"""
+	What one simulated user has seen, so writes target real ids.
+	"""
+	def __init__(self, uID, data, rng, worker=0):
+		self.uID = uID
+		self.worker = worker
+		self.rng = rng
+		self.eventIDs = [i for i, e in data["events"].items() if e["ownerID"] == uID]
+		self.pendingIDs = [i for i in self.eventIDs if not data["events"][i]["completionID"]]
+		self.itemIDs = [i for i, c in data["checklist"].items() if c["ownerID"] == uID]
+		self.paths = sorted({f["path"] for f in data["forms"].values() if f["ownerID"] == uID}) or ["area0/task0"]
+		self.created = 0
+
+def _window(spec, rng, days):
+	start = spec.start + timedelta(days=rng.randrange(max(spec.days - days, 1)))
+	return f"start={_iso(start)}&end={_iso(start + timedelta(days=days))}"
+
+def _emptyFlags():
+	return {"form": False, "event": False, "completion": False, "schedules": {}}
+
+def _eventBody(state, spec, eventID=None):
+	rng = state.rng
+	start = spec.start + timedelta(days=rng.randrange(spec.days), minutes=rng.randrange(24 * 60))
+	return {
+		"_id": eventID, "scheduleID": None, "completionID": None, "path": rng.choice(state.paths),
+		"info": [{"label": "field0", "type": "text", "content": "load"}], "complete": "pending",
+		"startStamp": _iso(start), "endStamp": _iso(start + timedelta(minutes=30)),
+	}
+
+# Each op(state, spec) returns (method, path, json body or None)
+def opEventsWeek(state, spec):
+	return "GET", f"/events?{_window(spec, state.rng, 7)}", None
+
+def opEventsMonth(state, spec):
+	return "GET", f"/events?{_window(spec, state.rng, 30)}", None
+
+def opSchedules(state, spec):
+	return "GET", "/schedules", None
+
+def opChecklist(state, spec):
+	return "GET", "/checklist", None
+
+def opCompositeNew(state, spec):
+	dirty = {**_emptyFlags(), "event": True}
+	return "POST", "/composite", {
+		"form": {}, "event": _eventBody(state, spec), "completion": {}, "schedules": {},
+		"dirty": dirty, "toDelete": _emptyFlags(),
+	}
+
+def opCompositeEdit(state, spec):
+	eventID = state.rng.choice(state.eventIDs)
+	dirty = {**_emptyFlags(), "event": True}
+	return "POST", "/composite", {
+		"form": {}, "event": _eventBody(state, spec, eventID), "completion": {}, "schedules": {},
+		"dirty": dirty, "toDelete": _emptyFlags(),
+	}
+
+def opCompositeComplete(state, spec):
+	""" Complete a pending event: completion create plus event link in one batch """
+	if not state.pendingIDs:
+		return opCompositeEdit(state, spec)
+	eventID = state.pendingIDs.pop(state.rng.randrange(len(state.pendingIDs)))
+	state.created += 1
+	compID = f"{state.uID}_load{state.worker}_comp{state.created:07d}"
+	event = {**_eventBody(state, spec, eventID), "completionID": compID, "complete": "complete"}
+	completion = {
+		"_id": compID, "path": event["path"], "scheduleID": None, "eventID": eventID,
+		"startStamp": event["startStamp"], "endStamp": event["endStamp"], "tz": "UTC", "info": event["info"],
+	}
+	dirty = {**_emptyFlags(), "event": True, "completion": True}
+	return "POST", "/composite", {
+		"form": {}, "event": event, "completion": completion, "schedules": {},
+		"dirty": dirty, "toDelete": _emptyFlags(),
+	}
+
+def opChecklistToggle(state, spec):
+	if not state.itemIDs:
+		return opChecklist(state, spec)
+	return "PUT", f"/checklist/{state.rng.choice(state.itemIDs)}", {"active": state.rng.random() < 0.75}
+
+# (name, op, weight); reads dominate as in the client, which refetches after every save
+mix = (
+	("events week", opEventsWeek, 30),
+	("events month", opEventsMonth, 10),
+	("schedules", opSchedules, 15),
+	("checklist", opChecklist, 15),
+	("composite new", opCompositeNew, 10),
+	("composite edit", opCompositeEdit, 8),
+	("composite complete", opCompositeComplete, 7),
+	("checklist toggle", opChecklistToggle, 5),
+)
+
+def drive(app, spec, data, workers=8, duration=10.0, think=0.0, seed=0):
+	"""
+	Run the closed loop. Returns ({op: [ms]}, {op: errors}, elapsed seconds).
+	"""
+	names = [name for name, _, _ in mix]
+	ops = [op for _, op, _ in mix]
+	weights = [w for _, _, w in mix]
+	userIDs = spec.userIDs()
+
+	times, errors = defaultdict(list), defaultdict(int)
+	lock = threading.Lock()
+	stop = threading.Event()
+
+	def worker(n):
+		rng = random.Random(seed * 1000 + n)
+		state = UserState(userIDs[n % len(userIDs)], data, rng, worker=n)
+		client = app.test_client()
+		headers = {"Authorization": f"Bearer stub:{state.uID}"}
+		localTimes, localErrors = defaultdict(list), defaultdict(int)
+		while not stop.is_set():
+			i = rng.choices(range(len(ops)), weights)[0]
+			method, path, body = ops[i](state, spec)
+			began = time.perf_counter()
+			response = client.open(path, method=method, json=body, headers=headers)
+			response.get_data()
+			localTimes[names[i]].append((time.perf_counter() - began) * 1000)
+			if response.status_code >= 400:
+				localErrors[names[i]] += 1
+			if think:
+				time.sleep(rng.expovariate(1 / think))
+		with lock:
+			for name, ms in localTimes.items():
+				times[name].extend(ms)
+			for name, n in localErrors.items():
+				errors[name] += n
+
+	threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(workers)]
+	began = time.perf_counter()
+	for t in threads:
+		t.start()
+	time.sleep(duration)
+	stop.set()
+	for t in threads:
+		t.join()
+	return times, errors, time.perf_counter() - began
+
+def report(times, errors, elapsed):
+	from backend.replay import percentile
+
+	total = sum(len(ms) for ms in times.values())
+	allTimes = [m for ms in times.values() for m in ms]
+	lines = [
+		f"{total} requests in {elapsed:.1f}s: {total / max(elapsed, 1e-9):.1f} req/s, "
+		f"p50 {percentile(allTimes, 50):.1f} ms, p99 {percentile(allTimes, 99):.1f} ms",
+		f"{'operation':20} {'n':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}",
+	]
+	for name, _, _ in mix:
+		ms = times.get(name)
+		if not ms:
+			continue
+		lines.append(
+			f"{name:20} {len(ms):7d} {len(ms) / elapsed:8.1f} {percentile(ms, 50):8.1f} "
+			f"{percentile(ms, 90):8.1f} {percentile(ms, 99):8.1f} {errors.get(name, 0):7d}"
+		)
+	return "\n".join(lines)
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Closed-loop load against a synthetic in-memory dataset")
+	addSpecArgs(parser)
+	parser.add_argument("--workers", type=int, default=8, help="concurrent simulated users")
+	parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+	parser.add_argument("--think", type=float, default=0, help="mean seconds between a user's requests")
+	parser.add_argument("--store", choices=stores, default="fake", help="client the app runs against")
+	args = parser.parse_args(argv)
+
+	from backend.config import AUTH_STUB
+	if not AUTH_STUB:
+		sys.exit("The load driver needs FLASK_ENV=development and AUTH_STUB=1 to authenticate")
+
+	from backend import createApp
+
+	logging.disable(logging.WARNING) # per-request log lines (composite logs completions as warnings) would dominate
+	spec = specFromArgs(args)
+	began = time.perf_counter()
+	data = generate(spec)
+	store = makeStore(args.store)
+	loadInto(store, data)
+	print(f"Seeded {sum(len(d) for d in data.values())} docs for {spec.users} users into {args.store} in {time.perf_counter() - began:.1f}s")
+
+	app = createApp(db=store)
+	print(report(*drive(app, spec, data, workers=args.workers, duration=args.duration, think=args.think, seed=args.seed)))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,176 @@
+# backend/benchmarks/routes.py
+"""
+Throughput and p50/p99 latency of each blueprint against FakeClient datasets.
+
+	FLASK_ENV=development AUTH_STUB=1 python -m backend.benchmarks.routes [--sizes 1000 10000 100000] [--requests 200] [--store sqlite]
+
+Each size seeds a fresh in-memory store with that many events for one user (spread over
+2025, a third of them completed) plus forms, schedules and checklist items, then times
+--requests sequential calls per route through the Flask test client. Latency covers the
+whole app (auth stub, versions, queries, conversion, encoding) but Firestore itself is the
+in-memory fake (or a temp-file SQLiteClient with --store sqlite), so compare runs against
+each other rather than against production.
+"""
+import os
+import sys
+import time
+import tempfile
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+benchUser = "benchUser"
+_yearStart = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_month = "start=2025-06-01T00:00:00Z&end=2025-07-01T00:00:00Z"
+
+def seed(fake, numEvents, uID=benchUser, rng=None):
+	"""
+	Load numEvents events (and proportional completions) plus forms, schedules,
+	checklist items and the user doc for uID straight into fake.
+	"""
+	rng = rng or random.Random(0)
+	paths = [f"area{a}/task{t}" for a in range(5) for t in range(4)]
+	minutesPerEvent = 365 * 24 * 60 / max(numEvents, 1)
+
+	events, completions = {}, {}
+	for i in range(numEvents):
+		start = _yearStart + timedelta(minutes=i * minutesPerEvent)
+		eventID, compID = f"event{i:07d}", (f"comp{i:07d}" if i % 3 == 0 else None)
+		events[eventID] = {
+			"ownerID": uID, "path": rng.choice(paths),
+			"startStamp": start, "endStamp": start + timedelta(minutes=rng.choice((15, 30, 60))),
+			"scheduleID": None, "completionID": compID, "updatedAt": start,
+			"info": [{"label": "note", "type": "text", "value": f"entry {i}"}],
+		}
+		if compID:
+			completions[compID] = {
+				"ownerID": uID, "path": events[eventID]["path"], "eventID": eventID, "scheduleID": None,
+				"startStamp": start, "endStamp": events[eventID]["endStamp"], "updatedAt": start,
+				"info": [{"label": "done", "type": "bool", "value": True}],
+			}
+
+	fake.load("events", events)
+	fake.load("completions", completions)
+	fake.load("forms", {f"form{i:03d}": {
+		"ownerID": uID, "path": path, "info": [{"label": "note", "type": "text"}], "updatedAt": _yearStart,
+	} for i, path in enumerate(paths)})
+	fake.load("schedules", {f"sched{i:03d}": {
+		"ownerID": uID, "path": paths[i], "tz": "America/New_York", "period": "weekly", "interval": 1,
+		"startStamp": _yearStart + timedelta(hours=9 + i), "endStamp": _yearStart + timedelta(hours=10 + i),
+		"until": None, "updatedAt": _yearStart,
+	} for i in range(10)})
+	fake.load("checklist", {f"item{i:03d}": {
+		"ownerID": uID, "participants": [uID], "title": f"item {i}", "active": i % 4 != 0,
+	} for i in range(50)})
+	fake.load("users", {uID: {"versions": {}}})
+
+def _compositePayload(i):
+	start = _yearStart + timedelta(days=180, minutes=7 * i)
+	return {
+		"form": {}, "completion": {}, "schedules": {},
+		"event": {
+			"path": "area0/task0", "info": [],
+			"startStamp": start.isoformat().replace("+00:00", "Z"),
+			"endStamp": (start + timedelta(minutes=30)).isoformat().replace("+00:00", "Z"),
+		},
+		"dirty": {"form": False, "event": True, "completion": False, "schedules": {}},
+		"toDelete": {"form": False, "event": False, "completion": False, "schedules": {}},
+	}
+
+def _toggleAll(i):
+	return {"ops": [{"op": "update", "_id": f"item{k:03d}", "changes": {"active": (i + k) % 2 == 0}} for k in range(50)]}
+
+# (label, method, path, body(i) or None)
+cases = (
+	("events month", "GET", f"/events?{_month}", None),
+	("events page 100", "GET", "/events?limit=100", None),
+	("events stream month", "GET", f"/events?{_month}&stream=1", None),
+	("completions month", "GET", f"/completions?{_month}", None),
+	("forms", "GET", "/forms", None),
+	("schedules", "GET", "/schedules", None),
+	("occurrences month", "GET", f"/schedules/occurrences?{_month}", None),
+	("calendar month", "GET", f"/calendar?{_month}", None),
+	("checklist", "GET", "/checklist", None),
+	("checklist toggle", "PUT", "/checklist/item001", lambda i: {"active": i % 2 == 0}),
+	("checklist bulk 50", "POST", "/checklist/bulk", _toggleAll),
+	("sync since dec", "GET", "/sync?since=2025-12-01T00:00:00Z", None),
+	("composite new event", "POST", "/composite", _compositePayload),
+)
+
+def benchRoutes(app, requests, uID=benchUser):
+	"""
+	[(label, req/s, p50 ms, p99 ms)] for every case, after a short warm-up.
+	"""
+	from backend.replay import percentile
+
+	client = app.test_client()
+	headers = {"Authorization": f"Bearer stub:{uID}"}
+	rows = []
+	for label, method, path, body in cases:
+		def call(i):
+			response = client.open(path, method=method, json=body(i) if body else None, headers=headers)
+			response.get_data() # drain streamed bodies
+			if response.status_code != 200:
+				raise RuntimeError(f"{method} {path} -> {response.status_code}")
+
+		for i in range(3):
+			call(i)
+		times = []
+		began = time.perf_counter()
+		for i in range(requests):
+			start = time.perf_counter()
+			call(i)
+			times.append((time.perf_counter() - start) * 1000)
+		elapsed = time.perf_counter() - began
+		rows.append((label, requests / elapsed, percentile(times, 50), percentile(times, 99)))
+	return rows
+
+stores = ("fake", "sqlite")
+
+def makeStore(kind):
+	""" Empty client of kind, SQLite in a temp file so reads use WAL like a deployment would """
+	if kind == "sqlite":
+		from backend.sqlitestore import SQLiteClient
+		return SQLiteClient(os.path.join(tempfile.mkdtemp(prefix="portia-bench-"), "bench.sqlite3"))
+	from backend.fakestore import FakeClient
+	return FakeClient()
+
+def run(sizes=(1000, 10000, 100000), requests=200, store="fake"):
+	from backend import createApp
+	from backend.cache import _caches
+
+	logging.disable(logging.INFO) # console/file logging per request would dominate
+	results = {}
+	for n in sizes:
+		fake = makeStore(store)
+		began = time.perf_counter()
+		seed(fake, n)
+		seeded = time.perf_counter() - began
+		for cache in _caches:
+			cache.clear()
+
+		app = createApp(db=fake)
+		rows = benchRoutes(app, requests)
+		results[n] = rows
+
+		print(f"\n{n} events in {store} (seeded in {seeded:.1f}s), {requests} requests per route")
+		print(f"{'route':24} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+		for label, rps, p50, p99 in rows:
+			print(f"{label:24} {rps:9.1f} {p50:9.2f} {p99:9.2f}")
+	return results
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Route benchmarks against the in-memory Firestore fake")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+	parser.add_argument("--requests", type=int, default=200, help="timed requests per route and size")
+	parser.add_argument("--store", choices=stores, default="fake", help="client the app runs against")
+	args = parser.parse_args(argv)
+
+	from backend.config import AUTH_STUB
+	if not AUTH_STUB:
+		sys.exit("Route benchmarks need FLASK_ENV=development and AUTH_STUB=1 to authenticate")
+	run(args.sizes, args.requests, args.store)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,77 @@
+# backend/benchmarks/serialization.py
+"""
+Cost of turning an event list into a response body: Flask's default provider after the
+old per-doc _objsToIso copy vs. OrjsonProvider encoding the Firestore dicts directly.
+
+	python -m backend.benchmarks.serialization [--sizes 1000 10000] [--repeat 5]
+"""
+import argparse
+import timeit
+from datetime import timedelta, timezone
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from backend.helpers import tsKeys, _dtToIso
+from backend.encoding import OrjsonProvider
+
+def legacyToIso(objs):
+	"""
+	helpers._objsToIso as routes used to call it before jsonify, kept as the baseline.
+	"""
+	out = []
+	for o in objs:
+		o = dict(o)
+		for k in tsKeys:
+			if k in o and o[k] is not None:
+				o[k] = _dtToIso(o[k])
+		out.append(o)
+	return out
+
+def makeEvents(n):
+	""" n event dicts shaped like eventsCo snapshots (stamps as Firestore returns them) """
+	base = DatetimeWithNanoseconds(2025, 1, 1, tzinfo=timezone.utc)
+	return [{
+		"_id": f"event{i:06d}",
+		"ownerID": "benchUser",
+		"path": "work/deep/focus",
+		"scheduleID": None,
+		"completionID": f"comp{i:06d}" if i % 3 == 0 else None,
+		"startStamp": base + timedelta(minutes=45 * i),
+		"endStamp": base + timedelta(minutes=45 * i + 30),
+		"updatedAt": base + timedelta(seconds=i),
+		"info": [
+			{"label": "note", "type": "text", "value": f"entry {i}"},
+			{"label": "rating", "type": "number", "value": i % 10},
+		],
+	} for i in range(n)]
+
+def _app(provider):
+	app = Flask(__name__)
+	app.json = provider(app)
+	return app
+
+def run(sizes=(1000, 10000), repeat=5):
+	legacyApp, fastApp = _app(DefaultJSONProvider), _app(OrjsonProvider)
+	rows = []
+	for n in sizes:
+		events = makeEvents(n)
+		with legacyApp.app_context():
+			legacyBody = legacyApp.json.response(legacyToIso(events)).get_data()
+			legacy = min(timeit.repeat(lambda: legacyApp.json.response(legacyToIso(events)), number=1, repeat=repeat))
+		with fastApp.app_context():
+			fastBody = fastApp.json.response(events).get_data()
+			fast = min(timeit.repeat(lambda: fastApp.json.response(events), number=1, repeat=repeat))
+		assert legacyApp.json.loads(legacyBody) == fastApp.json.loads(fastBody)
+		rows.append((n, legacy * 1000, fast * 1000))
+
+	print(f"{'events':>8} {'legacy ms':>10} {'orjson ms':>10} {'speedup':>8}")
+	for n, legacy, fast in rows:
+		print(f"{n:8d} {legacy:10.2f} {fast:10.2f} {legacy / fast:7.1f}x")
+	return rows
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Event list serialization benchmark")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args()
+	run(args.sizes, args.repeat)
@@ -0,0 +1,197 @@
+# backend/benchmarks/storeparity.py
+"""
+Randomized differential check of SQLiteClient against FakeClient.
+
+	python -m backend.benchmarks.storeparity [--queries 400] [--seed 2] [--path /tmp/parity.sqlite3] [--processes 4]
+
+Both stores are seeded with the same documents (including nulls, mixed types and a few
+malformed stamps), then each round runs one random query (filters, orders, limit, select
+and a start_after cursor) against both and requires identical results, then applies the
+same random batch (merge sets with Increment, deletes) to both. Afterwards it checks that
+a stale last_update_time precondition is refused and that --processes processes
+committing to the same file at once never get the same update time. Those processes read
+a millisecond clock, as on platforms with coarse timers, so collisions are likely if
+anything but the database orders commit times.
+Exits non-zero when any check fails.
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+from google.api_core import exceptions
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud.firestore_v1 import FieldFilter, Increment
+from backend.fakestore import FakeClient
+from backend import sqlitestore
+from backend.sqlitestore import SQLiteClient
+
+_base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_cuts = [_base + timedelta(hours=h) for h in (0, 100, 250, 499)]
+
+def _doc(rng):
+	doc = {
+		"ownerID": rng.choice(["u1", "u2"]), "startStamp": _base + timedelta(hours=rng.randrange(500)),
+		"path": rng.choice(["a/b", "a/c", "x"]), "n": rng.choice([1, 2, 3, "s", None]), "active": rng.choice([True, False, 1]),
+		"participants": rng.sample(["u1", "u2", "u3"], rng.randrange(3)), "info": [{"label": "x", "at": _base}],
+		"m": {"k": rng.randrange(3)},
+	}
+	doc["endStamp"] = doc["startStamp"] + timedelta(minutes=rng.choice([15, 60]))
+	if rng.random() < .1:
+		del doc["endStamp"]
+	if rng.random() < .05:
+		doc["startStamp"] = "bad"
+	return doc
+
+def _randomQuery(rng):
+	""" build(collection, cursor=None) for one random filter/order/limit/select combination """
+	filters = []
+	if rng.random() < .8: filters.append(("ownerID", "==", rng.choice(["u1", "u2", "u9"])))
+	if rng.random() < .5: filters.append(("endStamp", ">=", rng.choice(_cuts)))
+	if rng.random() < .5: filters.append(("startStamp", "<", rng.choice(_cuts)))
+	if rng.random() < .2: filters.append(("active", "==", True))
+	if rng.random() < .2: filters.append(("participants", "array_contains", rng.choice(["u1", "u3"])))
+	if rng.random() < .2: filters.append(("n", ">", 1))
+	if rng.random() < .1: filters.append(("path", "in", ["a/b", "x"]))
+	orders = rng.choice([[], [("endStamp", False), ("startStamp", False), ("__name__", False)], [("startStamp", True)], [("n", False)]])
+	limit = rng.choice([None, 1, 7, 50])
+	fields = rng.choice([None, ["path", "m.k"]])
+
+	def build(co, cursor=None):
+		q = co
+		for f in filters:
+			q = q.where(filter=FieldFilter(*f))
+		for field, desc in orders:
+			q = q.order_by(field, direction="DESCENDING" if desc else "ASCENDING")
+		if fields:
+			q = q.select(fields)
+		if cursor is not None:
+			q = q.start_after(cursor)
+		if limit:
+			q = q.limit(limit)
+		return q
+
+	return build, (filters, orders, limit, fields)
+
+def _results(client, build, cursor=None):
+	return [(s.id, s.to_dict()) for s in build(client.collection("c"), cursor).stream()]
+
+def _randomWrite(client, seed):
+	rng = random.Random(seed)
+	batch = client.batch()
+	ref = client.collection("c").document(f"d{rng.randrange(320):04d}")
+	if rng.random() < .3:
+		batch.delete(ref)
+	else:
+		batch.set(ref, {
+			"ownerID": "u1", "startStamp": _base + timedelta(hours=rng.randrange(500)),
+			"endStamp": _base + timedelta(hours=rng.randrange(500)), "participants": ["u3"], "v": Increment(1),
+		}, merge=True)
+		batch.set(client.collection("users").document("u1"), {"versions": {"events": Increment(1)}}, merge=True)
+	batch.commit()
+
+def checkQueries(sqlite, queries=400, seed=2):
+	"""
+	Identical results from FakeClient and sqlite over queries random rounds. Returns the mismatches.
+	"""
+	rng = random.Random(seed)
+	fake = FakeClient()
+	docs = {f"d{i:04d}": _doc(rng) for i in range(300)}
+	fake.load("c", docs)
+	sqlite.load("c", docs)
+
+	mismatches = []
+	for t in range(queries):
+		build, shape = _randomQuery(rng)
+		a, b = _results(fake, build), _results(sqlite, build)
+		if a != b:
+			mismatches.append(("query", t, shape, [x[0] for x in a][:10], [x[0] for x in b][:10]))
+		elif a and shape[1]:
+			cursorID = a[0][0]
+			a = _results(fake, build, fake.collection("c").document(cursorID).get())
+			b = _results(sqlite, build, sqlite.collection("c").document(cursorID).get())
+			if a != b:
+				mismatches.append(("cursor", t, shape, [x[0] for x in a][:10], [x[0] for x in b][:10]))
+		_randomWrite(fake, t)
+		_randomWrite(sqlite, t)
+
+	a, b = (c.collection("users").document("u1").get().to_dict() for c in (fake, sqlite))
+	if a != b:
+		mismatches.append(("transforms", a, b))
+	return mismatches
+
+def checkPrecondition(client):
+	""" A write against a stale last_update_time is refused """
+	ref = client.collection("c").document("precondition")
+	ref.set({"x": 0})
+	stale = ref.get().update_time
+	ref.update({"x": 1}, option=client.write_option(last_update_time=stale))
+	try:
+		ref.update({"x": 2}, option=client.write_option(last_update_time=stale))
+	except exceptions.FailedPrecondition:
+		return True
+	return False
+
+def _coarseNow():
+	now = DatetimeWithNanoseconds.now(timezone.utc)
+	return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def _commitMany(path, worker, commits, out):
+	sqlitestore._now = _coarseNow
+	client = SQLiteClient(path)
+	ref = client.collection("clock").document("shared")
+	out.put([ref.set({"worker": worker, "i": i}).update_time for i in range(commits)])
+	client.close()
+
+def checkCommitClock(path, processes=4, commits=200):
+	"""
+	Update times from processes committing to one file at once: each process's increase,
+	and no two commits share one. Returns the number of duplicates.
+	"""
+	out = multiprocessing.Queue()
+	workers = [multiprocessing.Process(target=_commitMany, args=(path, w, commits, out)) for w in range(processes)]
+	for p in workers:
+		p.start()
+	times = [out.get() for _ in workers]
+	for p in workers:
+		p.join()
+	if any(a >= b for stamps in times for a, b in zip(stamps, stamps[1:])):
+		return -1
+	flat = [t for stamps in times for t in stamps]
+	return len(flat) - len(set(flat))
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Differential check of SQLiteClient against FakeClient")
+	parser.add_argument("--queries", type=int, default=400, help="random query + write rounds")
+	parser.add_argument("--seed", type=int, default=2)
+	parser.add_argument("--path", default=None, help="scratch SQLite file, cleared first (a temp file when omitted)")
+	parser.add_argument("--processes", type=int, default=4, help="concurrent writers for the commit clock check")
+	args = parser.parse_args(argv)
+
+	with tempfile.TemporaryDirectory() as tmp:
+		path = args.path or os.path.join(tmp, "parity.sqlite3")
+		sqlite = SQLiteClient(path)
+		sqlite.clear()
+		failed = False
+
+		mismatches = checkQueries(sqlite, args.queries, args.seed)
+		for m in mismatches[:10]:
+			print("mismatch:", *m)
+		print(f"queries: {args.queries} rounds, {len(mismatches)} mismatches")
+		failed |= bool(mismatches)
+
+		ok = checkPrecondition(sqlite)
+		print(f"precondition: {'refused stale write' if ok else 'stale write went through'}")
+		failed |= not ok
+		sqlite.close()
+
+		duplicates = checkCommitClock(path, args.processes)
+		print(f"commit clock: {args.processes} processes, " + ("update times went backwards" if duplicates < 0 else f"{duplicates} duplicate update times"))
+		failed |= duplicates != 0
+
+	return 1 if failed else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,140 @@
+# backend/benchmarks/validation.py
+"""
+Per-payload cost of the composite guard: the hand-written checks upsertComposite used
+to run vs. the compiled schema in backend/validation.py.
+
+	python -m backend.benchmarks.validation [--iterations N]
+"""
+import argparse
+import timeit
+from backend.validation import validateComposite
+
+def legacyGuard(payload):
+	"""
+	upsertComposite's original inline guard, kept verbatim as the baseline.
+	"""
+	# Grab individual objects from payload
+	form  = payload.get("form",  {})
+	event = payload.get("event", {})
+	scheds = payload.get("schedules", {})
+	comp = payload.get("completion", {})
+	dirty = payload.get("dirty", {})
+	toDelete = payload.get("toDelete", {})
+
+	# region GUARD
+	validComposite = True
+	invalidCompositeInfo = "Canceling upsertComposite"
+
+	# top level type check
+	if not all(isinstance(obj, dict) for obj in (form, event, scheds, comp, dirty, toDelete)):
+		objs = {
+			"form": form, "event": event, 
+			"schedules": scheds, "completion": comp, 
+			"dirty": dirty, "toDelete": toDelete
+		}
+		bad = [f"{k}: {type(v).__name__}" for k, v in objs.items() if not isinstance(v, dict)]
+		invalidCompositeInfo += "\n due to invalid types: " + ", ".join(bad)
+		validComposite = False
+
+	# required keys + value types (always check; even if {} we want errors)
+	for name, obj in (("toDelete", toDelete), ("dirty", dirty)):
+		missing = [k for k in ("form", "event", "completion", "schedules") if k not in obj]
+		if missing:
+			invalidCompositeInfo += f"\n due to missing {name} indicators: [{', '.join(missing)}]"
+			validComposite = False
+		else:
+			# form/event flags must be bool
+			for objName in ("form", "event", "completion"):
+				val = obj.get(objName)
+				if not isinstance(val, bool):
+					invalidCompositeInfo += f"\n due to non-bool {name}.{objName} indicator type: {type(val).__name__}"
+					validComposite = False
+			# schedules map must be dict[str,bool]
+			objMap = obj.get("schedules")
+			if not isinstance(objMap, dict):
+				invalidCompositeInfo += f"\n due to non-dict {name}.schedules indicator type: {type(objMap).__name__}"
+				validComposite = False
+			else:
+				for objID, flag in objMap.items():
+					if not isinstance(flag, bool):
+						invalidCompositeInfo += f"\n due to non-bool {name}.schedules.{objID} indicator type: {type(flag).__name__}"
+						validComposite = False
+
+	# key alignment between scheds and flag maps (only if all dicts)
+	if isinstance(scheds, dict) and isinstance((dirty).get("schedules"), dict) and isinstance((toDelete).get("schedules"), dict):
+		schedIDs       = sorted(scheds.keys())
+		dirtySchedIDs  = sorted(dirty.get("schedules", {}).keys())
+		deleteSchedIDs = sorted(toDelete.get("schedules", {}).keys())
+		for nm, ids in (("dirty", dirtySchedIDs), ("toDelete", deleteSchedIDs)):
+			if schedIDs != ids:
+				invalidCompositeInfo += f"\n due to mismatched scheduleIDs between {nm}['schedules'] ({', '.join(ids)}) and schedules ({', '.join(schedIDs)})"
+				validComposite = False
+
+	# Check for completion misalignment
+	touchCompletion = (dirty.get('completion', None) or toDelete.get('completion', None))
+	completionExists = bool(event.get('completionID')) or touchCompletion
+	if touchCompletion and not comp.get("_id", None):
+		invalidCompositeInfo += "\n No completion _id"
+		validComposite = False
+	if toDelete.get('event', None) != toDelete.get('completion', None):
+		invalidCompositeInfo += "\n toDelete['event'] != toDelete['completion]"
+		validComposite = False
+	if completionExists:
+		eSchedID = event.get("scheduleID", None)
+		eCompID = event.get("completionID", None)
+		cSchedID = comp.get("scheduleID", None)
+		cEventID = comp.get("eventID", None)
+		cID = comp.get("_id", None)
+		eID = event.get("_id", None)
+		if eSchedID != cSchedID: # Event and completion should contain same scheduleID
+			invalidCompositeInfo += "\n event and completion contain differing scheduleIDs"
+			validComposite = False
+		if eCompID != cID: # Event should contain correct completionID (could be None)
+			invalidCompositeInfo += f"\n event contains incorrect completionID true({cID}) != joinID({eCompID})"
+			validComposite = False
+		if cEventID != eID: # Completion should contain correct eventID (could be None)
+			invalidCompositeInfo += f"\n completion contains incorrect eventID true({eID}) != joinID({cEventID})"
+			validComposite = False
+
+	return validComposite, invalidCompositeInfo
+
+def makePayload(numScheds=3, valid=True):
+	""" Composite shaped like HandleComposite.js builds on save """
+	schedIDs = [f"sched{i}" for i in range(numScheds)]
+	event = {
+		"_id": "event1", "path": "work/standup", "formID": "form1",
+		"scheduleID": "sched0", "completionID": "comp1",
+		"startStamp": "2025-03-01T14:00:00.000Z", "endStamp": "2025-03-01T14:15:00.000Z",
+		"info": [{"label": "Notes", "type": "text", "content": "x" * 200}],
+	}
+	comp = {"_id": "comp1", "eventID": "event1" if valid else "other", "scheduleID": "sched0", "path": "work/standup"}
+	return {
+		"form": {"_id": "form1", "path": "work/standup", "info": event["info"], "includeStart": True},
+		"event": event,
+		"completion": comp,
+		"schedules": {sID: {"_id": sID, "path": "work/standup", "period": "daily", "interval": 1} for sID in schedIDs},
+		"dirty": {"form": True, "event": True, "completion": True, "schedules": {sID: True for sID in schedIDs}},
+		"toDelete": {"form": False, "event": False, "completion": False, "schedules": {sID: False for sID in schedIDs}},
+	}
+
+def run(iterations=20000):
+	rows = []
+	for label, payload in (
+		("valid, 3 schedules", makePayload(3)),
+		("valid, 50 schedules", makePayload(50)),
+		("invalid join", makePayload(3, valid=False)),
+	):
+		assert legacyGuard(payload)[0] == (not validateComposite(payload))
+		legacy = timeit.timeit(lambda: legacyGuard(payload), number=iterations) / iterations * 1e6
+		compiled = timeit.timeit(lambda: validateComposite(payload), number=iterations) / iterations * 1e6
+		rows.append((label, legacy, compiled))
+
+	print(f"{'payload':24} {'legacy us':>10} {'compiled us':>12}")
+	for label, legacy, compiled in rows:
+		print(f"{label:24} {legacy:10.2f} {compiled:12.2f}")
+	return rows
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Composite validation micro-benchmark")
+	parser.add_argument("--iterations", type=int, default=20000)
+	run(parser.parse_args().iterations)
@@ -0,0 +1,86 @@
+# backend/cache.py
+import threading
+from cachetools import TTLCache
+from backend.config import USER_CACHE_SIZE, USER_CACHE_TTL
+
+_caches = []
+
+class StatCache:
+	"""
+	Thread-safe wrapper around a cachetools cache that counts hits/misses.
+	"""
+	def __init__(self, name, cache):
+		self.name = name
+		self._cache = cache
+		self._lock = threading.Lock()
+		self._epoch = 0 # bumped by every invalidation so in-flight loads don't store stale values
+		self.hits = self.misses = self.invalidations = self.refreshes = 0
+		_caches.append(self)
+
+	def get(self, key, load):
+		"""
+		Cached value for key, otherwise store and return load().
+		"""
+		with self._lock:
+			try:
+				val = self._cache[key]
+				self.hits += 1
+				return val
+			except KeyError:
+				self.misses += 1
+				epoch = self._epoch
+
+		val = load()
+		with self._lock:
+			if epoch == self._epoch:
+				self._cache[key] = val
+		return val
+
+	def refresh(self, key, val):
+		"""
+		Replace a still-cached value after re-validating it.
+		"""
+		with self._lock:
+			self.refreshes += 1
+			self._cache[key] = val
+
+	def invalidate(self, key):
+		with self._lock:
+			self._epoch += 1
+			self.invalidations += 1
+			self._cache.pop(key, None)
+
+	def discard(self, key):
+		"""
+		Drop key alone. Unlike invalidate it leaves the epoch be, so other keys' in-flight
+		loads still get stored; for entries that went bad themselves, not stale data.
+		"""
+		with self._lock:
+			self.invalidations += 1
+			self._cache.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self._epoch += 1
+			self._cache.clear()
+
+	def stats(self):
+		with self._lock:
+			return {
+				"size": len(self._cache),
+				"maxsize": self._cache.maxsize,
+				"hits": self.hits,
+				"misses": self.misses,
+				"invalidations": self.invalidations,
+				"refreshes": self.refreshes,
+			}
+
+# Per-user snapshots of collections only written through upsertComposite
+formsCache = StatCache("forms", TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL))
+schedulesCache = StatCache("schedules", TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL))
+
+def cacheStats():
+	"""
+	Counters for every shared cache, keyed by cache name.
+	"""
+	return {c.name: c.stats() for c in _caches}
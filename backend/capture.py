@@ -0,0 +1,111 @@
+# backend/capture.py
+import os
+import gzip
+import json
+import time
+import atexit
+import random
+import threading
+import datetime as dt
+from collections import deque
+from flask import g, request
+from backend.config import CAPTURE_RATE, CAPTURE_BUFFER, CAPTURE_DIR, CAPTURE_FLUSH_SECONDS
+from backend.logger import getLogger
+
+logger = getLogger(__name__)
+
+class CaptureBuffer:
+	"""
+	Bounded ring of captured requests drained to gzipped NDJSON by a daemon thread.
+	When the ring is full the oldest capture is overwritten and counted as dropped.
+	"""
+	def __init__(self, size, outDir, flushSeconds):
+		self._ring = deque(maxlen=size)
+		self._lock = threading.Lock()
+		self.outDir = outDir
+		self.flushSeconds = flushSeconds
+		self.captured = self.dropped = self.written = 0
+		self._thread = None
+
+	def start(self):
+		if self._thread:
+			return
+		os.makedirs(self.outDir, exist_ok=True)
+		self._thread = threading.Thread(target=self._run, name="capture-flush", daemon=True)
+		self._thread.start()
+		atexit.register(self.flush)
+
+	def add(self, record):
+		with self._lock:
+			if len(self._ring) == self._ring.maxlen:
+				self.dropped += 1
+			self._ring.append(record)
+			self.captured += 1
+
+	def _run(self):
+		while True:
+			time.sleep(self.flushSeconds)
+			self.flush()
+
+	def flush(self):
+		"""
+		Append everything buffered to today's capture file (one gzip member per flush).
+		"""
+		with self._lock:
+			records = list(self._ring)
+			self._ring.clear()
+		if not records:
+			return
+
+		path = os.path.join(self.outDir, f"capture-{dt.date.today().isoformat()}.ndjson.gz")
+		try:
+			lines = "".join(json.dumps(r, default=str) + "\n" for r in records)
+			with gzip.open(path, "at", encoding="utf-8") as f:
+				f.write(lines)
+			self.written += len(records)
+		except Exception as e:
+			logger.warning(f"Dropping {len(records)} captured requests, write failed: {e}")
+
+	def stats(self):
+		with self._lock:
+			return {
+				"buffered": len(self._ring),
+				"captured": self.captured,
+				"dropped": self.dropped,
+				"written": self.written,
+			}
+
+captureBuffer = CaptureBuffer(CAPTURE_BUFFER, CAPTURE_DIR, CAPTURE_FLUSH_SECONDS)
+
+def initCapture(app, rate=CAPTURE_RATE):
+	"""
+	Sample rate fraction of requests into captureBuffer. No-op when rate is 0.
+	"""
+	if rate <= 0:
+		return
+
+	@app.before_request
+	def _sampleRequest():
+		if random.random() >= rate:
+			return
+		# Grab the body before routes mutate the parsed json
+		g.capture = {
+			"ts": time.time(),
+			"method": request.method,
+			"path": request.path,
+			"query": request.query_string.decode(),
+			"body": request.get_data(cache=True, as_text=True) or None,
+		}
+
+	@app.after_request
+	def _recordRequest(response):
+		record = g.pop("capture", None)
+		if record:
+			record["uid"] = getattr(request, "uid", None)
+			record["status"] = response.status_code
+			record["ms"] = round((time.time() - record["ts"]) * 1000, 1)
+			captureBuffer.add(record)
+		return response
+
+	captureBuffer.start()
+	logger.debug(f"Capturing {rate:.1%} of requests to {CAPTURE_DIR}")
@@ -17,3 +17,51 @@ LOGGER_CREDS   = json.loads(os.getenv("LOGGER_ADMIN_JSON", "{}"))
 
 MASS_MIGRATE = None
 
+# Compiled schedule rules kept in memory (per schedule doc + update time)
+RULE_CACHE_SIZE = int(os.getenv("RULE_CACHE_SIZE", 4096))
+# Widest window /schedules/occurrences will expand
+OCCURRENCE_MAX_DAYS = int(os.getenv("OCCURRENCE_MAX_DAYS", 400))
+
+# Per-user forms/schedules read cache (users held, seconds before refetch)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+
+# Verified ID tokens held until exp, revocation re-checked every N seconds (0 = every request)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 4096))
+TOKEN_REVOCATION_INTERVAL = int(os.getenv("TOKEN_REVOCATION_INTERVAL", 300))
+
+# Threads shared by /calendar for its concurrent Firestore reads
+CALENDAR_WORKERS = int(os.getenv("CALENDAR_WORKERS", 8))
+
+# Read/check/commit attempts for a checklist mutation whose item keeps changing underneath it
+CHECKLIST_COMMIT_ATTEMPTS = int(os.getenv("CHECKLIST_COMMIT_ATTEMPTS", 3))
+
+# Most ops one POST /checklist/bulk may carry
+CHECKLIST_BULK_MAX = int(os.getenv("CHECKLIST_BULK_MAX", 1000))
+
+# Days a tombstone is kept for /sync before the expireAt TTL policy removes it;
+# clients whose since token is older get a full snapshot instead of a delta
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", 30))
+
+# Largest page ?limit= may ask for on range queries
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+# Request capture for replay (fraction sampled, ring size, output dir, flush period)
+CAPTURE_RATE = float(os.getenv("CAPTURE_RATE", 0))
+CAPTURE_BUFFER = int(os.getenv("CAPTURE_BUFFER", 1000))
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "backend/logs/capture")
+CAPTURE_FLUSH_SECONDS = float(os.getenv("CAPTURE_FLUSH_SECONDS", 5))
+
+# Log records buffered for the background log writer before new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# Bearer token /metrics requires when set; unset, /metrics is only served in devMode
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Storage behind the routes: "firestore", or "sqlite" for a local database file (single node/self-hosted)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "backend/data/portia.sqlite3")
+
+# Accept "Bearer stub:<uid>" without Firebase (dev only, for replay/benchmarks)
+AUTH_STUB = devMode and os.getenv("AUTH_STUB", "0") == "1"
+
@@ -0,0 +1,56 @@
+# backend/encoding.py
+"""
+orjson-backed JSON provider for the app.
+
+Datetimes are written as canonical UTC '...Z' strings wherever they sit in a response,
+so routes can jsonify Firestore dicts as-is without a per-doc copy and conversion pass.
+"""
+from datetime import datetime, date, timezone
+from decimal import Decimal
+import orjson
+from flask.json.provider import JSONProvider
+from backend.helpers import _dtToIso
+from backend.metrics import phase
+
+# Route every datetime through _encodeDefault (Firestore hands back a subclass orjson rejects anyway)
+_dumpOptions = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+def _encodeDefault(o):
+	"""
+	Types orjson won't serialize natively.
+	"""
+	if isinstance(o, datetime):
+		if o.tzinfo is timezone.utc: # Firestore stamps, skip astimezone
+			return o.isoformat()[:-6] + "Z"
+		return _dtToIso(o)
+	if isinstance(o, date):
+		return o.isoformat()
+	if isinstance(o, (set, frozenset)):
+		return list(o)
+	if isinstance(o, Decimal):
+		return str(o)
+	if hasattr(o, "__html__"):
+		return str(o.__html__())
+	raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def dumpBytes(obj):
+	""" UTF-8 JSON for obj """
+	return orjson.dumps(obj, default=_encodeDefault, option=_dumpOptions)
+
+class OrjsonProvider(JSONProvider):
+	"""
+	Flask JSON provider on orjson. Keys keep insertion order and output is compact.
+	"""
+	mimetype = "application/json"
+
+	def dumps(self, obj, **kwargs):
+		return dumpBytes(obj).decode()
+
+	def loads(self, s, **kwargs):
+		return orjson.loads(s)
+
+	def response(self, *args, **kwargs):
+		obj = self._prepare_response_obj(args, kwargs)
+		with phase("encode"):
+			body = dumpBytes(obj)
+		return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,931 @@
+# backend/fakestore.py
+"""
+In-memory stand-in for the slice of the Firestore client this project uses, for benchmarks
+and local runs without a Firebase project:
+
+	from backend import createApp
+	from backend.fakestore import FakeClient
+	app = createApp(db=FakeClient())
+
+Covers collection/document refs, where (==, !=, <, <=, >, >=, in, not-in, array_contains,
+array_contains_any, and document ID filters on __name__), order_by, limit, start_after, select, stream/get, get_all, batches,
+read-only and read-write transactions, bulk writers, add, write options (last_update_time / exists) and
+the SERVER_TIMESTAMP, DELETE_FIELD, Increment, ArrayUnion and ArrayRemove transforms.
+
+Stored values round trip the way Firestore returns them: datetimes come back as UTC
+DatetimeWithNanoseconds and to_dict() hands out a private copy. Queries narrow the collection
+through lazily built per-field indexes (hash for ==, sorted for ranges), walk the first
+order_by field's index when limited, and order by __name__ unless ordered otherwise, so
+relative costs are meaningful but absolute latency is not Firestore's.
+"""
+import bisect
+import secrets
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from google.api_core import exceptions
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.bulk_writer import (
+	BulkWriteFailure, BulkWriterCreateOperation, BulkWriterDeleteOperation,
+	BulkWriterSetOperation, BulkWriterUpdateOperation,
+)
+
+_unaryOps = {"IS_NULL": "==", "IS_NOT_NULL": "!=", "IS_NAN": "==", "IS_NOT_NAN": "!="}
+
+_autoIDChars = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+def _autoID():
+	return "".join(secrets.choice(_autoIDChars) for _ in range(20))
+
+def _now():
+	return DatetimeWithNanoseconds.now(timezone.utc)
+
+# region VALUES
+
+def _store(value):
+	""" Copy of a written value in stored form (datetimes as UTC DatetimeWithNanoseconds) """
+	if isinstance(value, dict):
+		return {k: _store(v) for k, v in value.items()}
+	if isinstance(value, (list, tuple)):
+		return [_store(v) for v in value]
+	if isinstance(value, datetime):
+		if type(value) is DatetimeWithNanoseconds and value.tzinfo is timezone.utc:
+			return value
+		value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+		return DatetimeWithNanoseconds(
+			value.year, value.month, value.day, value.hour, value.minute,
+			value.second, value.microsecond, tzinfo=timezone.utc,
+		)
+	return value
+
+def _copy(value):
+	""" Private copy of stored data, cheaper than deepcopy for plain JSON-ish trees """
+	if isinstance(value, dict):
+		return {k: _copy(v) for k, v in value.items()}
+	if isinstance(value, list):
+		return [_copy(v) for v in value]
+	return value
+
+# Firestore's cross-type ordering: null < bool < number < timestamp < string < bytes < array < map
+_ranks = {
+	type(None): 0, bool: 1, int: 2, float: 2, datetime: 3, DatetimeWithNanoseconds: 3,
+	str: 4, bytes: 5, list: 8, dict: 9,
+}
+
+def _rank(value):
+	rank = _ranks.get(type(value))
+	if rank is not None:
+		return rank
+	if value is None:
+		return 0
+	if isinstance(value, bool):
+		return 1
+	if isinstance(value, (int, float)):
+		return 2
+	if isinstance(value, datetime):
+		return 3
+	if isinstance(value, str):
+		return 4
+	if isinstance(value, bytes):
+		return 5
+	if isinstance(value, list):
+		return 8
+	if isinstance(value, dict):
+		return 9
+	return 10
+
+def _sortKey(value):
+	rank = _rank(value)
+	if rank == 8:
+		return (rank, tuple(_sortKey(v) for v in value))
+	if rank == 9:
+		return (rank, tuple((k, _sortKey(v)) for k, v in sorted(value.items())))
+	if rank == 0:
+		return (rank, 0)
+	return (rank, value)
+
+def _indexKey(value):
+	""" Hashable, orderable key for scalar values, None for values the indexes can't hold """
+	rank = _rank(value)
+	if rank >= 8:
+		return None
+	return (rank, 0) if rank == 0 else (rank, value)
+
+class _Top:
+	""" Sorts after every docID, for bisecting past all entries with one key """
+	def __lt__(self, other):
+		return False
+
+	def __gt__(self, other):
+		return True
+
+_top = _Top()
+_noIDs = frozenset()
+
+_missing = object()
+
+def _docID(value):
+	""" Document ID from a __name__ filter or cursor value (a reference, path or bare ID) """
+	return value.id if isinstance(value, FakeDocument) else str(value).rsplit("/", 1)[-1]
+
+def _getter(path):
+	""" _getPath bound to path, with a fast path for top-level fields """
+	if "." not in path:
+		return lambda data: data.get(path, _missing)
+	return lambda data: _getPath(data, path)
+
+def _getPath(data, path):
+	for part in path.split("."):
+		if not isinstance(data, dict) or part not in data:
+			return _missing
+		data = data[part]
+	return data
+
+def _setPath(data, path, value):
+	*parents, leaf = path.split(".")
+	for part in parents:
+		child = data.get(part)
+		if not isinstance(child, dict):
+			child = data[part] = {}
+		data = child
+	if value is transforms.DELETE_FIELD:
+		data.pop(leaf, None)
+		return
+	data[leaf] = _transform(data.get(leaf, _missing), value)
+
+def _transform(current, value):
+	""" Stored value after writing value over current (sentinels resolved) """
+	if value is transforms.SERVER_TIMESTAMP:
+		return _now()
+	if isinstance(value, transforms.Increment):
+		base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+		return base + value.value
+	if isinstance(value, transforms.ArrayUnion):
+		out = list(current) if isinstance(current, list) else []
+		out += [v for v in _store(value.values) if v not in out]
+		return out
+	if isinstance(value, transforms.ArrayRemove):
+		removed = _store(value.values)
+		return [v for v in current if v not in removed] if isinstance(current, list) else []
+	if isinstance(value, dict):
+		return {k: _transform(_missing, v) for k, v in value.items() if v is not transforms.DELETE_FIELD}
+	return _store(value)
+
+def _merge(current, data):
+	""" set(merge=True): nested maps merge, everything else replaces """
+	for k, v in data.items():
+		if v is transforms.DELETE_FIELD:
+			current.pop(k, None)
+		elif isinstance(v, dict) and isinstance(current.get(k), dict):
+			_merge(current[k], v)
+		else:
+			current[k] = _transform(current.get(k, _missing), v)
+
+def _project(data, fields):
+	out = {}
+	for path in fields:
+		value = _getPath(data, path)
+		if value is not _missing:
+			_setPath(out, path, _copy(value))
+	return out
+
+# endregion
+
+# region FILTERS
+
+def _predicate(field, op, target):
+	"""
+	Compiled filter: data -> bool. Range and == filters on scalars skip the generic sort keys.
+	"""
+	get = _getter(field)
+	rank = _rank(target)
+	if op in _scalarOps and rank < 8:
+		compare = _scalarOps[op]
+		def check(data):
+			value = get(data)
+			return value is not _missing and _rank(value) == rank and compare(value, target)
+		return check
+
+	def check(data):
+		value = get(data)
+		return value is not _missing and _compare(op, value, target)
+	return check
+
+_scalarOps = {
+	"==": lambda a, b: a == b,
+	"<": lambda a, b: a < b,
+	"<=": lambda a, b: a <= b,
+	">": lambda a, b: a > b,
+	">=": lambda a, b: a >= b,
+}
+
+def _compare(op, value, target):
+	if op == "array_contains":
+		return isinstance(value, list) and target in value
+	if op == "array_contains_any":
+		return isinstance(value, list) and any(t in value for t in target)
+	if op == "in":
+		key = _sortKey(value)
+		return any(key == _sortKey(t) for t in target)
+	if op == "not-in":
+		key = _sortKey(value)
+		return value is not None and all(key != _sortKey(t) for t in target)
+	if op == "!=":
+		return value is not None and _sortKey(value) != _sortKey(target)
+
+	a, b = _sortKey(value), _sortKey(target)
+	if op == "==":
+		return a == b
+	if a[0] != b[0]: # ranges only match values of the same type
+		return False
+	if op == "<":
+		return a < b
+	if op == "<=":
+		return a <= b
+	if op == ">":
+		return a > b
+	if op == ">=":
+		return a >= b
+	raise ValueError(f"Unsupported operator '{op}'")
+
+def _resolveOrders(query):
+	"""
+	([(field, descending)], [getter or None for __name__]) with the implicit __name__ tiebreak appended.
+	"""
+	orders = list(query._orders)
+	if not any(f == "__name__" for f, _ in orders):
+		orders.append(("__name__", orders[-1][1] if orders else False))
+	return orders, [None if f == "__name__" else _getter(f) for f, _ in orders]
+
+# endregion
+
+# region SNAPSHOTS/REFS
+
+class FakeSnapshot:
+	"""
+	DocumentSnapshot lookalike. data is never handed out without a copy.
+	"""
+	__slots__ = ("reference", "_data", "create_time", "update_time")
+
+	def __init__(self, reference, data, createTime=None, updateTime=None):
+		self.reference = reference
+		self._data = data
+		self.create_time = createTime
+		self.update_time = updateTime
+
+	@property
+	def id(self):
+		return self.reference.id
+
+	@property
+	def exists(self):
+		return self._data is not None
+
+	def to_dict(self):
+		return _copy(self._data) if self._data is not None else None
+
+	def get(self, field):
+		value = _getPath(self._data or {}, field)
+		if value is _missing:
+			raise KeyError(field)
+		return _copy(value)
+
+class _Precondition:
+	__slots__ = ("lastUpdateTime", "exists")
+
+	def __init__(self, lastUpdateTime=None, exists=None):
+		self.lastUpdateTime = lastUpdateTime
+		self.exists = exists
+
+class FakeDocument:
+	__slots__ = ("_client", "_collection", "id")
+
+	def __init__(self, client, collection, docID):
+		self._client = client
+		self._collection = collection
+		self.id = docID
+
+	@property
+	def path(self):
+		return f"{self._collection}/{self.id}"
+
+	@property
+	def _document_path(self):
+		return self.path
+
+	@property
+	def parent(self):
+		return FakeCollection(self._client, self._collection)
+
+	def __eq__(self, other):
+		return getattr(other, "path", None) == self.path
+
+	def __hash__(self):
+		return hash(self.path)
+
+	def collection(self, name):
+		return FakeCollection(self._client, f"{self.path}/{name}")
+
+	def get(self, field_paths=None, transaction=None, **kwargs):
+		snap = self._client._snapshot(self._collection, self.id, self)
+		if transaction is not None:
+			transaction._noteRead(snap)
+		if field_paths is not None and snap.exists:
+			snap._data = _project(snap._data, field_paths)
+		return snap
+
+	def set(self, document_data, merge=False):
+		return self._client._commit([("set", self, document_data, merge, None)])[0]
+
+	def create(self, document_data):
+		return self._client._commit([("create", self, document_data, False, None)])[0]
+
+	def update(self, field_updates, option=None):
+		return self._client._commit([("update", self, field_updates, False, option)])[0]
+
+	def delete(self, option=None):
+		return self._client._commit([("delete", self, None, False, option)])[0]
+
+class _WriteResult:
+	__slots__ = ("update_time",)
+
+	def __init__(self, updateTime):
+		self.update_time = updateTime
+
+# endregion
+
+# region QUERIES
+
+class FakeQuery:
+	def __init__(self, client, collection, filters=(), orders=(), limit=None, cursor=None, fields=None):
+		self._client = client
+		self._collection = collection
+		self._filters = filters
+		self._orders = orders
+		self._limit = limit
+		self._cursor = cursor
+		self._fields = fields
+
+	def _with(self, **changes):
+		state = {
+			"filters": self._filters, "orders": self._orders, "limit": self._limit,
+			"cursor": self._cursor, "fields": self._fields, **changes,
+		}
+		return FakeQuery(self._client, self._collection, **state)
+
+	def where(self, field_path=None, op_string=None, value=None, filter=None):
+		if filter is not None:
+			field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+		if not isinstance(op_string, str): # FieldFilter turns null/NaN comparisons into unary operators
+			op_string = _unaryOps[op_string.name]
+		return self._with(filters=self._filters + ((field_path, op_string, _store(value)),))
+
+	def order_by(self, field_path, direction="ASCENDING"):
+		return self._with(orders=self._orders + ((field_path, direction == "DESCENDING"),))
+
+	def limit(self, count):
+		return self._with(limit=count)
+
+	def select(self, field_paths):
+		return self._with(fields=tuple(field_paths))
+
+	def start_after(self, document_fields_or_snapshot):
+		return self._with(cursor=document_fields_or_snapshot)
+
+	def _cursorKey(self, orders):
+		cursor = self._cursor
+		if isinstance(cursor, FakeSnapshot):
+			values = [cursor.id if f == "__name__" else _getPath(cursor._data, f) for f, _ in orders]
+		else:
+			values = [cursor.get(f) for f, _ in orders]
+		return [_docID(v) if f == "__name__" else _store(v) for (f, _), v in zip(orders, values)]
+
+	def stream(self, transaction=None, **kwargs):
+		snaps = self._client._run(self)
+		if transaction is not None:
+			for snap in snaps:
+				transaction._noteRead(snap)
+		return iter(snaps)
+
+	def get(self, transaction=None, **kwargs):
+		return list(self.stream(transaction=transaction))
+
+class FakeCollection(FakeQuery):
+	def __init__(self, client, path):
+		super().__init__(client, path)
+
+	@property
+	def id(self):
+		return self._collection.rsplit("/", 1)[-1]
+
+	def document(self, document_id=None):
+		return FakeDocument(self._client, self._collection, document_id or _autoID())
+
+	def add(self, document_data, document_id=None):
+		ref = self.document(document_id)
+		result = self._client._commit([("create", ref, document_data, False, None)])[0]
+		return result.update_time, ref
+
+	def list_documents(self, **kwargs):
+		return [self.document(docID) for docID in self._client._listIDs(self._collection)]
+
+# endregion
+
+# region WRITES
+
+class FakeBatch:
+	"""
+	WriteBatch lookalike, all queued writes land atomically on commit.
+	"""
+	def __init__(self, client):
+		self._client = client
+		self._writes = []
+		self.write_results = None
+
+	def __len__(self):
+		return len(self._writes)
+
+	def set(self, reference, document_data, merge=False):
+		self._writes.append(("set", reference, document_data, merge, None))
+
+	def create(self, reference, document_data):
+		self._writes.append(("create", reference, document_data, False, None))
+
+	def update(self, reference, field_updates, option=None):
+		self._writes.append(("update", reference, field_updates, False, option))
+
+	def delete(self, reference, option=None):
+		self._writes.append(("delete", reference, None, False, option))
+
+	def commit(self, **kwargs):
+		self.write_results = self._client._commit(self._writes)
+		self._writes = []
+		return self.write_results
+
+class FakeTransaction(FakeBatch):
+	"""
+	Transaction lookalike for gcf.transactional. Reads made through it are checked
+	at commit; if any doc changed since, commit raises Aborted and the wrapper retries.
+	"""
+	def __init__(self, client, max_attempts=5, read_only=False):
+		super().__init__(client)
+		self._max_attempts = max_attempts
+		self._read_only = read_only
+		self._id = None
+		self._reads = {}
+
+	@property
+	def in_progress(self):
+		return self._id is not None
+
+	@property
+	def id(self):
+		return self._id
+
+	def _noteRead(self, snap):
+		self._reads.setdefault(snap.reference.path, snap.update_time)
+
+	def _clean_up(self):
+		self._writes, self._reads, self._id = [], {}, None
+
+	def _begin(self, retry_id=None):
+		self._id = uuid.uuid4().bytes
+
+	def _rollback(self):
+		self._clean_up()
+
+	def _commit(self):
+		if self._read_only and self._writes:
+			raise exceptions.InvalidArgument("Cannot write in a read-only transaction")
+		results = self._client._commit(self._writes, reads=self._reads)
+		self._clean_up()
+		return results
+
+	def get(self, ref_or_query, **kwargs):
+		if isinstance(ref_or_query, FakeQuery) or hasattr(ref_or_query, "_filters"):
+			return iter(ref_or_query.get(transaction=self))
+		return iter([ref_or_query.get(transaction=self)])
+
+	def commit(self, **kwargs):
+		raise TypeError("Commit transactions through gcf.transactional")
+
+class FakeBulkWriter:
+	"""
+	BulkWriter lookalike. Queued writes land one document at a time on flush/close, never
+	atomically together, and failures go through on_write_error with the SDK's BulkWriteFailure:
+	returning True requeues the write with attempts + 1. No rate limiting, threads or backoff,
+	and on_batch_result callbacks are accepted but never called.
+	"""
+	def __init__(self, client, options=None):
+		self._client = client
+		self._options = options
+		self._queue = deque()
+		self._isOpen = True
+		self._onResult = lambda reference, result, writer: None
+		self._onError = lambda failure, writer: failure.attempts < 15
+
+	def _enqueue(self, operation):
+		if not self._isOpen:
+			raise Exception("BulkWriter is closed and cannot accept new operations")
+		self._queue.append(operation)
+
+	def create(self, reference, document_data, attempts=0):
+		self._enqueue(BulkWriterCreateOperation(reference=reference, document_data=document_data, attempts=attempts))
+
+	def set(self, reference, document_data, merge=False, attempts=0):
+		self._enqueue(BulkWriterSetOperation(reference=reference, document_data=document_data, merge=merge, attempts=attempts))
+
+	def update(self, reference, field_updates, option=None, attempts=0):
+		self._enqueue(BulkWriterUpdateOperation(reference=reference, field_updates=field_updates, option=option, attempts=attempts))
+
+	def delete(self, reference, option=None, attempts=0):
+		self._enqueue(BulkWriterDeleteOperation(reference=reference, option=option, attempts=attempts))
+
+	def on_write_result(self, callback):
+		self._onResult = callback or (lambda reference, result, writer: None)
+
+	def on_batch_result(self, callback):
+		pass
+
+	def on_write_error(self, callback):
+		self._onError = callback or (lambda failure, writer: failure.attempts < 15)
+
+	@staticmethod
+	def _write(op):
+		if isinstance(op, BulkWriterCreateOperation):
+			return ("create", op.reference, op.document_data, False, None)
+		if isinstance(op, BulkWriterSetOperation):
+			return ("set", op.reference, op.document_data, op.merge, None)
+		if isinstance(op, BulkWriterUpdateOperation):
+			return ("update", op.reference, op.field_updates, False, op.option)
+		return ("delete", op.reference, None, False, op.option)
+
+	def flush(self):
+		while self._queue:
+			op = self._queue.popleft()
+			try:
+				result = self._client._commit([self._write(op)])[0]
+			except exceptions.GoogleAPICallError as e:
+				status = getattr(e, "grpc_status_code", None)
+				failure = BulkWriteFailure(operation=op, code=status.value[0] if status else 2, message=str(e))
+				if self._onError(failure, self):
+					op.attempts += 1
+					self._queue.append(op)
+				continue
+			self._onResult(op.reference, result, self)
+
+	def close(self):
+		self.flush()
+		self._isOpen = False
+
+# endregion
+
+class FakeClient:
+	"""
+	Firestore Client lookalike holding every collection in process memory.
+	"""
+	def __init__(self, project="fake"):
+		self.project = project
+		self._lock = threading.RLock()
+		self._docs = {} # collection path -> {docID: [data, createTime, updateTime]}
+		self._indexes = {} # (collection path, field) -> {indexKey: set(docIDs)}
+		self._ranges = {} # (collection path, field) -> sorted [(indexKey, docID)]
+
+	def collection(self, path):
+		return FakeCollection(self, path)
+
+	def document(self, path):
+		collection, docID = path.rsplit("/", 1)
+		return FakeDocument(self, collection, docID)
+
+	def batch(self):
+		return FakeBatch(self)
+
+	def transaction(self, max_attempts=5, read_only=False, **kwargs):
+		return FakeTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+	def bulk_writer(self, options=None):
+		return FakeBulkWriter(self, options=options)
+
+	def write_option(self, last_update_time=None, exists=None):
+		return _Precondition(lastUpdateTime=last_update_time, exists=exists)
+
+	def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+		for ref in references:
+			collection, docID = ref.path.rsplit("/", 1)
+			snap = self._snapshot(collection, docID, ref)
+			if transaction is not None:
+				transaction._noteRead(snap)
+			if field_paths is not None and snap.exists:
+				snap._data = _project(snap._data, field_paths)
+			yield snap
+
+	def collections(self):
+		with self._lock:
+			return [FakeCollection(self, path) for path in self._docs if "/" not in path]
+
+	# region INTERNALS
+	# Storage hooks (_entry, _listIDs, _run, _writing, _apply, load, clear) are all another
+	# backend has to replace; refs, queries, batches and transactions go through them.
+
+	def _entry(self, collection, docID):
+		""" (data, createTime, updateTime) of a stored doc, None when missing. data is not copied """
+		return self._docs.get(collection, {}).get(docID)
+
+	def _listIDs(self, collection):
+		with self._lock:
+			return list(self._docs.get(collection, {}))
+
+	def _snapshot(self, collection, docID, ref):
+		with self._lock:
+			entry = self._entry(collection, docID)
+		if entry is None:
+			return FakeSnapshot(ref, None)
+		data, createTime, updateTime = entry
+		return FakeSnapshot(ref, data, createTime, updateTime)
+
+	def _index(self, collection, field):
+		""" == index for field, built on first use and kept current by _commit """
+		index = self._indexes.get((collection, field))
+		if index is None:
+			index = self._indexes[(collection, field)] = {}
+			for docID, (data, _, _) in self._docs.get(collection, {}).items():
+				key = _indexKey(_getPath(data, field))
+				if key is not None:
+					index.setdefault(key, set()).add(docID)
+		return index
+
+	def _range(self, collection, field):
+		""" Sorted [(indexKey, docID)] for field, built on first use and kept current by _commit """
+		index = self._ranges.get((collection, field))
+		if index is None:
+			index = []
+			for docID, (data, _, _) in self._docs.get(collection, {}).items():
+				key = _indexKey(_getPath(data, field))
+				if key is not None:
+					index.append((key, docID))
+			index.sort()
+			self._ranges[(collection, field)] = index
+		return index
+
+	def _reindex(self, collection, docID, before, after):
+		for (coll, field), index in self._indexes.items():
+			if coll != collection:
+				continue
+			old = _indexKey(_getPath(before, field)) if before is not None else None
+			new = _indexKey(_getPath(after, field)) if after is not None else None
+			if old == new:
+				continue
+			if old is not None and old in index:
+				index[old].discard(docID)
+			if new is not None:
+				index.setdefault(new, set()).add(docID)
+
+		for (coll, field), index in self._ranges.items():
+			if coll != collection:
+				continue
+			old = _indexKey(_getPath(before, field)) if before is not None else None
+			new = _indexKey(_getPath(after, field)) if after is not None else None
+			if old == new:
+				continue
+			if old is not None:
+				i = bisect.bisect_left(index, (old, docID))
+				if i < len(index) and index[i] == (old, docID):
+					del index[i]
+			if new is not None:
+				bisect.insort(index, (new, docID))
+
+	def _candidates(self, collection, field, op, value):
+		"""
+		Set of docIDs that can satisfy the filter, from an index. None when no index applies.
+		"""
+		if field == "__name__": # document ID filters, as where(FieldPath.document_id(), op, ref)
+			if op in ("in", "not-in"):
+				ids = {_docID(v) for v in value}
+				keep = (lambda docID: docID in ids) if op == "in" else (lambda docID: docID not in ids)
+			else:
+				target, compare = _docID(value), _scalarOps.get(op) or (lambda a, b: a != b)
+				keep = lambda docID: compare(docID, target)
+			return {docID for docID in self._docs.get(collection, ()) if keep(docID)}
+		key = _indexKey(value)
+		if key is None:
+			return None
+		if op == "==":
+			return self._index(collection, field).get(key, _noIDs)
+		if op not in _scalarOps:
+			return None
+		index = self._range(collection, field)
+		rank = key[0]
+		lo = bisect.bisect_left(index, ((rank,),))
+		hi = bisect.bisect_left(index, ((rank + 1,),))
+		if op == ">":
+			lo = bisect.bisect_left(index, (key, _top), lo, hi)
+		elif op == ">=":
+			lo = bisect.bisect_left(index, (key,), lo, hi)
+		elif op == "<":
+			hi = bisect.bisect_left(index, (key,), lo, hi)
+		elif op == "<=":
+			hi = bisect.bisect_left(index, (key, _top), lo, hi)
+		return {docID for _, docID in index[lo:hi]}
+
+	def _run(self, query):
+		collection, filters = query._collection, query._filters
+		orders, getters = _resolveOrders(query)
+		fieldGetters = [get for get in getters if get is not None]
+		predicates = [_predicate(*f) for f in filters if f[0] != "__name__"]
+
+		def matches(data):
+			# docs missing an ordered field drop out, as in Firestore
+			return all(p(data) for p in predicates) and all(get(data) is not _missing for get in fieldGetters)
+
+		with self._lock:
+			docs = self._docs.get(collection, {})
+			candidates = None
+			for field, op, value in filters:
+				ids = self._candidates(collection, field, op, value)
+				if ids is not None:
+					candidates = ids if candidates is None else (candidates & ids if len(candidates) > len(ids) else ids & candidates)
+
+			walkField = orders[0][0]
+			if query._limit is not None and walkField != "__name__" and len({desc for _, desc in orders}) == 1:
+				# Walk the first order field's index and stop once limit docs (and their ties) are in hand
+				desc, cursorKey = orders[0][1], None
+				if query._cursor is not None:
+					cursorKey = _indexKey(_store(query._cursorKey(orders)[0]))
+				index = self._range(collection, walkField)
+				if cursorKey is not None:
+					cut = bisect.bisect_left(index, (cursorKey, _top) if desc else (cursorKey,))
+					walk = reversed(index[:cut]) if desc else index[cut:]
+				else:
+					walk = reversed(index) if desc else index
+				entries, boundary, counted = [], None, 0 # docs tied with the cursor may still fall before it
+				for key, docID in walk:
+					if boundary is not None and key != boundary:
+						break
+					if candidates is not None and docID not in candidates:
+						continue
+					entry = docs.get(docID)
+					if entry is None or not matches(entry[0]):
+						continue
+					entries.append((docID, entry))
+					if key != cursorKey:
+						counted += 1
+						if counted > query._limit and boundary is None:
+							boundary = key
+				matched = entries
+			else:
+				entries = [(docID, docs[docID]) for docID in candidates if docID in docs] if candidates is not None else list(docs.items())
+				matched = None
+
+		if matched is None:
+			matched = [(docID, entry) for docID, entry in entries if matches(entry[0])]
+		return self._finish(query, orders, getters, matched)
+
+	def _finish(self, query, orders, getters, matched):
+		"""
+		Sort matched [(docID, entry)] by orders, apply the cursor and limit, and build snapshots.
+		"""
+		def sortKeys(item):
+			return tuple(item[0] if get is None else _sortKey(get(item[1][0])) for get in getters)
+
+		def rawKeys(item):
+			return tuple(item[0] if get is None else get(item[1][0]) for get in getters)
+
+		directions = {desc for _, desc in orders}
+		if len(directions) == 1:
+			desc = directions.pop()
+			try: # raw values sort the same as Firestore when each field holds one type
+				matched.sort(key=rawKeys, reverse=desc)
+			except TypeError:
+				matched.sort(key=sortKeys, reverse=desc)
+		else:
+			for get, (_, desc) in reversed(list(zip(getters, orders))): # stable sorts, last key first
+				keyOf = (lambda item: item[0]) if get is None else (lambda item, get=get: _sortKey(get(item[1][0])))
+				matched.sort(key=keyOf, reverse=desc)
+
+		if query._cursor is not None:
+			cursor = tuple(v if f == "__name__" else _sortKey(v) for (f, _), v in zip(orders, query._cursorKey(orders)))
+			def after(item):
+				for (_, desc), v, c in zip(orders, sortKeys(item), cursor):
+					if v != c:
+						return v < c if desc else v > c
+				return False
+			matched = [item for item in matched if after(item)]
+
+		if query._limit is not None:
+			matched = matched[:query._limit]
+
+		snaps = []
+		for docID, (data, createTime, updateTime) in matched:
+			ref = FakeDocument(self, query._collection, docID)
+			snaps.append(FakeSnapshot(ref, _project(data, query._fields) if query._fields is not None else data, createTime, updateTime))
+		return snaps
+
+	def _commit(self, writes, reads=None):
+		"""
+		Apply writes atomically. reads ({path: updateTime}) must be unchanged, as in a transaction.
+		"""
+		with self._writing():
+			changed = self._changed(reads) if reads else None
+			if changed:
+				raise exceptions.Aborted(f"{changed} changed during the transaction")
+
+			now = self._commitTime()
+			self._apply(self._stage(writes), now)
+			return [_WriteResult(now) for _ in writes]
+
+	def _changed(self, reads):
+		""" First path in reads ({path: updateTime}) whose doc has since changed, None when none did """
+		for path, seen in reads.items():
+			collection, docID = path.rsplit("/", 1)
+			entry = self._entry(collection, docID)
+			if (entry[2] if entry else None) != seen:
+				return path
+		return None
+
+	def _writing(self):
+		""" Context that makes a commit's reads and writes atomic """
+		return self._lock
+
+	def _commitTime(self):
+		return _now()
+
+	def _stage(self, writes):
+		"""
+		{(collection, docID): data after every write, None for deletes}. Raises on failed preconditions.
+		"""
+		staged = {}
+		for kind, ref, data, merge, option in writes:
+			collection, docID = ref.path.rsplit("/", 1)
+			key = (collection, docID)
+			if key in staged:
+				current = staged[key]
+			else:
+				entry = self._entry(collection, docID)
+				current = _copy(entry[0]) if entry else None
+				self._checkOption(ref.path, option, entry)
+
+			if kind == "delete":
+				staged[key] = None
+				continue
+			if kind == "create" and current is not None:
+				raise exceptions.Conflict(f"{ref.path} already exists")
+			if kind == "update":
+				if current is None:
+					raise exceptions.NotFound(f"No document to update: {ref.path}")
+				for path, value in data.items():
+					_setPath(current, path, value)
+			elif merge and current is not None:
+				_merge(current, data)
+			else:
+				current = _transform(_missing, data)
+			staged[key] = current
+		return staged
+
+	def _apply(self, staged, now):
+		""" Store staged docs (from _stage) with update time now """
+		for (collection, docID), data in staged.items():
+			docs = self._docs.setdefault(collection, {})
+			before = docs.get(docID)
+			if data is None:
+				docs.pop(docID, None)
+			else:
+				docs[docID] = [data, before[1] if before else now, now]
+			self._reindex(collection, docID, before[0] if before else None, data)
+
+	@staticmethod
+	def _checkOption(path, option, entry):
+		""" Precondition check against the stored entry, before any write in the commit touched it """
+		if option is None:
+			return
+		if isinstance(option, _Precondition):
+			lastUpdateTime, exists = option.lastUpdateTime, option.exists
+		else: # SDK LastUpdateOption / ExistsOption
+			lastUpdateTime, exists = getattr(option, "_last_update_time", None), getattr(option, "_exists", None)
+		if exists is not None and exists != (entry is not None):
+			raise exceptions.FailedPrecondition(f"{path} {'does not exist' if exists else 'already exists'}")
+		if lastUpdateTime is not None and (entry is None or entry[2] != lastUpdateTime):
+			raise exceptions.FailedPrecondition(f"{path} was updated since {lastUpdateTime}")
+
+	def load(self, collection, docs):
+		"""
+		Bulk-seed collection with {docID: data} without going through commits.
+		"""
+		now = _now()
+		with self._lock:
+			store = self._docs.setdefault(collection, {})
+			for docID, data in docs.items():
+				stored = _transform(_missing, data)
+				before = store.get(docID)
+				store[docID] = [stored, now, now]
+				self._reindex(collection, docID, before[0] if before else None, stored)
+
+	def clear(self):
+		with self._lock:
+			self._docs.clear()
+			self._indexes.clear()
+			self._ranges.clear()
+
+	# endregion
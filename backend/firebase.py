@@ -4,17 +4,52 @@ import os
 import firebase_admin
 from firebase_admin import credentials, firestore
 from backend.config import FIREBASE_CREDS
+from backend.accounting import CountedClient, CountedCollection
 
-# Init Firebase SDK
-if not firebase_admin._apps:
-	cred = credentials.Certificate(FIREBASE_CREDS)
-	firebase_admin.initialize_app(cred)
+def initFirebase():
+	"""
+	Init the Firebase SDK once (auth and the real Firestore client need it).
+	"""
+	if not firebase_admin._apps:
+		cred = credentials.Certificate(FIREBASE_CREDS) if FIREBASE_CREDS else credentials.ApplicationDefault()
+		firebase_admin.initialize_app(cred)
 
-# Init db and get collections for distributing to routes
-db = firestore.client()
-formsCo = db.collection("forms")
-eventsCo = db.collection("events")
-schedulesCo = db.collection("schedules")
-completionsCo = db.collection("completions")
-checklistCo = db.collection("checklist")
-usersCo = db.collection("users")
+class _Unbound:
+	def __getattr__(self, name):
+		raise RuntimeError("No Firestore client bound yet, createApp() or useClient() binds one")
+
+_unbound = _Unbound()
+
+# db and collections for distributing to routes, bound to a client by useClient()
+# (wrapped so every read/write is counted against the request that made it)
+db = CountedClient(_unbound)
+formsCo = CountedCollection(_unbound)
+eventsCo = CountedCollection(_unbound)
+schedulesCo = CountedCollection(_unbound)
+completionsCo = CountedCollection(_unbound)
+checklistCo = CountedCollection(_unbound)
+usersCo = CountedCollection(_unbound)
+tombstonesCo = CountedCollection(_unbound)
+
+collections = {
+	"forms": formsCo,
+	"events": eventsCo,
+	"schedules": schedulesCo,
+	"completions": completionsCo,
+	"checklist": checklistCo,
+	"users": usersCo,
+	"tombstones": tombstonesCo,
+}
+
+def useClient(client=None):
+	"""
+	Point db and every collection at client, Firestore when None.
+	Routes keep their imported names, so this can run before or after they load.
+	"""
+	if client is None:
+		initFirebase()
+		client = firestore.client()
+	db._raw = client
+	for name, co in collections.items():
+		co._raw = client.collection(name)
+	return db
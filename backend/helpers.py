@@ -1,7 +1,7 @@
 from __future__ import annotations
 from datetime import datetime, timezone
 
-tsKeys = ("startStamp", "endStamp", "until")
+tsKeys = ("startStamp", "endStamp", "until", "updatedAt")
 
 def _isoToDt(iso):
 	if not isinstance(iso, str):
@@ -30,13 +30,6 @@ def _dictToDt(d):
 			out[k] = _isoToDt(out[k])
 	return out
 
-def _dictToIso(d):
-	out = dict(d)
-	for k in tsKeys:
-		if k in out and out[k] is not None:
-			out[k] = _dtToIso(out[k])
-	return out
-
 def _objsToDt(objs):
 	"""
 	Convert tsKeys in obj(s) to timezone-aware datetimes (UTC).
@@ -48,15 +41,3 @@ def _objsToDt(objs):
 		return _dictToDt(objs)
 	else:
 		return objs  # pass through unsupported shapes
-
-def _objsToIso(objs):
-	"""
-	Convert tsKeys in obj(s) to ISO 8601 '...Z' strings.
-	Accepts a single dict or a list of dicts and returns the same shape.
-	"""
-	if isinstance(objs, list):
-		return [_dictToIso(o) for o in objs]
-	elif isinstance(objs, dict):
-		return _dictToIso(objs)
-	else:
-		return objs  # pass through unsupported shapes
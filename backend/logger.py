@@ -1,15 +1,20 @@
 # backend/logger.py
 
 import logging
+import logging.handlers
 import os
 import json
+import queue
+import atexit
+import threading
 import datetime as dt
 import time
 from functools import wraps
-from flask import request
+from flask import request, g
 from google.oauth2 import service_account
 from google.cloud.logging import Client as GcpClient
 from google.cloud.logging.handlers import CloudLoggingHandler
+from backend.config import LOG_QUEUE_SIZE
 
 devMode = os.getenv("FLASK_ENV", "development") == "development"
 LOGGER_CREDS = json.loads(os.getenv("LOGGER_ADMIN_JSON", "{}"))
@@ -25,42 +30,112 @@ class RequestFilter(logging.Filter):
 			record.uid = "no-request"
 		return True
 
-def getLogger(name):
-	logger = logging.getLogger(name)
-	if logger.handlers:
-		return logger
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+	"""
+	QueueHandler that drops (and counts) records when the queue is full
+	instead of blocking or erroring on the calling thread.
+	"""
+	def __init__(self, q):
+		super().__init__(q)
+		self.dropped = 0
+		self._dropLock = threading.Lock()
 
-	level = logging.DEBUG if devMode else logging.INFO
-	logger.setLevel(level)
+	def enqueue(self, record):
+		try:
+			self.queue.put_nowait(record)
+		except queue.Full:
+			with self._dropLock:
+				self.dropped += 1
+
+class FilePerLoggerHandler(logging.Handler):
+	"""
+	Writes each logger's records to backend/logs/<name>.txt, opening files on first use.
+	Only ever called from the listener thread.
+	"""
+	def __init__(self, logDir):
+		super().__init__()
+		self.logDir = logDir
+		self._files = {}
 
+	def emit(self, record):
+		fileHandler = self._files.get(record.name)
+		if fileHandler is None:
+			os.makedirs(self.logDir, exist_ok=True)
+			fileHandler = logging.FileHandler(os.path.join(self.logDir, f"{record.name}.txt"))
+			fileHandler.setFormatter(self.formatter)
+			self._files[record.name] = fileHandler
+		fileHandler.handle(record)
+
+	def close(self):
+		for fileHandler in self._files.values():
+			fileHandler.close()
+		super().close()
+
+def _sinkHandlers():
+	"""
+	The handlers that actually do I/O, run by the listener thread.
+	"""
 	if devMode:
 		# log to console in dev
 		consoleHandler = logging.StreamHandler()
 		consoleFmt     = "=======> %(levelname)-8s [%(name)s:%(lineno)d] :: %(message)s"
 		consoleHandler.setFormatter(logging.Formatter(consoleFmt))
-		consoleHandler.addFilter(RequestFilter())
-		logger.addHandler(consoleHandler)
 
 		# log to file in dev
-		os.makedirs("backend/logs", exist_ok=True)
-		logPath = os.path.join("backend/logs", f"{name}.txt")
-		fileHandler = logging.FileHandler(logPath)
+		fileHandler = FilePerLoggerHandler("backend/logs")
 		fileFmt = "(%(asctime)s) %(levelname)-8s [%(name)s]:: uID=%(uid)s :: %(message)s"
 		fileHandler.setFormatter(logging.Formatter(fileFmt))
-		fileHandler.addFilter(RequestFilter())
-		logger.addHandler(fileHandler)
-	else:
-		# Cloud Logging for prod
-		creds = service_account.Credentials.from_service_account_info(LOGGER_CREDS)
-		client = GcpClient(credentials=creds, project=creds.project_id)
-		cloudH = CloudLoggingHandler(
-			client,
-			name=f"portia-backend-{dt.date.today().isoformat()}"
-		)
-		cloudFmt = "(%(asctime)s) %(levelname)-8s [%(name)s] uid=%(uid)s :: %(message)s"
-		cloudH.setFormatter(logging.Formatter(cloudFmt))
-		cloudH.addFilter(RequestFilter())
-		logger.addHandler(cloudH)
+		return [consoleHandler, fileHandler]
+
+	# Cloud Logging for prod, one client for every logger
+	creds = service_account.Credentials.from_service_account_info(LOGGER_CREDS)
+	client = GcpClient(credentials=creds, project=creds.project_id)
+	cloudH = CloudLoggingHandler(
+		client,
+		name=f"portia-backend-{dt.date.today().isoformat()}"
+	)
+	cloudFmt = "(%(asctime)s) %(levelname)-8s [%(name)s] uid=%(uid)s :: %(message)s"
+	cloudH.setFormatter(logging.Formatter(cloudFmt))
+	return [cloudH]
+
+_pipelineLock = threading.Lock()
+_queueHandler = None
+
+def _pipeline():
+	"""
+	Shared QueueHandler feeding one QueueListener, started on first use.
+	Request threads only format and enqueue; the listener thread does all I/O.
+	"""
+	global _queueHandler
+	with _pipelineLock:
+		if _queueHandler is None:
+			q = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+			handler = DroppingQueueHandler(q)
+			handler.addFilter(RequestFilter()) # uid must be read on the request thread
+			listener = logging.handlers.QueueListener(q, *_sinkHandlers())
+			listener.start()
+			atexit.register(listener.stop) # drain what's queued on shutdown
+			_queueHandler = handler
+		return _queueHandler
+
+def logStats():
+	""" Queue depth and records dropped since startup """
+	handler = _pipeline()
+	return {
+		"queued": handler.queue.qsize(),
+		"capacity": handler.queue.maxsize,
+		"dropped": handler.dropped,
+	}
+
+def getLogger(name):
+	logger = logging.getLogger(name)
+	if logger.handlers:
+		return logger
+
+	level = logging.DEBUG if devMode else logging.INFO
+	logger.setLevel(level)
+	logger.addHandler(_pipeline())
+	logger.propagate = False # "backend" holds the same handler, so children would queue twice
 
 	return logger
 
@@ -75,7 +150,11 @@ def logRequests(f):
 		duration = (time.time() - start) * 1000
 		uid = getattr(request, "uid", "anon")
 		logger = getLogger("request")
-		logger.debug(f"{request.method} {request.path} uid={uid} took={duration:.1f}ms")
+		timings = g.get("timings")
+		phases = f" ({timings.summary()})" if timings else ""
+		ops = g.get("firestoreOps")
+		opsInfo = f" [{ops.summary()}]" if ops else ""
+		logger.debug(f"{request.method} {request.path} uid={uid} took={duration:.1f}ms{phases}{opsInfo}")
 		return response
 
 	return wrapper
@@ -0,0 +1,176 @@
+# backend/metrics.py
+"""
+Per-request phase timings and per-route latency histograms.
+
+Code under `with phase("firestore"):` (or auth, convert, encode) adds its wall time
+to the current request. After each request the phases go out as a Server-Timing header
+and into histograms that /metrics renders in Prometheus text format.
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from flask import g, request, has_app_context
+
+phases = ("auth", "firestore", "convert", "encode")
+
+# Histogram upper bounds in seconds
+latencyBuckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RequestTimings:
+	"""
+	Milliseconds spent per phase in one request. Locked since /calendar
+	runs phases on pool threads, so a phase total can exceed wall time.
+	"""
+	def __init__(self):
+		self.start = time.perf_counter()
+		self.ms = {}
+		self._lock = threading.Lock()
+
+	def add(self, name, ms):
+		with self._lock:
+			self.ms[name] = self.ms.get(name, 0.0) + ms
+
+	def totalMs(self):
+		return (time.perf_counter() - self.start) * 1000
+
+	def serverTiming(self):
+		""" Server-Timing header value, phases in a stable order then total """
+		with self._lock:
+			parts = [f"{name};dur={self.ms[name]:.1f}" for name in phases if name in self.ms]
+		parts.append(f"total;dur={self.totalMs():.1f}")
+		return ", ".join(parts)
+
+	def summary(self):
+		""" Short phase breakdown for log lines """
+		with self._lock:
+			return " ".join(f"{name}={self.ms[name]:.1f}ms" for name in phases if name in self.ms)
+
+def currentTimings():
+	""" RequestTimings for the active request, None outside one """
+	return g.get("timings") if has_app_context() else None
+
+@contextmanager
+def phase(name):
+	"""
+	Add the wall time of the block to phase name of the current request.
+	"""
+	timings = currentTimings()
+	if timings is None:
+		yield
+		return
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		timings.add(name, (time.perf_counter() - start) * 1000)
+
+class Histogram:
+	"""
+	Prometheus-style cumulative histogram keyed by a tuple of label values.
+	"""
+	def __init__(self, name, help, labelNames, buckets=latencyBuckets):
+		self.name = name
+		self.help = help
+		self.labelNames = labelNames
+		self.buckets = buckets
+		self._series = {} # labels -> [bucketCounts..., +Inf count, sum]
+		self._lock = threading.Lock()
+
+	def observe(self, labels, value):
+		idx = bisect.bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(labels)
+			if series is None:
+				series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+			series[idx] += 1
+			series[-1] += value
+
+	def render(self):
+		lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+		with self._lock:
+			series = {labels: list(s) for labels, s in self._series.items()}
+		for labels, counts in sorted(series.items()):
+			base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelNames, labels))
+			cumulative = 0
+			for bound, n in zip((*self.buckets, "+Inf"), counts[:-1]):
+				cumulative += n
+				lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+			lines.append(f"{self.name}_sum{{{base}}} {counts[-1]:.6f}")
+			lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+		return "\n".join(lines)
+
+def _escape(value):
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+requestSeconds = Histogram(
+	"portia_request_duration_seconds", "Request wall time by route",
+	("method", "route", "status"),
+)
+phaseSeconds = Histogram(
+	"portia_request_phase_seconds", "Time spent per request phase by route",
+	("method", "route", "phase"),
+)
+
+def routeLabel():
+	""" URL rule rather than path, so ids don't explode label cardinality """
+	return request.url_rule.rule if request.url_rule else "unmatched"
+
+def initMetrics(app):
+	"""
+	Time every request and attach its Server-Timing header.
+	"""
+	@app.before_request
+	def _startTimings():
+		g.timings = RequestTimings()
+
+	@app.after_request
+	def _recordTimings(response):
+		timings = g.get("timings")
+		if timings is None:
+			return response
+		response.headers["Server-Timing"] = timings.serverTiming()
+
+		method, route = request.method, routeLabel()
+		requestSeconds.observe((method, route, str(response.status_code)), timings.totalMs() / 1000)
+		for name, ms in list(timings.ms.items()):
+			phaseSeconds.observe((method, route, name), ms / 1000)
+		return response
+
+def _samples(name, help, kind, samples):
+	""" Exposition lines for samples of [(labels dict, value)] """
+	lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+	for labels, value in samples:
+		base = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+		lines.append(f"{name}{{{base}}} {value}" if base else f"{name} {value}")
+	return lines
+
+def renderMetrics():
+	"""
+	Prometheus text exposition of latency histograms plus Firestore, cache, capture and log counters.
+	"""
+	from backend.cache import cacheStats
+	from backend.capture import captureBuffer
+	from backend.logger import logStats
+	from backend.accounting import opFields, opSeconds, routeStats
+
+	lines = [requestSeconds.render(), phaseSeconds.render(), opSeconds.render()]
+
+	routes = sorted(routeStats().items())
+	for field in opFields:
+		lines += _samples(f"portia_firestore_{field}_total", f"Firestore {field} by route", "counter", [({"route": r}, s[field]) for r, s in routes])
+
+	caches = cacheStats()
+	for stat, kind in (("hits", "counter"), ("misses", "counter"), ("invalidations", "counter"), ("size", "gauge")):
+		name = f"portia_cache_{stat}" + ("_total" if kind == "counter" else "")
+		lines += _samples(name, f"Shared cache {stat}", kind, [({"cache": c}, s[stat]) for c, s in caches.items()])
+
+	capture = captureBuffer.stats()
+	lines += _samples("portia_capture_captured_total", "Requests sampled for replay", "counter", [({}, capture["captured"])])
+	lines += _samples("portia_capture_dropped_total", "Captured requests overwritten before flush", "counter", [({}, capture["dropped"])])
+
+	logs = logStats()
+	lines += _samples("portia_log_queue_depth", "Log records waiting for the writer", "gauge", [({}, logs["queued"])])
+	lines += _samples("portia_log_dropped_total", "Log records dropped on a full queue", "counter", [({}, logs["dropped"])])
+
+	return "\n".join(lines) + "\n"
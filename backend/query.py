@@ -0,0 +1,101 @@
+# backend/query.py
+import re
+import json
+import base64
+from backend.config import MAX_PAGE_SIZE
+from backend.helpers import _isoToDt, _dtToIso
+
+# Order used for paging, must match the composite indexes in firestore.indexes.json
+pageOrder = ("endStamp", "startStamp", "__name__")
+
+_fieldPattern = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+def rangeQuery(co, uID, start=None, end=None, fields=None):
+	"""
+	Docs in co owned by uID overlapping [start, end), both bounds applied by Firestore.
+	fields (from parseFields) projects the docs server-side.
+	"""
+	q = co.where("ownerID", "==", uID)
+	if start:
+		q = q.where("endStamp", ">=", _isoToDt(start))
+	if end:
+		q = q.where("startStamp", "<", _isoToDt(end))
+	if fields is not None:
+		q = q.select(fields)
+	return q
+
+def parseFields(args, paged=False):
+	"""
+	Field paths from ?fields=a,b.c or None when absent. _id always comes back regardless.
+	Paged queries keep the stamps their cursor is built from.
+	Raises ValueError on a malformed field path.
+	"""
+	raw = args.get("fields", None)
+	if raw is None:
+		return None
+
+	fields = []
+	for field in (f.strip() for f in raw.split(",")):
+		if not field or field == "_id" or field in fields:
+			continue
+		if not _fieldPattern.match(field):
+			raise ValueError(f"Invalid field '{field}'")
+		fields.append(field)
+
+	if paged:
+		fields += [f for f in pageOrder[:2] if f not in fields]
+	return fields
+
+def trimDoc(obj, fields):
+	"""
+	Copy of obj with only _id and fields (top-level part of each path), for docs that weren't projected by Firestore.
+	"""
+	if fields is None:
+		return obj
+	keep = {f.split(".", 1)[0] for f in fields}
+	return {k: v for k, v in obj.items() if k in keep or k == "_id"}
+
+def parsePage(args):
+	"""
+	(limit, cursor) from request args, limit is None when paging wasn't asked for.
+	Raises ValueError on a bad limit or pageToken.
+	"""
+	limit = args.get("limit", None)
+	pageToken = args.get("pageToken", None)
+	if limit is None:
+		if pageToken:
+			raise ValueError("pageToken requires limit")
+		return None, None
+	try:
+		limit = int(limit)
+	except ValueError:
+		raise ValueError(f"limit must be an integer, got '{limit}'")
+	if not 0 < limit <= MAX_PAGE_SIZE:
+		raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+	return limit, (_decodeToken(pageToken) if pageToken else None)
+
+def _encodeToken(snap):
+	data = snap.to_dict() or {}
+	cursor = [_dtToIso(data.get("endStamp")), _dtToIso(data.get("startStamp")), snap.id]
+	return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+def _decodeToken(token):
+	try:
+		endStamp, startStamp, docID = json.loads(base64.urlsafe_b64decode(token.encode()))
+	except Exception:
+		raise ValueError("Malformed pageToken")
+	return {"endStamp": _isoToDt(endStamp), "startStamp": _isoToDt(startStamp), "__name__": docID}
+
+def pageQuery(q, limit, cursor=None):
+	"""
+	One page of q in pageOrder, starting after cursor (from parsePage).
+	Returns (snapshots, nextPageToken) where nextPageToken is None on the last page.
+	"""
+	for field in pageOrder:
+		q = q.order_by(field)
+	if cursor:
+		q = q.start_after(cursor)
+
+	docs = list(q.limit(limit).stream())
+	nextPageToken = _encodeToken(docs[-1]) if len(docs) == limit else None
+	return docs, nextPageToken
@@ -0,0 +1,132 @@
+# backend/recurrence.py
+from __future__ import annotations
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from cachetools import LRUCache
+from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY, YEARLY
+from backend.config import RULE_CACHE_SIZE
+from backend.helpers import _isoToDt
+
+period2Freq = {
+	"daily": DAILY,
+	"weekly": WEEKLY,
+	"monthly": MONTHLY,
+	"yearly": YEARLY,
+}
+
+# Slack on local wall-time search bounds so DST shifts can't drop an edge occurrence
+_searchPad = timedelta(days=1)
+
+def _toZone(tz):
+	try:
+		return ZoneInfo(tz or "UTC")
+	except (ZoneInfoNotFoundError, ValueError):
+		return timezone.utc
+
+def _toWall(dt, zone):
+	""" UTC datetime -> naive wall time in zone """
+	return dt.astimezone(zone).replace(tzinfo=None)
+
+def _jsIso(dt):
+	""" Match JS Date.toISOString() so recur _ids line up with client-built ones """
+	dtUTC = dt.astimezone(timezone.utc)
+	return f"{dtUTC:%Y-%m-%dT%H:%M:%S}.{dtUTC.microsecond // 1000:03d}Z"
+
+class CompiledRule:
+	"""
+	Schedule doc compiled once into an rrule over the schedule's local wall time,
+	so repeats keep their clock time across DST changes.
+	"""
+	__slots__ = ("schedID", "path", "tz", "zone", "period", "startStamp", "endStamp", "span", "until", "rule")
+
+	def __init__(self, schedID, sched):
+		self.schedID = schedID
+		self.path = sched.get("path")
+		self.tz = sched.get("tz")
+		self.zone = _toZone(self.tz)
+		self.period = sched.get("period")
+		self.startStamp = _isoToDt(sched.get("startStamp"))
+		self.endStamp = _isoToDt(sched.get("endStamp"))
+		self.until = _isoToDt(sched.get("until"))
+		self.span = timedelta(0)
+		self.rule = None
+
+		if not isinstance(self.startStamp, datetime):
+			self.period = None # Unusable schedule, never expands
+			return
+		if not isinstance(self.endStamp, datetime):
+			self.endStamp = self.startStamp
+
+		self.span = max(self.endStamp - self.startStamp, timedelta(0))
+		freq = period2Freq.get(self.period)
+		if freq is None:
+			return
+
+		try:
+			interval = max(int(sched.get("interval") or 1), 1)
+		except (TypeError, ValueError):
+			interval = 1
+
+		self.rule = rrule(
+			freq,
+			interval=interval,
+			dtstart=_toWall(self.startStamp, self.zone),
+			until=_toWall(self.until, self.zone) if isinstance(self.until, datetime) else None,
+			cache=True,
+		)
+
+	def occurrences(self, start, end):
+		"""
+		UTC (startStamp, endStamp) pairs overlapping [start, end).
+		"""
+		if self.period == "single":
+			if self.startStamp < end and self.endStamp >= start:
+				yield self.startStamp, self.endStamp
+			return
+		if self.rule is None:
+			return
+		if isinstance(self.until, datetime) and self.until < start:
+			return
+
+		lo = _toWall(start - self.span, self.zone) - _searchPad
+		hi = _toWall(end, self.zone) + _searchPad
+		for wall in self.rule.between(lo, hi, inc=True):
+			occStart = wall.replace(tzinfo=self.zone).astimezone(timezone.utc)
+			occEnd = occStart + self.span
+			if occStart < end and occEnd >= start:
+				yield occStart, occEnd
+
+	def recurs(self, start, end):
+		"""
+		Recur objects (same shape the client builds) overlapping [start, end).
+		"""
+		return [
+			{
+				"_id": f"{self.schedID}_{_jsIso(occStart)}",
+				"scheduleID": self.schedID,
+				"path": self.path,
+				"startStamp": occStart,
+				"endStamp": occEnd,
+				"isRecur": True,
+				"tz": self.tz,
+			}
+			for occStart, occEnd in self.occurrences(start, end)
+		]
+
+# Keyed by (scheduleID, update time) so any write to the schedule misses
+_ruleCache = LRUCache(maxsize=RULE_CACHE_SIZE)
+_ruleLock = threading.Lock()
+
+def getRule(schedID, updateTime, loadSched):
+	"""
+	Compiled rule for schedule doc, loadSched() only called on a cache miss.
+	"""
+	key = (schedID, updateTime)
+	with _ruleLock:
+		rule = _ruleCache.get(key)
+	if rule is None:
+		rule = CompiledRule(schedID, loadSched())
+		with _ruleLock:
+			_ruleCache[key] = rule
+	return rule
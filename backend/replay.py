@@ -0,0 +1,122 @@
+# backend/replay.py
+"""
+Replay captured traffic (see backend/capture.py) through the Flask app.
+
+	FLASK_ENV=development AUTH_STUB=1 python -m backend.replay backend/logs/capture/*.ndjson.gz
+
+Requests are re-issued with their original spacing (scaled by --speed, 0 = back to back)
+on --workers threads, authenticated as the captured uid via the dev-only stub token.
+Writes land in whatever Firestore the app is configured for, so point it at a dev project.
+"""
+import sys
+import gzip
+import json
+import time
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+def loadCaptures(paths):
+	"""
+	Captured records from gzipped NDJSON files, oldest first.
+	"""
+	records = []
+	for path in paths:
+		with gzip.open(path, "rt", encoding="utf-8") as f:
+			records.extend(json.loads(line) for line in f if line.strip())
+	records.sort(key=lambda r: r["ts"])
+	return records
+
+def percentile(values, pct):
+	""" Nearest-rank percentile of values (pct in 0-100) """
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+	return ordered[idx]
+
+def _send(app, record):
+	headers = {"Content-Type": "application/json"}
+	if record.get("uid"):
+		headers["Authorization"] = f"Bearer stub:{record['uid']}"
+
+	began = time.perf_counter()
+	response = app.test_client().open(
+		record["path"],
+		method=record["method"],
+		query_string=record.get("query") or None,
+		data=record.get("body"),
+		headers=headers,
+	)
+	return response.status_code, (time.perf_counter() - began) * 1000
+
+def replay(app, records, speed=1.0, workers=8):
+	"""
+	Re-issue records against app, keeping their relative timing when speed > 0.
+	Returns [(record, status, ms)] in completion order.
+	"""
+	if not records:
+		return []
+
+	results, lock = [], threading.Lock()
+
+	def run(record):
+		status, ms = _send(app, record)
+		with lock:
+			results.append((record, status, ms))
+
+	firstTs = records[0]["ts"]
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		for record in records:
+			if speed > 0:
+				wait = (record["ts"] - firstTs) / speed - (time.perf_counter() - start)
+				if wait > 0:
+					time.sleep(wait)
+			pool.submit(run, record)
+	return results
+
+def summarize(results):
+	"""
+	Per-route counts, latency percentiles and status changes vs. the capture.
+	"""
+	byRoute = defaultdict(list)
+	mismatched = Counter()
+	for record, status, ms in results:
+		route = f"{record['method']} {record['path']}"
+		byRoute[route].append(ms)
+		if status != record.get("status"):
+			mismatched[f"{route} {record.get('status')}->{status}"] += 1
+
+	lines = [f"{'route':40} {'n':>6} {'p50 ms':>9} {'p99 ms':>9}"]
+	for route, times in sorted(byRoute.items()):
+		lines.append(f"{route:40} {len(times):6d} {percentile(times, 50):9.1f} {percentile(times, 99):9.1f}")
+	for change, n in mismatched.most_common():
+		lines.append(f"status changed: {change} x{n}")
+	return "\n".join(lines)
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Replay captured requests through the Flask app")
+	parser.add_argument("paths", nargs="+", help="capture-*.ndjson.gz files")
+	parser.add_argument("--speed", type=float, default=1.0, help="time scale, 0 replays back to back")
+	parser.add_argument("--workers", type=int, default=8, help="concurrent requests in flight")
+	args = parser.parse_args(argv)
+
+	from backend.config import AUTH_STUB
+	if not AUTH_STUB:
+		sys.exit("Replay needs FLASK_ENV=development and AUTH_STUB=1 to authenticate as captured users")
+
+	from backend import createApp
+	app = createApp()
+
+	records = loadCaptures(args.paths)
+	began = time.perf_counter()
+	results = replay(app, records, speed=args.speed, workers=args.workers)
+	elapsed = time.perf_counter() - began
+
+	print(f"Replayed {len(results)} requests in {elapsed:.1f}s ({len(results) / max(elapsed, 1e-9):.1f} req/s)")
+	print(summarize(results))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,53 @@
+# backend/routes/calendar.py
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, jsonify, request
+from backend.auth import handleFirebaseAuth
+from backend.versions import versioned
+from backend.config import CALENDAR_WORKERS
+from backend.logger import logRequests, getLogger
+from backend.helpers import _isoToDt
+from backend.routes.events import queryEvents
+from backend.routes.completions import queryCompletions
+from backend.routes.forms import queryForms
+from backend.routes.schedules import querySchedules
+
+logger = getLogger(__name__)
+calendarBP = Blueprint("calendar", __name__, url_prefix="/calendar")
+
+# Shared across requests so the threads aren't rebuilt per load
+_pool = ThreadPoolExecutor(max_workers=CALENDAR_WORKERS, thread_name_prefix="calendar")
+
+@calendarBP.route("", methods=["GET"])
+@logRequests
+@handleFirebaseAuth
+@versioned("events", "completions", "schedules", "forms")
+def getCalendar(uID):
+	"""
+	Events, completions, schedules and forms for the calendar in one response.
+	Queries run concurrently, so wall time tracks the slowest of the four.
+	"""
+	start = request.args.get("start", None)
+	end = request.args.get("end", None)
+
+	logger.info(f"GET calendar in range {_isoToDt(start)} - {_isoToDt(end)}")
+
+	# Each query runs in a copy of this context so its phases land on this request's timings
+	def submit(fn, *args):
+		return _pool.submit(contextvars.copy_context().run, fn, *args)
+
+	futures = {
+		"events": submit(queryEvents, uID, start, end),
+		"completions": submit(queryCompletions, uID, start, end),
+		"schedules": submit(querySchedules, uID),
+		"forms": submit(queryForms, uID),
+	}
+	calendar = {name: future.result() for name, future in futures.items()}
+
+	logger.info(
+		"GET calendar found "
+		+ ", ".join(f"{len(objs)} {name}" for name, objs in calendar.items())
+	)
+
+	return jsonify(calendar), 200
@@ -1,15 +1,78 @@
 from flask import Blueprint, request, jsonify
+from google.api_core.exceptions import FailedPrecondition
+from backend.config import CHECKLIST_COMMIT_ATTEMPTS, CHECKLIST_BULK_MAX
 from backend.auth import handleFirebaseAuth
-from backend.firebase import checklistCo
+from backend.versions import versioned, bumpVersions
+from backend.firebase import db, checklistCo
 from backend.logger import getLogger, logRequests
+from backend.streaming import wantsStream, streamDocs
+from backend.validation import validateChecklistNew, validateChecklistUpdate, validateChecklistBulk, describeErrors
+from backend.metrics import phase
 
 logger = getLogger(__name__)
 
 checklistBP = Blueprint("checklist", __name__, url_prefix="/checklist")
 
+# Firestore's cap on writes in one commit
+_batchWrites = 500
+
+def _ownItem(uID, item):
+	""" New item owned by uID, with uID among its participants """
+	item["ownerID"] = uID
+	parts = item.get("participants")
+	if not isinstance(parts, list):
+		parts = []
+	if uID not in parts:
+		parts.append(uID)
+	item["participants"] = parts
+	return item
+
+def _applyChanges(content, changes):
+	""" content as ref.update(changes) leaves it: dotted keys set nested fields """
+	merged = dict(content)
+	for key, value in changes.items():
+		*parents, last = key.split(".")
+		target = merged
+		for p in parents:
+			child = target.get(p)
+			target[p] = child = dict(child) if isinstance(child, dict) else {}
+			target = child
+		target[last] = value
+	return merged
+
+def _commitOwned(uID, ref, queue, missing, denied, check=None):
+	"""
+	Read ref, check uID owns it, then commit the writes queue(batch, content, option) adds.
+	option is a last_update_time precondition for the item's own write, so the commit fails
+	if the item changed after the ownership check; the read/check/commit is then redone.
+	check(content) -> error response or None runs once ownership is confirmed, so only the
+	owner of an existing item hears about a bad body.
+	One read and one commit per attempt. Returns (content as read, error response or None).
+	"""
+	for _ in range(CHECKLIST_COMMIT_ATTEMPTS):
+		doc = ref.get()
+		if not doc.exists:
+			return None, (jsonify({ "error": missing }), 404)
+		content = doc.to_dict()
+		if uID != content.get("ownerID"):
+			return None, (jsonify({ "error": denied }), 403)
+		error = check(content) if check else None
+		if error:
+			return None, error
+
+		batch = db.batch()
+		queue(batch, content, db.write_option(last_update_time=doc.update_time))
+		try:
+			batch.commit()
+			return content, None
+		except FailedPrecondition:
+			logger.debug(f"Checklist item {ref.id} changed since it was read, retrying")
+	return None, (jsonify({ "error": "Checklist item kept changing, try again" }), 409)
+
 @checklistBP.route("", methods=["GET"])
 @logRequests
 @handleFirebaseAuth
+@versioned("checklist")
 def getActive(uID):
 	"""
 	Get all active checklist items the user is a part of.
@@ -20,8 +83,11 @@ def getActive(uID):
 			.where("active", "==", True)
 			.where("participants", "array_contains", uID)
 	)
-	docs = q.stream()
-	items = [{**doc.to_dict(), "_id": doc.id} for doc in docs]
+	if wantsStream():
+		return streamDocs(q.stream())
+	docs = list(q.stream())
+	with phase("convert"):
+		items = [{**doc.to_dict(), "_id": doc.id} for doc in docs]
 	logger.debug(f"Found {len(items)} checklist items for user.")
 	return jsonify(items), 200
 
@@ -41,25 +107,21 @@ def getCompleted():
 @handleFirebaseAuth
 def addItem(uID):
 	# Validate payload
-	item = request.get_json()
-	if not item:
-		logger.debug("Missing checklist item")
-		return jsonify({"error": "Missing checklist item"}), 400
-	elif not isinstance(item, dict):
-		logger.debug("Checklist item not dictionary")
-		return jsonify({"error": "Checklist item not dictionary"}), 400
+	item = request.get_json(silent=True)
+	errors = validateChecklistNew(item)
+	if errors:
+		logger.debug("Invalid checklist item:\n" + describeErrors(errors))
+		return jsonify({"error": "Invalid checklist item", "errors": errors}), 400
 	
 	# Handle permissions info
-	item["ownerID"] = uID
-	parts = item.get("participants")
-	if not isinstance(parts, list):
-		parts = []
-	if uID not in parts:
-		parts.append(uID)
-	item["participants"] = parts
+	_ownItem(uID, item)
 
 	try:
-		time, ref = checklistCo.add(item)
+		ref = checklistCo.document()
+		batch = db.batch()
+		batch.set(ref, item)
+		bumpVersions(batch, item["participants"], ["checklist"])
+		batch.commit()
 		newDoc = { **item, "_id": ref.id }
 		logger.debug(f"Created checklist item '{newDoc['title']}'")
 		return jsonify(newDoc), 201
@@ -73,25 +135,32 @@ def addItem(uID):
 @handleFirebaseAuth
 def updateItem(uID, docID): # participants later?
 
+	changes = request.get_json(silent=True)
 	ref = checklistCo.document(docID)
-	doc = ref.get()
-	if not doc.exists:
-		return jsonify({ "error": "No doc found to update" }), 404
-	content = doc.to_dict()
-	if uID != content.get("ownerID"):
-		return jsonify({ "error": "User not permitted to edit item" }), 403
-	
-	changes = request.get_json() or None
-	if not changes or not isinstance(changes, dict):
-		return jsonify({ "error": "Checklist updates must be non-empty object" }), 400
-	
-	# Participant can't change ownerID
-	changes.pop("ownerID", None)
-	
+
+	def check(content):
+		errors = validateChecklistUpdate(changes)
+		if errors:
+			return jsonify({ "error": "Checklist updates must be non-empty object", "errors": errors }), 400
+		# Participant can't change ownerID
+		changes.pop("ownerID", None)
+		return None
+
+	def queue(batch, content, option):
+		batch.update(ref, changes, option=option)
+		# Old and new participants both see this item change
+		parts = content.get("participants") or []
+		newParts = changes.get("participants")
+		if isinstance(newParts, list):
+			parts = parts + newParts
+		bumpVersions(batch, [uID, *parts], ["checklist"])
+
 	try:
-		ref.update(changes)
-		response = ref.get()
-		newDoc = { **response.to_dict(), "_id": response.id }
+		content, error = _commitOwned(uID, ref, queue, "No doc found to update", "User not permitted to edit item", check)
+		if error:
+			return error
+		# The write succeeded against exactly the doc that was read, so no read-back is needed
+		newDoc = { **_applyChanges(content, changes), "_id": docID }
 		logger.debug(f"Updated checklist item '{newDoc['title']}'")
 		return jsonify(newDoc), 200
 	except Exception as e:
@@ -105,17 +174,152 @@ def updateItem(uID, docID): # participants later?
 def deleteItem(uID, docID):
 
 	ref = checklistCo.document(docID)
-	doc = ref.get()
-	if not doc.exists:
-		return jsonify({ "error": "No doc to delete" }), 404
-	content = doc.to_dict()
-	if uID != content.get("ownerID"):
-		return jsonify({ "error": "User not auth to delete" }), 403
-	
+
+	def queue(batch, content, option):
+		batch.delete(ref, option=option)
+		bumpVersions(batch, [uID, *(content.get("participants") or [])], ["checklist"])
+
 	try:
-		ref.delete()
+		content, error = _commitOwned(uID, ref, queue, "No doc to delete", "User not auth to delete")
+		if error:
+			return error
 		logger.debug(f"Deleted checklist item '{content['title']}'")
 		return jsonify({"_id": docID}), 200
 	except Exception as e:
 		logger.exception(f"Deleting checklist item failed...\n {e}")
 		return jsonify({ "error": str(e) }), 500
+
+
+
+def _bulkUsers(uID, op, content):
+	""" Users whose checklist version an op bumps """
+	if op["op"] == "add":
+		return op["item"]["participants"]
+	users = [uID, *(content.get("participants") or [])]
+	newParts = op.get("changes", {}).get("participants")
+	if isinstance(newParts, list):
+		users += newParts
+	return users
+
+def _bulkChunks(indexes, usersOf):
+	"""
+	Split op indexes into as few commits as fit _batchWrites: one write per op plus one
+	version bump per distinct user in the commit.
+	"""
+	chunks, chunk, users = [], [], set()
+	for i in indexes:
+		opUsers = {u for u in usersOf(i) if isinstance(u, str) and u}
+		if chunk and len(chunk) + 1 + len(users | opUsers) > _batchWrites:
+			chunks.append((chunk, users))
+			chunk, users = [], set()
+		chunk.append(i)
+		users |= opUsers
+	if chunk:
+		chunks.append((chunk, users))
+	return chunks
+
+@checklistBP.route("/bulk", methods=["POST"])
+@logRequests
+@handleFirebaseAuth
+def bulkItems(uID):
+	"""
+	Apply many checklist ops in one request:
+		{"ops": [{"op": "add", "item": {...}}, {"op": "update", "_id": id, "changes": {...}}, {"op": "delete", "_id": id}]}
+	Ownership of every update/delete comes from one batched read, then the writes go out in as
+	few batch commits as fit the 500-write limit, each item write guarded by its read's
+	update_time (a commit that loses a race is re-read and retried like updateItem).
+	Responds 200 with one {"op", "_id", "status", "item" | "error"} per op, in request order.
+	"""
+	payload = request.get_json(silent=True)
+	errors = validateChecklistBulk(payload)
+	if errors:
+		logger.debug("Invalid checklist bulk ops:\n" + describeErrors(errors))
+		return jsonify({ "error": "Invalid checklist bulk ops", "errors": errors }), 400
+	ops = payload["ops"]
+	if len(ops) > CHECKLIST_BULK_MAX:
+		return jsonify({ "error": f"At most {CHECKLIST_BULK_MAX} ops per request" }), 400
+
+	results = [None] * len(ops)
+	refs, seen, todo = {}, set(), []
+	for i, op in enumerate(ops):
+		if op["op"] == "add":
+			_ownItem(uID, op["item"])
+			refs[i] = checklistCo.document()
+		elif op["_id"] in seen:
+			results[i] = { "op": op["op"], "_id": op["_id"], "status": 400, "error": "Item appears in more than one op" }
+			continue
+		else:
+			op.get("changes", {}).pop("ownerID", None) # Participant can't change ownerID
+			seen.add(op["_id"])
+			refs[i] = checklistCo.document(op["_id"])
+		todo.append(i)
+
+	try:
+		for attempt in range(CHECKLIST_COMMIT_ATTEMPTS):
+			# One batched read for every item still to write
+			reads = [refs[i] for i in todo if ops[i]["op"] != "add"]
+			snaps = { snap.id: snap for snap in db.get_all(reads) } if reads else {}
+
+			writable, contents = [], {}
+			for i in todo:
+				op = ops[i]
+				if op["op"] == "add":
+					writable.append(i)
+					continue
+				snap = snaps.get(op["_id"])
+				if snap is None or not snap.exists:
+					results[i] = { "op": op["op"], "_id": op["_id"], "status": 404, "error": "No doc found" }
+					continue
+				contents[i] = snap.to_dict()
+				if uID != contents[i].get("ownerID"):
+					results[i] = { "op": op["op"], "_id": op["_id"], "status": 403, "error": "User not permitted to change item" }
+					continue
+				writable.append(i)
+
+			retry = []
+			for chunk, users in _bulkChunks(writable, lambda i: _bulkUsers(uID, ops[i], contents.get(i))):
+				batch = db.batch()
+				for i in chunk:
+					op, ref = ops[i], refs[i]
+					if op["op"] == "add":
+						batch.set(ref, op["item"])
+						continue
+					option = db.write_option(last_update_time=snaps[op["_id"]].update_time)
+					if op["op"] == "update":
+						batch.update(ref, op["changes"], option=option)
+					else:
+						batch.delete(ref, option=option)
+				bumpVersions(batch, users, ["checklist"])
+				try:
+					batch.commit()
+				except FailedPrecondition:
+					logger.debug(f"Checklist bulk commit of {len(chunk)} ops lost a race, retrying")
+					retry += chunk
+					continue
+				except Exception as e: # earlier commits stand, so report this one per op
+					logger.exception(f"Checklist bulk commit of {len(chunk)} ops failed...\n {e}")
+					for i in chunk:
+						results[i] = { "op": ops[i]["op"], "_id": refs[i].id, "status": 500, "error": str(e) }
+					continue
+
+				for i in chunk:
+					op, ref = ops[i], refs[i]
+					if op["op"] == "add":
+						results[i] = { "op": "add", "_id": ref.id, "status": 201, "item": { **op["item"], "_id": ref.id } }
+					elif op["op"] == "update":
+						item = { **_applyChanges(contents[i], op["changes"]), "_id": ref.id }
+						results[i] = { "op": "update", "_id": ref.id, "status": 200, "item": item }
+					else:
+						results[i] = { "op": "delete", "_id": ref.id, "status": 200 }
+
+			todo = retry
+			if not todo:
+				break
+
+		for i in todo:
+			results[i] = { "op": ops[i]["op"], "_id": refs[i].id, "status": 409, "error": "Checklist item kept changing, try again" }
+		logger.debug(f"Applied {sum(r['status'] < 300 for r in results)}/{len(ops)} checklist bulk ops")
+		return jsonify({ "results": results }), 200
+	except Exception as e:
+		logger.exception(f"Checklist bulk ops failed...\n {e}")
+		return jsonify({ "error": str(e) }), 500
\ No newline at end of file
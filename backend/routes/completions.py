@@ -3,30 +3,51 @@
 from flask import Blueprint, jsonify, request
 from backend.firebase import completionsCo
 from backend.auth import handleFirebaseAuth
+from backend.versions import versioned
 from backend.logger import logRequests, getLogger
-from backend.helpers import _isoToDt, _objsToIso
+from backend.helpers import _isoToDt
+from backend.query import rangeQuery, parsePage, parseFields, pageQuery
+from backend.streaming import wantsStream, streamDocs
+from backend.metrics import phase
 
 logger = getLogger(__name__)
 completionsBP = Blueprint("completions", __name__, url_prefix="/completions")
 
+def queryCompletions(uID, start=None, end=None, fields=None):
+	"""
+	Completions owned by uID overlapping [start, end) (ISO strings, either optional).
+	"""
+	docs = rangeQuery(completionsCo, uID, start, end, fields).stream()
+	with phase("convert"):
+		return [{**d.to_dict(), "_id": d.id} for d in docs]
+
 @completionsBP.route("", methods=["GET"])
 @logRequests
 @handleFirebaseAuth
+@versioned("completions")
 def listCompletions(uID):
 	start = request.args.get("start", None)
 	end = request.args.get("end", None)
 
 	logger.info(f"GET completions in range {_isoToDt(start)} - {_isoToDt(end)}")
 
-	q = completionsCo.where("ownerID", "==", uID)
-	if start:
-		q = q.where("endStamp", ">=", _isoToDt(start))
-	
-	docs = list(q.stream())
-	completions = [{**d.to_dict(), "_id": d.id} for d in docs]
-	if end:
-		completions = [e for e in completions if e.get("startStamp") and e["startStamp"] < _isoToDt(end)]
+	try:
+		limit, cursor = parsePage(request.args)
+		fields = parseFields(request.args, paged=bool(limit))
+	except ValueError as e:
+		return jsonify({"error": str(e)}), 400
+
+	if limit:
+		docs, nextPageToken = pageQuery(rangeQuery(completionsCo, uID, start, end, fields), limit, cursor)
+		with phase("convert"):
+			completions = [{**d.to_dict(), "_id": d.id} for d in docs]
+		return jsonify({"items": completions, "nextPageToken": nextPageToken}), 200
+
+	if wantsStream():
+		return streamDocs(rangeQuery(completionsCo, uID, start, end, fields).stream())
+
+	completions = queryCompletions(uID, start, end, fields)
 
 	logger.info(f"GET completions found {len(completions)} objects");
 
-	return jsonify(_objsToIso(completions)), 200
+	return jsonify(completions), 200
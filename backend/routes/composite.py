@@ -1,11 +1,14 @@
 # backend/routes/composite.py
 from flask import Blueprint, jsonify, request
-import os
-import json
+from google.cloud.firestore import SERVER_TIMESTAMP
 from backend.firebase import db, eventsCo, formsCo, schedulesCo, completionsCo
 from backend.auth import handleFirebaseAuth
+from backend.cache import formsCache, schedulesCache
+from backend.versions import bumpVersions
+from backend.tombstones import deleteWithTombstone
 from backend.logger import logRequests, getLogger
-from backend.helpers import _objsToIso, _objsToDt
+from backend.helpers import _objsToDt
+from backend.validation import validateComposite, describeErrors
 
 logger = getLogger(__name__)
 compositeBP = Blueprint("composite", __name__, url_prefix="/composite")
@@ -21,103 +24,20 @@ def upsertComposite(uID) -> dict:
 	"""
 	payload = request.get_json() or {}
 
-	# Save payload for inspection
-	try:
-		objDir = '/home/garritr01/Documents/portiaApp/backend/logs/objects/'
-		os.makedirs(objDir, exist_ok=True)
-		with open(f"{objDir}payload.json", "w") as f:
-			json.dump(payload, f, indent=2)
-	except Exception as e:
-		logger.debug(f"Skip payload dump: {e}")
+	# region GUARD
+	errors = validateComposite(payload)
+	if errors:
+		logger.warning("Canceling upsertComposite due to:\n" + describeErrors(errors))
+		return jsonify({"form": {}, "event": {}, "schedules": [], "completion": [], "errors": errors}), 400
+	# endregion
 
 	# Grab individual objects from payload
 	form  = payload.get("form",  {})
 	event = payload.get("event", {})
 	scheds = payload.get("schedules", {})
 	comp = payload.get("completion", {})
-	dirty = payload.get("dirty", {})
-	toDelete = payload.get("toDelete", {})
-
-	# region GUARD
-	validComposite = True
-	invalidCompositeInfo = "Canceling upsertComposite"
-
-	# top level type check
-	if not all(isinstance(obj, dict) for obj in (form, event, scheds, comp, dirty, toDelete)):
-		objs = {
-			"form": form, "event": event, 
-			"schedules": scheds, "completion": comp, 
-			"dirty": dirty, "toDelete": toDelete
-		}
-		bad = [f"{k}: {type(v).__name__}" for k, v in objs.items() if not isinstance(v, dict)]
-		invalidCompositeInfo += "\n due to invalid types: " + ", ".join(bad)
-		validComposite = False
-
-	# required keys + value types (always check; even if {} we want errors)
-	for name, obj in (("toDelete", toDelete), ("dirty", dirty)):
-		missing = [k for k in ("form", "event", "completion", "schedules") if k not in obj]
-		if missing:
-			invalidCompositeInfo += f"\n due to missing {name} indicators: [{', '.join(missing)}]"
-			validComposite = False
-		else:
-			# form/event flags must be bool
-			for objName in ("form", "event", "completion"):
-				val = obj.get(objName)
-				if not isinstance(val, bool):
-					invalidCompositeInfo += f"\n due to non-bool {name}.{objName} indicator type: {type(val).__name__}"
-					validComposite = False
-			# schedules map must be dict[str,bool]
-			objMap = obj.get("schedules")
-			if not isinstance(objMap, dict):
-				invalidCompositeInfo += f"\n due to non-dict {name}.schedules indicator type: {type(objMap).__name__}"
-				validComposite = False
-			else:
-				for objID, flag in objMap.items():
-					if not isinstance(flag, bool):
-						invalidCompositeInfo += f"\n due to non-bool {name}.schedules.{objID} indicator type: {type(flag).__name__}"
-						validComposite = False
-
-	# key alignment between scheds and flag maps (only if all dicts)
-	if isinstance(scheds, dict) and isinstance((dirty).get("schedules"), dict) and isinstance((toDelete).get("schedules"), dict):
-		schedIDs       = sorted(scheds.keys())
-		dirtySchedIDs  = sorted(dirty.get("schedules", {}).keys())
-		deleteSchedIDs = sorted(toDelete.get("schedules", {}).keys())
-		for nm, ids in (("dirty", dirtySchedIDs), ("toDelete", deleteSchedIDs)):
-			if schedIDs != ids:
-				invalidCompositeInfo += f"\n due to mismatched scheduleIDs between {nm}['schedules'] ({', '.join(ids)}) and schedules ({', '.join(schedIDs)})"
-				validComposite = False
-
-	# Check for completion misalignment
-	touchCompletion = (dirty.get('completion', None) or toDelete.get('completion', None))
-	completionExists = bool(event.get('completionID')) or touchCompletion
-	if touchCompletion and not comp.get("_id", None):
-		invalidCompositeInfo += "\n No completion _id"
-		validComposite = False
-	if toDelete.get('event', None) != toDelete.get('completion', None):
-		invalidCompositeInfo += "\n toDelete['event'] != toDelete['completion]"
-		validComposite = False
-	if completionExists:
-		eSchedID = event.get("scheduleID", None)
-		eCompID = event.get("completionID", None)
-		cSchedID = comp.get("scheduleID", None)
-		cEventID = comp.get("eventID", None)
-		cID = comp.get("_id", None)
-		eID = event.get("_id", None)
-		if eSchedID != cSchedID: # Event and completion should contain same scheduleID
-			invalidCompositeInfo += "\n event and completion contain differing scheduleIDs"
-			validComposite = False
-		if eCompID != cID: # Event should contain correct completionID (could be None)
-			invalidCompositeInfo += f"\n event contains incorrect completionID true({cID}) != joinID({eCompID})"
-			validComposite = False
-		if cEventID != eID: # Completion should contain correct eventID (could be None)
-			invalidCompositeInfo += f"\n completion contains incorrect eventID true({eID}) != joinID({cEventID})"
-			validComposite = False
-
-	# Log full info about invalidity and return empty
-	if not validComposite:
-		logger.warning(invalidCompositeInfo)
-		return jsonify({"form": {}, "event": {}, "schedules": [], "completion": []}), 400
-	# endregion
+	dirty = payload["dirty"]
+	toDelete = payload["toDelete"]
 
 	batch = db.batch()
 
@@ -126,7 +46,7 @@ def upsertComposite(uID) -> dict:
 	compID = comp.pop("_id", None)
 	if toDelete['event']:
 		if eventID:
-			batch.delete(eventsCo.document(eventID))
+			deleteWithTombstone(batch, uID, "events", eventsCo.document(eventID))
 	elif dirty['event']:
 		if eventID : # If eventID present, update
 			eventRef = eventsCo.document(eventID)
@@ -139,27 +59,27 @@ def upsertComposite(uID) -> dict:
 		if dirty['completion']: # include completion id with event
 			event["completionID"] = compID
 
-		batch.set(eventRef, { **_objsToDt(event), "ownerID": uID }, merge=True)
+		batch.set(eventRef, { **_objsToDt(event), "ownerID": uID, "updatedAt": SERVER_TIMESTAMP }, merge=True)
 	elif dirty['completion'] and eventID:
-		batch.set(eventsCo.document(eventID), {"completionID": compID, "ownerID": uID}, merge=True)
+		batch.set(eventsCo.document(eventID), {"completionID": compID, "ownerID": uID, "updatedAt": SERVER_TIMESTAMP}, merge=True)
 
 	# endregion
 
 	# region COMPLETION REF/DELETE
 	if toDelete['completion']:
-		batch.delete(completionsCo.document(compID))
+		deleteWithTombstone(batch, uID, "completions", completionsCo.document(compID))
 	elif dirty['completion']:
 		logger.warning(f"Updating/creating completion: {comp.get('path')} ({compID})")
 		compRef = completionsCo.document(compID)
 		comp["eventID"] = eventID
-		batch.set(compRef, { **_objsToDt(comp), "ownerID": uID }, merge=True)
+		batch.set(compRef, { **_objsToDt(comp), "ownerID": uID, "updatedAt": SERVER_TIMESTAMP }, merge=True)
 	# endregion
 
 	# region FORM SAVE/DELETE
 	formID = form.pop("_id", None)
 	if toDelete['form']:
 		if formID:
-			batch.delete(formsCo.document(formID))
+			deleteWithTombstone(batch, uID, "forms", formsCo.document(formID))
 	elif dirty['form']: # Save form if dirty
 		if formID: # If formID present, update
 			formRef = formsCo.document(formID)
@@ -169,7 +89,7 @@ def upsertComposite(uID) -> dict:
 			formID  = formRef.id
 			logger.info(f"Creating form: {form.get('path')} ({formID})")
 
-		batch.set(formRef, {**form, "ownerID": uID}, merge=True)
+		batch.set(formRef, {**form, "ownerID": uID, "updatedAt": SERVER_TIMESTAMP}, merge=True)
 	# endregion
 
 	# region SCHEDULES SAVE/DELETE
@@ -178,7 +98,7 @@ def upsertComposite(uID) -> dict:
 
 		if toDelete['schedules'][key]:
 			if key and not key.startswith('new_'):
-				batch.delete(schedulesCo.document(key))
+				deleteWithTombstone(batch, uID, "schedules", schedulesCo.document(key))
 				deletedSchedIDs.append(key)
 		elif dirty['schedules'][key]:
 			schedID = sched.pop('_id', None)
@@ -190,12 +110,27 @@ def upsertComposite(uID) -> dict:
 				schedID  = schedRef.id
 				logger.info(f"Creating schedule: {sched.get('path')} ({schedID})")
 		
-			batch.set(schedRef, {**_objsToDt(sched), "ownerID": uID}, merge=True)
+			batch.set(schedRef, {**_objsToDt(sched), "ownerID": uID, "updatedAt": SERVER_TIMESTAMP}, merge=True)
 			updatedSchedIDs.append(schedID) # Record updated schedule IDs for read and return
 	# endregion
 
+	# Bump change versions alongside the writes so ETags go stale atomically
+	touched = {
+		"events": toDelete['event'] or dirty['event'] or (dirty['completion'] and eventID),
+		"completions": toDelete['completion'] or dirty['completion'],
+		"forms": toDelete['form'] or dirty['form'],
+		"schedules": updatedSchedIDs or deletedSchedIDs,
+	}
+	bumpVersions(batch, [uID], [c for c, t in touched.items() if t])
+
 	batch.commit()
 
+	# Cached reads are stale once the batch lands
+	if dirty['form'] or toDelete['form']:
+		formsCache.invalidate(uID)
+	if updatedSchedIDs or deletedSchedIDs:
+		schedulesCache.invalidate(uID)
+
 	# region READ UPDATED OBJECTS AND CONFIRM DELETIONS
 	deletions = {
 		"event": None,
@@ -204,31 +139,37 @@ def upsertComposite(uID) -> dict:
 		"schedules": deletedSchedIDs,
 	}
 
+	# Every written doc comes back in a single get_all round trip
+	compRead = completionsCo.document(compID) if dirty["completion"] and not toDelete["completion"] else None
+	eventRead = eventsCo.document(eventID) if dirty["event"] and not toDelete["event"] else None
+	formRead = formsCo.document(formID) if dirty["form"] and not toDelete["form"] else None
+	schedReads = [schedulesCo.document(sID) for sID in updatedSchedIDs]
+	reads = [ref for ref in (compRead, eventRead, formRead, *schedReads) if ref is not None]
+	snaps = {snap.reference.path: snap for snap in db.get_all(reads)} if reads else {}
+
+	def readBack(ref):
+		snap = snaps[ref.path]
+		return { **snap.to_dict(), "_id": snap.id }
+
 	updatedCompletion = { '_id': None }
 	if toDelete["completion"] and compID:
 		deletions["completion"] = compID
-	elif dirty["completion"]:
-		compDoc = completionsCo.document(compID).get()
-		updatedCompletion = { **_objsToIso(compDoc.to_dict()), "_id": compDoc.id }
+	elif compRead:
+		updatedCompletion = readBack(compRead)
 
 	updatedEvent = { '_id': None }
 	if toDelete["event"]:
 		deletions["event"] = eventID
-	elif dirty["event"]:
-		eventDoc = eventsCo.document(eventID).get()
-		updatedEvent = { **_objsToIso(eventDoc.to_dict()), "_id": eventDoc.id }
+	elif eventRead:
+		updatedEvent = readBack(eventRead)
 
 	updatedForm = { '_id': None }
 	if toDelete["form"]:
 		deletions["form"] = formID
-	elif dirty["form"]:
-		formDoc = formsCo.document(formID).get()
-		updatedForm = { **formDoc.to_dict(), "_id": formDoc.id }
-
-	updatedSchedules = []
-	for sID in updatedSchedIDs:
-		schedDoc = schedulesCo.document(sID).get()
-		updatedSchedules.append({ **_objsToIso(schedDoc.to_dict()), "_id": schedDoc.id })
+	elif formRead:
+		updatedForm = readBack(formRead)
+
+	updatedSchedules = [readBack(ref) for ref in schedReads]
 
 	# endregion
 
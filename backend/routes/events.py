@@ -3,28 +3,66 @@
 from flask import Blueprint, jsonify, request
 from backend.firebase import eventsCo
 from backend.auth import handleFirebaseAuth
+from backend.versions import versioned
 from backend.logger import logRequests, getLogger
-from backend.helpers import _isoToDt, _objsToIso
+from backend.helpers import _isoToDt
+from backend.query import rangeQuery, parsePage, parseFields, pageQuery
+from backend.streaming import wantsStream, streamDocs
+from backend.metrics import phase
 
 logger = getLogger(__name__)
 eventsBP = Blueprint("events", __name__, url_prefix="/events")
 
+def queryEvents(uID, start=None, end=None, fields=None):
+	"""
+	Events owned by uID overlapping [start, end) (ISO strings, either optional).
+	"""
+	docs = rangeQuery(eventsCo, uID, start, end, fields).stream()
+	with phase("convert"):
+		return [{**d.to_dict(), "_id": d.id} for d in docs]
+
 @eventsBP.route("", methods=["GET"])
 @logRequests
 @handleFirebaseAuth
+@versioned("events")
 def listEvents(uID):
 	start = request.args.get("start", None)
 	end = request.args.get("end", None)
 
 	logger.info(f"GET events in range {_isoToDt(start)} - {_isoToDt(end)}")
 
-	q = eventsCo.where("ownerID", "==", uID)
-	if start:
-		q = q.where("endStamp", ">=", _isoToDt(start))
-	
-	docs = list(q.stream())
-	events = [{**d.to_dict(), "_id": d.id} for d in docs]
-	if end:
-		events = [e for e in events if e.get("startStamp") and e["startStamp"] < _isoToDt(end)]
+	try:
+		limit, cursor = parsePage(request.args)
+		fields = parseFields(request.args, paged=bool(limit))
+	except ValueError as e:
+		return jsonify({"error": str(e)}), 400
+
+	if limit:
+		docs, nextPageToken = pageQuery(rangeQuery(eventsCo, uID, start, end, fields), limit, cursor)
+		with phase("convert"):
+			events = [{**d.to_dict(), "_id": d.id} for d in docs]
+		return jsonify({"items": events, "nextPageToken": nextPageToken}), 200
+
+	if wantsStream():
+		return streamDocs(rangeQuery(eventsCo, uID, start, end, fields).stream())
+
+	events = queryEvents(uID, start, end, fields)
+
+	return jsonify(events), 200
+
+@eventsBP.route("/<docID>", methods=["GET"])
+@logRequests
+@handleFirebaseAuth
+@versioned("events")
+def getEvent(uID, docID):
+	"""
+	Full event, for when the calendar only listed projected fields.
+	"""
+	doc = eventsCo.document(docID).get()
+	if not doc.exists:
+		return jsonify({"error": "No event found"}), 404
+	event = doc.to_dict()
+	if uID != event.get("ownerID"):
+		return jsonify({"error": "User not permitted to view event"}), 403
 
-	return jsonify(_objsToIso(events)), 200
+	return jsonify({**event, "_id": doc.id}), 200
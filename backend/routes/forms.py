@@ -3,17 +3,39 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime, timezone
 from backend.firebase import formsCo
 from backend.auth import handleFirebaseAuth
+from backend.versions import versioned
+from backend.cache import formsCache
+from backend.streaming import wantsStream, streamDocs
+from backend.metrics import phase
+from backend.query import parseFields, trimDoc
 from backend.logger import logRequests, getLogger
 
 logger = getLogger(__name__)
 formsBP = Blueprint("forms", __name__, url_prefix="/forms")
 
+def _userForms(uID):
+	""" Form snapshots owned by uID, read through the per-user cache """
+	return formsCache.get(uID, lambda: list(formsCo.where("ownerID", "==", uID).stream()))
+
+def queryForms(uID):
+	""" Forms owned by uID """
+	docs = _userForms(uID)
+	with phase("convert"):
+		return [{**d.to_dict(), "_id": d.id} for d in docs]
+
 @formsBP.route("", methods=["GET"])
 @logRequests
 @handleFirebaseAuth
+@versioned("forms")
 def listForms(uID):
 	logger.info("GET forms")
-	docs = formsCo.where("ownerID", "==", uID).stream()
-	forms = [{**d.to_dict(), "_id": d.id} for d in docs]
+	try:
+		fields = parseFields(request.args)
+	except ValueError as e:
+		return jsonify({"error": str(e)}), 400
+
+	if wantsStream():
+		return streamDocs(_userForms(uID), fields=fields)
+	forms = [trimDoc(f, fields) for f in queryForms(uID)]
 	return jsonify(forms), 200
 
@@ -0,0 +1,23 @@
+# backend/routes/metrics.py
+
+import hmac
+from flask import Blueprint, Response, jsonify, request
+from backend.config import METRICS_TOKEN, devMode
+from backend.metrics import renderMetrics
+
+metricsBP = Blueprint("metrics", __name__, url_prefix="/metrics")
+
+@metricsBP.route("", methods=["GET"])
+def metrics():
+	"""
+	Prometheus scrape target. Requires "Bearer <METRICS_TOKEN>" when that's configured;
+	without one it's only served in devMode.
+	"""
+	if METRICS_TOKEN:
+		header = request.headers.get("Authorization", "")
+		if not hmac.compare_digest(header, f"Bearer {METRICS_TOKEN}"):
+			return jsonify({"error": "Metrics token missing or wrong"}), 401
+	elif not devMode:
+		return jsonify({"error": "Not found"}), 404
+
+	return Response(renderMetrics(), mimetype="text/plain; version=0.0.4")
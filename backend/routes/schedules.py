@@ -1,19 +1,72 @@
 # backend/routes/schedules
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from flask import Blueprint, request, jsonify
 from backend.firebase import schedulesCo, db
 from backend.auth import handleFirebaseAuth
+from backend.versions import versioned
+from backend.cache import schedulesCache
+from backend.config import OCCURRENCE_MAX_DAYS
 from backend.logger import logRequests, getLogger
-from backend.helpers import _objsToIso
+from backend.helpers import _isoToDt
+from backend.recurrence import getRule
+from backend.streaming import wantsStream, streamDocs
+from backend.metrics import phase
+from backend.query import parseFields, trimDoc
 
 logger = getLogger(__name__)
 schedulesBP = Blueprint("schedules", __name__, url_prefix="/schedules")
 
+def _userSchedules(uID):
+	""" Schedule snapshots owned by uID, read through the per-user cache """
+	return schedulesCache.get(uID, lambda: list(schedulesCo.where("ownerID", "==", uID).stream()))
+
+def querySchedules(uID):
+	""" Schedules owned by uID """
+	docs = _userSchedules(uID)
+	with phase("convert"):
+		return [{**d.to_dict(), "_id": d.id} for d in docs]
+
 @schedulesBP.route("", methods=["GET"])
 @logRequests
 @handleFirebaseAuth
+@versioned("schedules")
 def listSchedules(uID):
 	logger.info(f"GET schedules")
-	docs = schedulesCo.where("ownerID", "==", uID).stream()
-	scheds = [{**d.to_dict(), "_id": d.id} for d in docs]
-	return jsonify(_objsToIso(scheds)), 200
\ No newline at end of file
+	try:
+		fields = parseFields(request.args)
+	except ValueError as e:
+		return jsonify({"error": str(e)}), 400
+
+	if wantsStream():
+		return streamDocs(_userSchedules(uID), fields=fields)
+	scheds = [trimDoc(s, fields) for s in querySchedules(uID)]
+	return jsonify(scheds), 200
+
+@schedulesBP.route("/occurrences", methods=["GET"])
+@logRequests
+@handleFirebaseAuth
+@versioned("schedules")
+def listOccurrences(uID):
+	"""
+	Expand the user's schedules into recurs within [start, end) server-side.
+	"""
+	start = _isoToDt(request.args.get("start", None))
+	end = _isoToDt(request.args.get("end", None))
+	if not isinstance(start, datetime) or not isinstance(end, datetime):
+		return jsonify({"error": "start and end must be ISO datetimes"}), 400
+	if end <= start:
+		return jsonify({"error": "end must be after start"}), 400
+	if end - start > timedelta(days=OCCURRENCE_MAX_DAYS):
+		return jsonify({"error": f"Range exceeds {OCCURRENCE_MAX_DAYS} days"}), 400
+
+	logger.info(f"GET occurrences in range {start} - {end}")
+
+	recurs = []
+	for d in _userSchedules(uID):
+		rule = getRule(d.id, d.update_time, d.to_dict)
+		recurs.extend(rule.recurs(start, end))
+	recurs.sort(key=lambda r: r["startStamp"])
+
+	logger.info(f"GET occurrences found {len(recurs)} recurs")
+
+	return jsonify(recurs), 200
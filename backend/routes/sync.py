@@ -0,0 +1,92 @@
+# backend/routes/sync.py
+
+from datetime import datetime, timezone
+from flask import Blueprint, jsonify, request
+from google.cloud import firestore as gcf
+from backend.firebase import db, eventsCo, completionsCo, schedulesCo, formsCo, tombstonesCo
+from backend.auth import handleFirebaseAuth
+from backend.logger import logRequests, getLogger
+from backend.helpers import _isoToDt
+from backend.tombstones import retention
+
+logger = getLogger(__name__)
+syncBP = Blueprint("sync", __name__, url_prefix="/sync")
+
+# Token handed out when nothing stamped has been seen yet
+_epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+syncCollections = {
+	"events": eventsCo,
+	"completions": completionsCo,
+	"schedules": schedulesCo,
+	"forms": formsCo,
+}
+
+def _readChanges(transaction, uID, since):
+	"""
+	Docs written and tombstones laid after since (everything when None),
+	all read at one snapshot so the returned token can't skip a write.
+	A tombstone whose doc was written again (client IDs like completions' repeat)
+	is dropped, since the doc exists at this snapshot.
+	"""
+	changes = {name: [] for name in syncCollections}
+	deletions = {name: [] for name in syncCollections}
+	latest = since
+
+	for name, co in syncCollections.items():
+		q = co.where("ownerID", "==", uID)
+		if since:
+			q = q.where("updatedAt", ">", since)
+		for d in q.stream(transaction=transaction):
+			obj = {**d.to_dict(), "_id": d.id}
+			stamp = obj.get("updatedAt")
+			if stamp and (latest is None or stamp > latest):
+				latest = stamp
+			changes[name].append(obj)
+
+	if since:
+		live = {name: {obj["_id"] for obj in objs} for name, objs in changes.items()}
+		q = tombstonesCo.where("ownerID", "==", uID).where("deletedAt", ">", since)
+		for d in q.stream(transaction=transaction):
+			stone = d.to_dict()
+			name = stone.get("collection")
+			if name in deletions and stone.get("docID") not in live[name]:
+				deletions[name].append(stone.get("docID"))
+			if latest is None or stone["deletedAt"] > latest:
+				latest = stone["deletedAt"]
+
+	return changes, deletions, latest
+
+@syncBP.route("", methods=["GET"])
+@logRequests
+@handleFirebaseAuth
+def sync(uID):
+	"""
+	Everything created, updated or deleted since the client's last syncToken.
+	No since gives a full snapshot to seed the client's replica, and so does a since
+	older than the tombstone retention, since deletions before then may be gone.
+	"""
+	since = request.args.get("since", None)
+	sinceDt = _isoToDt(since) if since else None
+	if since and isinstance(sinceDt, str):
+		return jsonify({"error": "Malformed since token"}), 400
+	if sinceDt and sinceDt < datetime.now(timezone.utc) - retention:
+		logger.info(f"GET sync since {sinceDt} is past tombstone retention, sending a full snapshot")
+		sinceDt = None
+
+	changes, deletions, latest = gcf.transactional(_readChanges)(
+		db.transaction(read_only=True), uID, sinceDt
+	)
+
+	logger.info(
+		f"GET sync since {sinceDt} found "
+		+ ", ".join(f"{len(changes[n])}/{len(deletions[n])} {n}" for n in syncCollections)
+		+ " (changed/deleted)"
+	)
+
+	return jsonify({
+		**changes,
+		"deletions": deletions,
+		"syncToken": latest or _epoch,
+		"full": sinceDt is None,
+	}), 200
@@ -0,0 +1,442 @@
+# backend/sqlitestore.py
+"""
+SQLite storage behind the same client surface as backend.fakestore.FakeClient, for
+single-node and self-hosted deployments:
+
+	STORAGE_BACKEND=sqlite SQLITE_PATH=/data/portia.sqlite3 python run.py
+
+Routes keep talking to the Firestore client API (collection/where/order_by/limit/stream,
+document get/set/update/delete, batches, get_all, transactions); refs, queries, batches and
+transactions are fakestore's, and this module swaps the storage underneath them.
+
+Every doc lives in one table as encoded JSON, with the fields routes filter and order on
+copied into indexed columns:
+
+	(collection, ownerID, endStamp, startStamp, id)   range queries and pageQuery's order
+	(collection, ownerID, startStamp, endStamp)       range queries, covering whichever bound SQLite starts from
+	(collection, ownerID, updatedAt) / (…, deletedAt) /sync
+	(collection, path)                                path lookups
+	members(collection, field, value, id)             array_contains on participants
+
+Filters and orders on those fields run in SQL (ORDER BY and LIMIT included when every
+ordered field is indexed); anything else is evaluated in Python over the SQL-narrowed rows.
+An indexed column only holds values of its declared type (text, timestamp or bool), which
+is exactly what a Firestore filter of that type matches. Docs storing null or another type
+in one are flagged, and while a collection has any, its ordering runs in Python instead.
+
+The database runs in WAL mode: readers on their own per-thread connections never wait
+on the single writer, and each commit is one IMMEDIATE transaction. Commit times come from
+a clock row bumped in that transaction, so several processes can write the same file.
+"""
+import os
+import base64
+import sqlite3
+import threading
+import orjson
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from backend.fakestore import (
+	FakeClient, FakeCollection, FakeDocument, FakeSnapshot,
+	_now, _store, _transform, _missing, _project, _predicate, _resolveOrders, _docID,
+)
+
+# Indexed columns: field -> kind
+indexedFields = {
+	"ownerID": "text",
+	"path": "text",
+	"startStamp": "time",
+	"endStamp": "time",
+	"updatedAt": "time",
+	"deletedAt": "time",
+	"active": "bool",
+}
+# Array fields whose string members are indexed for array_contains
+arrayFields = ("participants",)
+
+_schema = f"""
+CREATE TABLE IF NOT EXISTS docs (
+	collection TEXT NOT NULL,
+	id TEXT NOT NULL,
+	data BLOB NOT NULL,
+	createTime INTEGER NOT NULL,
+	updateTime INTEGER NOT NULL,
+	{", ".join(f"{field} {'TEXT' if kind == 'text' else 'INTEGER'}" for field, kind in indexedFields.items())},
+	mixed INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS docsOwnerEnd ON docs (collection, ownerID, endStamp, startStamp, id);
+CREATE INDEX IF NOT EXISTS docsOwnerStart ON docs (collection, ownerID, startStamp, endStamp);
+CREATE INDEX IF NOT EXISTS docsOwnerUpdated ON docs (collection, ownerID, updatedAt);
+CREATE INDEX IF NOT EXISTS docsOwnerDeleted ON docs (collection, ownerID, deletedAt);
+CREATE INDEX IF NOT EXISTS docsPath ON docs (collection, path);
+CREATE INDEX IF NOT EXISTS docsMixed ON docs (collection) WHERE mixed = 1;
+CREATE TABLE IF NOT EXISTS members (
+	collection TEXT NOT NULL,
+	field TEXT NOT NULL,
+	value TEXT NOT NULL,
+	id TEXT NOT NULL,
+	PRIMARY KEY (collection, field, value, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS clock (
+	id INTEGER PRIMARY KEY CHECK (id = 0),
+	lastCommit INTEGER NOT NULL
+);
+"""
+
+_columns = ", ".join(indexedFields)
+_upsert = (
+	f"INSERT INTO docs (collection, id, data, createTime, updateTime, {_columns}, mixed) "
+	f"VALUES ({', '.join('?' * (6 + len(indexedFields)))}) "
+	f"ON CONFLICT (collection, id) DO UPDATE SET data = excluded.data, updateTime = excluded.updateTime, "
+	+ ", ".join(f"{field} = excluded.{field}" for field in (*indexedFields, "mixed"))
+)
+
+_sqlOps = {"==": "=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+# region ENCODING
+
+_epoch = DatetimeWithNanoseconds(1970, 1, 1, tzinfo=timezone.utc)
+_microsecond = timedelta(microseconds=1)
+
+def _micros(dt):
+	return (_store(dt) - _epoch) // _microsecond
+
+def _fromMicros(n):
+	return _epoch + timedelta(microseconds=n) # keeps the DatetimeWithNanoseconds type
+
+def _default(value):
+	if isinstance(value, datetime):
+		return {"__ts__": _micros(value)}
+	if isinstance(value, bytes):
+		return {"__bytes__": base64.b64encode(value).decode()}
+	raise TypeError(f"Can't store {type(value).__name__}")
+
+def _encode(data):
+	return orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+def _revive(value):
+	""" Decoded JSON back to stored form, tagged maps to datetimes/bytes """
+	if isinstance(value, dict):
+		if len(value) == 1:
+			if "__ts__" in value:
+				return _fromMicros(value["__ts__"])
+			if "__bytes__" in value:
+				return base64.b64decode(value["__bytes__"])
+		return {k: _revive(v) for k, v in value.items()}
+	if isinstance(value, list):
+		return [_revive(v) for v in value]
+	return value
+
+def _decode(raw):
+	return _revive(orjson.loads(raw))
+
+def _columnValue(kind, value):
+	""" SQL value for an indexed column, None when value isn't the column's type """
+	if kind == "text":
+		return value if isinstance(value, str) else None
+	if kind == "time":
+		return _micros(value) if isinstance(value, datetime) else None
+	if kind == "bool":
+		return int(value) if isinstance(value, bool) else None
+	return None
+
+def _row(collection, docID, data, createTime, updateTime):
+	columns = [_columnValue(kind, data.get(field)) for field, kind in indexedFields.items()]
+	# Present but not the column's type (null included): Firestore still orders such docs
+	mixed = any(v is None and field in data for field, v in zip(indexedFields, columns))
+	return (collection, docID, _encode(data), createTime, updateTime, *columns, int(mixed))
+
+def _members(collection, docID, data):
+	return [
+		(collection, field, value, docID)
+		for field in arrayFields if isinstance(data.get(field), list)
+		for value in {v for v in data[field] if isinstance(v, str)}
+	]
+
+# endregion
+
+class SQLiteSnapshot(FakeSnapshot):
+	"""
+	Query result holding the stored blob. Every to_dict() decodes a fresh dict,
+	which is already private, so there's no copy on top of the decode.
+	"""
+	__slots__ = ("_raw",)
+
+	def __init__(self, reference, raw, createTime, updateTime):
+		self.reference = reference
+		self._raw = raw
+		self.create_time = createTime
+		self.update_time = updateTime
+
+	@property
+	def _data(self):
+		return _decode(self._raw)
+
+	@property
+	def exists(self):
+		return True
+
+	def to_dict(self):
+		return _decode(self._raw)
+
+class SQLiteClient(FakeClient):
+	"""
+	Firestore Client lookalike stored in one SQLite database (":memory:" for a private in-process one).
+	"""
+	def __init__(self, path=":memory:", project="sqlite"):
+		self.project = project
+		self.path = path
+		self._lock = threading.RLock() # one writer at a time, and every access for :memory:
+		self._local = threading.local()
+		self._shared = None
+		if path == ":memory:":
+			self._shared = self._connect(path)
+		else:
+			if os.path.dirname(path):
+				os.makedirs(os.path.dirname(path), exist_ok=True)
+			self._connection().executescript(_schema)
+
+	def _connect(self, path):
+		conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+		conn.execute("PRAGMA journal_mode = WAL")
+		conn.execute("PRAGMA synchronous = NORMAL")
+		conn.execute("PRAGMA busy_timeout = 5000")
+		conn.execute("PRAGMA temp_store = MEMORY")
+		conn.execute("PRAGMA mmap_size = 268435456") # connections share the OS page cache instead of each warming its own
+		if path == ":memory:":
+			conn.executescript(_schema)
+		return conn
+
+	def _connection(self):
+		if self._shared is not None:
+			return self._shared
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = self._local.conn = self._connect(self.path)
+		return conn
+
+	def _reading(self):
+		""" Readers share nothing in WAL mode, :memory: has one connection to guard """
+		return self._lock if self._shared is not None else nullcontext()
+
+	def close(self):
+		conn = self._shared or getattr(self._local, "conn", None)
+		if conn is not None:
+			conn.close()
+
+	def collections(self):
+		with self._reading():
+			rows = self._connection().execute("SELECT DISTINCT collection FROM docs").fetchall()
+		return [FakeCollection(self, path) for (path,) in rows if "/" not in path]
+
+	# region INTERNALS
+
+	def _entry(self, collection, docID):
+		row = self._connection().execute(
+			"SELECT data, createTime, updateTime FROM docs WHERE collection = ? AND id = ?", (collection, docID),
+		).fetchone()
+		if row is None:
+			return None
+		return _decode(row[0]), _fromMicros(row[1]), _fromMicros(row[2])
+
+	def _snapshot(self, collection, docID, ref):
+		with self._reading():
+			entry = self._entry(collection, docID)
+		if entry is None:
+			return FakeSnapshot(ref, None)
+		return FakeSnapshot(ref, *entry)
+
+	def _listIDs(self, collection):
+		with self._reading():
+			rows = self._connection().execute("SELECT id FROM docs WHERE collection = ? ORDER BY id", (collection,)).fetchall()
+		return [docID for (docID,) in rows]
+
+	def _where(self, collection, field, op, value):
+		"""
+		(sql, params) for a filter SQLite can answer from an index, None when it has to run in Python.
+		"""
+		if field == "__name__": # document ID filters: the primary key answers every operator
+			if op in ("in", "not-in"):
+				ids = [_docID(v) for v in value]
+				return f"id {'IN' if op == 'in' else 'NOT IN'} ({', '.join('?' * len(ids))})", ids
+			return f"id {_sqlOps.get(op, '!=')} ?", [_docID(value)]
+		kind = indexedFields.get(field)
+		if kind is not None:
+			if op in _sqlOps:
+				v = _columnValue(kind, value)
+				if v is not None:
+					return f"{field} {_sqlOps[op]} ?", [v]
+			elif op == "in" and isinstance(value, list) and value:
+				vs = [_columnValue(kind, v) for v in value]
+				if all(v is not None for v in vs):
+					return f"{field} IN ({', '.join('?' * len(vs))})", vs
+		if field in arrayFields and op == "array_contains" and isinstance(value, str):
+			return "id IN (SELECT id FROM members WHERE collection = ? AND field = ? AND value = ?)", [collection, field, value]
+		return None
+
+	def _run(self, query):
+		collection = query._collection
+		orders, getters = _resolveOrders(query)
+
+		clauses, params, residual = ["collection = ?"], [collection], []
+		fieldFilters = False # an indexed filter other than the document ID
+		for field, op, value in query._filters:
+			pushed = self._where(collection, field, op, value)
+			if pushed is None:
+				residual.append(_predicate(field, op, value))
+			else:
+				clauses.append(pushed[0])
+				params += pushed[1]
+				fieldFilters = fieldFilters or field != "__name__"
+
+		# ORDER BY/LIMIT go to SQLite when every ordered field (and the cursor) is indexed
+		# and no doc would need Firestore's cross-type ordering
+		ordered = all(f == "__name__" or f in indexedFields for f, _ in orders)
+		if ordered and len(orders) > 1:
+			with self._reading():
+				ordered = self._connection().execute(
+					"SELECT 1 FROM docs INDEXED BY docsMixed WHERE collection = ? AND mixed = 1 LIMIT 1", (collection,),
+				).fetchone() is None
+		if ordered and query._cursor is not None:
+			cursor = [v if f == "__name__" else _columnValue(indexedFields[f], v) for (f, _), v in zip(orders, query._cursorKey(orders))]
+			if any(v is None for v in cursor):
+				ordered = False
+			else:
+				clauses.append(self._after(orders, cursor, params))
+
+		sql = "SELECT id, data, createTime, updateTime FROM docs WHERE "
+		if ordered:
+			clauses += [f"{f} IS NOT NULL" for f, _ in orders if f != "__name__"]
+			# Ordered by id alone, SQLite would rather walk the primary key than sort: "+id" keeps
+			# the filters' index in charge, which is far cheaper once any indexed filter is present
+			byName = "+id" if len(orders) == 1 and fieldFilters else "id"
+			sql += " AND ".join(clauses) + " ORDER BY " + ", ".join(
+				(byName if f == "__name__" else f) + (" DESC" if desc else "") for f, desc in orders
+			)
+			if query._limit is not None and not residual:
+				sql += f" LIMIT {int(query._limit)}"
+		else:
+			sql += " AND ".join(clauses)
+
+		fieldGetters = [get for get in getters if get is not None]
+		with self._reading():
+			rows = self._connection().execute(sql, params)
+			if not ordered:
+				matched = []
+				for docID, raw, createTime, updateTime in rows:
+					data = _decode(raw)
+					if all(p(data) for p in residual) and all(get(data) is not _missing for get in fieldGetters):
+						matched.append((docID, (data, _fromMicros(createTime), _fromMicros(updateTime))))
+				return self._finish(query, orders, getters, matched)
+
+			# Rows arrive in final order: only decode what a filter or projection needs
+			snaps = []
+			for docID, raw, createTime, updateTime in rows:
+				ref, createTime, updateTime = FakeDocument(self, collection, docID), _fromMicros(createTime), _fromMicros(updateTime)
+				if residual or query._fields is not None:
+					data = _decode(raw)
+					if not all(p(data) for p in residual):
+						continue
+					if query._fields is not None:
+						data = _project(data, query._fields)
+					snaps.append(FakeSnapshot(ref, data, createTime, updateTime))
+				else:
+					snaps.append(SQLiteSnapshot(ref, raw, createTime, updateTime))
+				if query._limit is not None and len(snaps) >= query._limit:
+					break
+			return snaps
+
+	@staticmethod
+	def _after(orders, cursor, params):
+		""" Row-value comparison for start_after, honoring each order's direction """
+		terms = []
+		for i, ((field, desc), value) in enumerate(zip(orders, cursor)):
+			eq = [f"{'id' if f == '__name__' else f} = ?" for f, _ in orders[:i]]
+			column = "id" if field == "__name__" else field
+			terms.append("(" + " AND ".join([*eq, f"{column} {'<' if desc else '>'} ?"]) + ")")
+			params += [*cursor[:i], value]
+		return "(" + " OR ".join(terms) + ")"
+
+	def _changed(self, reads):
+		""" Update times only, compared a chunk of ids per query """
+		byCollection = {}
+		for path, seen in reads.items():
+			collection, docID = path.rsplit("/", 1)
+			byCollection.setdefault(collection, {})[docID] = _micros(seen) if seen is not None else None
+		conn = self._connection()
+		for collection, seen in byCollection.items():
+			ids = list(seen)
+			current = {}
+			for i in range(0, len(ids), 500):
+				chunk = ids[i:i + 500]
+				current.update(conn.execute(
+					f"SELECT id, updateTime FROM docs WHERE collection = ? AND id IN ({', '.join('?' * len(chunk))})",
+					(collection, *chunk),
+				).fetchall())
+			for docID, micros in seen.items():
+				if current.get(docID) != micros:
+					return f"{collection}/{docID}"
+		return None
+
+	@contextmanager
+	def _writing(self):
+		with self._lock:
+			conn = self._connection()
+			conn.execute("BEGIN IMMEDIATE")
+			try:
+				yield
+			except BaseException:
+				conn.execute("ROLLBACK")
+				raise
+			conn.execute("COMMIT")
+
+	def _commitTime(self):
+		"""
+		Strictly increasing, so last_update_time preconditions always see a change. The last
+		commit time is kept in the database and bumped inside _writing's IMMEDIATE transaction,
+		so processes sharing the file never hand out the same one.
+		"""
+		conn = self._connection()
+		(last,) = conn.execute(
+			"SELECT COALESCE((SELECT lastCommit FROM clock), (SELECT MAX(updateTime) FROM docs), 0)"
+		).fetchone()
+		micros = max(_micros(_now()), last + 1)
+		conn.execute(
+			"INSERT INTO clock VALUES (0, ?) ON CONFLICT (id) DO UPDATE SET lastCommit = excluded.lastCommit", (micros,)
+		)
+		return _fromMicros(micros)
+
+	def _apply(self, staged, now):
+		conn = self._connection()
+		micros = _micros(now)
+		for (collection, docID), data in staged.items():
+			conn.execute("DELETE FROM members WHERE collection = ? AND id = ?", (collection, docID))
+			if data is None:
+				conn.execute("DELETE FROM docs WHERE collection = ? AND id = ?", (collection, docID))
+				continue
+			conn.execute(_upsert, _row(collection, docID, data, micros, micros))
+			conn.executemany("INSERT INTO members VALUES (?, ?, ?, ?)", _members(collection, docID, data))
+
+	def load(self, collection, docs):
+		"""
+		Bulk-seed collection with {docID: data} in one transaction, replacing existing docs.
+		"""
+		with self._writing():
+			micros = _micros(self._commitTime())
+			rows, members = [], []
+			for docID, data in docs.items():
+				stored = _transform(_missing, data)
+				rows.append(_row(collection, docID, stored, micros, micros))
+				members += _members(collection, docID, stored)
+			conn = self._connection()
+			conn.executemany("DELETE FROM members WHERE collection = ? AND id = ?", [(collection, docID) for docID in docs])
+			conn.executemany(_upsert, rows)
+			conn.executemany("INSERT INTO members VALUES (?, ?, ?, ?)", members)
+
+	def clear(self):
+		with self._writing():
+			self._connection().execute("DELETE FROM docs")
+			self._connection().execute("DELETE FROM members")
+
+	# endregion
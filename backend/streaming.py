@@ -0,0 +1,37 @@
+# backend/streaming.py
+from flask import Response, request, stream_with_context
+from backend.encoding import dumpBytes
+from backend.query import trimDoc
+
+# Flush encoded docs to the socket in chunks of roughly this many bytes
+STREAM_CHUNK = 16 * 1024
+
+def wantsStream():
+	"""
+	True when the client asked for ?stream=1
+	"""
+	return request.args.get("stream", "").lower() in ("1", "true")
+
+def streamDocs(docs, fields=None):
+	"""
+	JSON array response that encodes each snapshot as docs yields it,
+	so memory stays flat and the first bytes leave while the query runs.
+	fields trims docs that weren't already projected by Firestore.
+	"""
+	def generate():
+		buf, size = [b"["], 1
+		for i, d in enumerate(docs):
+			obj = d.to_dict() # already a private copy
+			obj["_id"] = d.id
+			if fields is not None:
+				obj = trimDoc(obj, fields)
+			enc = dumpBytes(obj)
+			buf.append(b"," + enc if i else enc)
+			size += len(enc) + 1
+			if size >= STREAM_CHUNK:
+				yield b"".join(buf)
+				buf, size = [], 0
+		buf.append(b"]")
+		yield b"".join(buf)
+
+	return Response(stream_with_context(generate()), status=200, mimetype="application/json")
@@ -0,0 +1,21 @@
+# backend/tombstones.py
+from datetime import datetime, timedelta, timezone
+from google.cloud.firestore import SERVER_TIMESTAMP
+from backend.firebase import tombstonesCo
+from backend.config import TOMBSTONE_RETENTION_DAYS
+
+retention = timedelta(days=TOMBSTONE_RETENTION_DAYS)
+
+def deleteWithTombstone(batch, uID, collection, ref):
+	"""
+	Queue delete of ref plus a tombstone so /sync can report it.
+	The tombstone's expireAt is what the Firestore TTL policy deletes on.
+	"""
+	batch.delete(ref)
+	batch.set(tombstonesCo.document(f"{collection}_{ref.id}"), {
+		"ownerID": uID,
+		"collection": collection,
+		"docID": ref.id,
+		"deletedAt": SERVER_TIMESTAMP,
+		"expireAt": datetime.now(timezone.utc) + retention,
+	})
@@ -0,0 +1,263 @@
+# backend/validation.py
+"""
+Declarative request-body schemas.
+
+Schemas are built from the combinators below when the module is imported; each one
+returns a check(value) closure that returns None when value is valid, or a list of
+(pathTuple, message) errors. Paths are only assembled on failure, so a valid payload
+costs a walk of prebuilt closures. compileSchema() wraps the root check into
+validate(value) which returns [{"path", "message"}, ...] (empty when valid).
+"""
+
+_missing = object()
+
+def _typeName(value):
+	return "null" if value is None else type(value).__name__
+
+def _prefix(key, errors):
+	return [((key, *path), message) for path, message in errors]
+
+def typed(*types, label=None, nullable=False):
+	"""
+	Value must be an instance of types (bool is never accepted as int).
+	"""
+	label = label or "/".join(t.__name__ for t in types)
+	exact = frozenset(types) | ({type(None)} if nullable else set())
+	rejectBool = bool not in types
+
+	def check(value):
+		if type(value) in exact: # fast path, subclasses fall through
+			return None
+		if value is None and nullable:
+			return None
+		if isinstance(value, types) and not (rejectBool and isinstance(value, bool)):
+			return None
+		return [((), f"expected {label}, got {_typeName(value)}")]
+
+	check.exact = exact
+	return check
+
+Bool = typed(bool)
+Str = typed(str)
+OptStr = typed(str, nullable=True)
+Int = typed(int)
+OptInt = typed(int, nullable=True)
+AnyDict = typed(dict, label="object")
+
+def _docID(value):
+	"""
+	One Firestore document ID: anything else makes collection.document() raise or address
+	another path ("a/b" a subcollection doc, "" the collection itself).
+	"""
+	if not isinstance(value, str):
+		return [((), f"expected str, got {_typeName(value)}")]
+	if not value or "/" in value or value in (".", "..") or (value.startswith("__") and value.endswith("__")):
+		return [((), f"not a document ID: {value!r}")]
+	if len(value.encode("utf-8")) > 1500:
+		return [((), "document ID longer than 1500 bytes")]
+	return None
+
+DocID = _docID
+
+def _each(item, pairs):
+	"""
+	Errors from item over (key, value) pairs, None when all pass.
+	"""
+	exact = getattr(item, "exact", None)
+	errors = None
+	for k, v in pairs:
+		if exact is not None and type(v) in exact:
+			continue
+		e = item(v)
+		if e:
+			errors = (errors or []) + _prefix(k, e)
+	return errors
+
+def listOf(item):
+	"""
+	List whose every element passes item.
+	"""
+	def check(value):
+		if not isinstance(value, list):
+			return [((), f"expected list, got {_typeName(value)}")]
+		return _each(item, enumerate(value))
+
+	return check
+
+def mapOf(item):
+	"""
+	Object with arbitrary keys whose every value passes item.
+	"""
+	def check(value):
+		if not isinstance(value, dict):
+			return [((), f"expected object, got {_typeName(value)}")]
+		return _each(item, value.items())
+
+	return check
+
+def obj(fields, required=(), rules=()):
+	"""
+	Object whose listed fields pass their checks (extra keys are allowed).
+	required names fields that must be present; rules are cross-field
+	rule(value) -> errors|None checks run only once every field is well typed.
+	"""
+	fieldChecks = tuple((name, check, getattr(check, "exact", None)) for name, check in fields.items())
+	required = tuple(required)
+	rules = tuple(rules)
+
+	def check(value):
+		if not isinstance(value, dict):
+			return [((), f"expected object, got {_typeName(value)}")]
+		errors = None
+		for name in required:
+			if name not in value:
+				errors = (errors or []) + [((name,), "missing")]
+		for name, fieldCheck, exact in fieldChecks:
+			v = value.get(name, _missing)
+			if v is _missing or (exact is not None and type(v) in exact):
+				continue
+			e = fieldCheck(v)
+			if e:
+				errors = (errors or []) + _prefix(name, e)
+		if errors:
+			return errors
+		for rule in rules:
+			e = rule(value)
+			if e:
+				errors = (errors or []) + e
+		return errors
+
+	return check
+
+def nonEmpty(check):
+	"""
+	check plus rejecting empty values.
+	"""
+	def wrapped(value):
+		if not value:
+			return [((), "must be non-empty")]
+		return check(value)
+
+	return wrapped
+
+def compileSchema(check):
+	"""
+	validate(value) -> [{"path", "message"}, ...] for the root check.
+	"""
+	def validate(value):
+		errors = check(value)
+		if not errors:
+			return []
+		return [{"path": ".".join(str(p) for p in path), "message": message} for path, message in errors]
+
+	return validate
+
+def describeErrors(errors):
+	""" One line per error for logs """
+	return "\n".join(f" {e['path'] or '<root>'}: {e['message']}" for e in errors)
+
+# region COMPOSITE
+
+_flags = obj({
+	"form": Bool,
+	"event": Bool,
+	"completion": Bool,
+	"schedules": mapOf(Bool),
+}, required=("form", "event", "completion", "schedules"))
+
+def _scheduleKeysAlign(payload):
+	scheds = payload.get("schedules", {})
+	errors = None
+	for name in ("dirty", "toDelete"):
+		flags = payload[name]["schedules"]
+		if flags.keys() != scheds.keys():
+			ids, schedIDs = sorted(flags), sorted(scheds)
+			errors = (errors or []) + [(
+				(name, "schedules"),
+				f"scheduleIDs ({', '.join(ids)}) don't match schedules ({', '.join(schedIDs)})",
+			)]
+	return errors
+
+def _completionAligned(payload):
+	event = payload.get("event", {})
+	comp = payload.get("completion", {})
+	dirty, toDelete = payload["dirty"], payload["toDelete"]
+
+	errors = []
+	touchCompletion = dirty["completion"] or toDelete["completion"]
+	if touchCompletion and not comp.get("_id"):
+		errors.append((("completion", "_id"), "missing while completion is touched"))
+	if toDelete["event"] != toDelete["completion"]:
+		errors.append((("toDelete",), "event and completion deletes must match"))
+
+	if bool(event.get("completionID")) or touchCompletion:
+		if event.get("scheduleID") != comp.get("scheduleID"):
+			errors.append((("completion", "scheduleID"), "differs from event.scheduleID"))
+		if event.get("completionID") != comp.get("_id"):
+			errors.append((
+				("event", "completionID"),
+				f"incorrect completionID true({comp.get('_id')}) != joinID({event.get('completionID')})",
+			))
+		if comp.get("eventID") != event.get("_id"):
+			errors.append((
+				("completion", "eventID"),
+				f"incorrect eventID true({event.get('_id')}) != joinID({comp.get('eventID')})",
+			))
+	return errors
+
+validateComposite = compileSchema(obj({
+	"form": AnyDict,
+	"event": AnyDict,
+	"completion": AnyDict,
+	"schedules": mapOf(AnyDict),
+	"dirty": _flags,
+	"toDelete": _flags,
+}, required=("dirty", "toDelete"), rules=(_scheduleKeysAlign, _completionAligned)))
+
+# endregion
+
+# region CHECKLIST
+
+_checklistFields = {
+	"title": Str,
+	"note": Str,
+	"formID": OptStr,
+	"participants": listOf(Str),
+	"active": Bool,
+	"priority": OptInt,
+	"updatedAt": OptStr,
+}
+
+_checklistNew = nonEmpty(obj(_checklistFields, required=("title",)))
+_checklistUpdate = nonEmpty(obj(_checklistFields))
+
+validateChecklistNew = compileSchema(_checklistNew)
+validateChecklistUpdate = compileSchema(_checklistUpdate)
+
+# op -> (payload key, payload check); every op but add also needs _id
+_bulkOps = {
+	"add": ("item", _checklistNew),
+	"update": ("changes", _checklistUpdate),
+	"delete": (None, None),
+}
+
+def _bulkOpShape(op):
+	spec = _bulkOps.get(op["op"])
+	if spec is None:
+		return [(("op",), f"expected one of {', '.join(_bulkOps)}, got {op['op']!r}")]
+	key, check = spec
+	errors = None
+	if op["op"] != "add" and "_id" not in op:
+		errors = [(("_id",), "missing")]
+	if key is not None:
+		payload = op.get(key, _missing)
+		e = [((), "missing")] if payload is _missing else check(payload)
+		if e:
+			errors = (errors or []) + _prefix(key, e)
+	return errors
+
+validateChecklistBulk = compileSchema(obj({
+	"ops": nonEmpty(listOf(obj({"op": Str, "_id": DocID}, required=("op",), rules=(_bulkOpShape,)))),
+}, required=("ops",)))
+
+# endregion
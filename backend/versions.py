@@ -0,0 +1,57 @@
+# backend/versions.py
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from google.cloud import firestore as gcf
+from backend.firebase import usersCo
+
+def bumpVersions(batch, uIDs, collections):
+	"""
+	Queue +1 on each user's change version for collections in batch,
+	so the bump lands atomically with the writes it describes.
+	"""
+	if not collections:
+		return
+	for uID in {u for u in uIDs if isinstance(u, str) and u}:
+		batch.set(usersCo.document(uID), {
+			"versions": {c: gcf.Increment(1) for c in collections}
+		}, merge=True)
+
+def getVersions(uID):
+	""" Current change versions for uID, 0 for collections never written """
+	doc = usersCo.document(uID).get()
+	return (doc.to_dict() or {}).get("versions", {}) if doc.exists else {}
+
+def versionTag(uID, collections):
+	"""
+	ETag for this request: user, collection versions, path and query string.
+	"""
+	versions = getVersions(uID)
+	key = "|".join([uID, *(f"{c}:{versions.get(c, 0)}" for c in collections), request.path, request.query_string.decode()])
+	return hashlib.sha1(key.encode()).hexdigest()
+
+def versioned(*collections):
+	"""
+	Conditional GET for routes whose body only changes when collections do.
+	Answers If-None-Match with 304 before the route queries anything.
+	Place below handleFirebaseAuth.
+	"""
+	def decorator(f):
+
+		@wraps(f)
+		def wrapper(uID, *args, **kwargs):
+			tag = versionTag(uID, collections)
+			if request.if_none_match.contains(tag):
+				response = make_response("", 304)
+			else:
+				response = make_response(f(uID, *args, **kwargs))
+				if response.status_code != 200:
+					return response
+			response.set_etag(tag)
+			response.cache_control.private = True
+			response.cache_control.no_cache = True # always revalidate
+			return response
+
+		return wrapper
+
+	return decorator
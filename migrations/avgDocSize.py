@@ -1,50 +1,208 @@
-# pseudoUTCtoUTC.py
+# avgDocSize.py
+"""
+Streaming document-size profile of each collection, read-only.
+
+Sizes follow Firestore's storage size formula (cloud.google.com/firestore/docs/storage-size):
+document name + fields + 32 bytes, where a string is its UTF-8 length + 1, a timestamp,
+integer or float 8, a bool or null 1, a geo point 16, a reference its document name, and
+arrays and maps the sum of their entries (map keys sized as strings).
+
+Per collection it logs count/avg/min/max and p50/p90/p99 from a fixed-size log histogram,
+each top-level field's share of the bytes (plus which value types they hold), the TOP_N
+largest docs and the TOP_N owners by total bytes. Memory is constant per collection apart
+from the per-owner totals, which grow with the user count rather than the doc count.
+
+	MIGRATE_SAMPLE=0.1 python migrations/avgDocSize.py # read ~10% of each collection
+"""
 import os
-import json
-import logging
-from datetime import datetime, timezone, timedelta
+import heapq
+import math
+from collections import Counter
+from datetime import datetime
 from ensureApp import ensure_app
 from helpers import _makeLogger
+from partitions import scanCollection
 from firebase_admin import firestore
-from zoneinfo import ZoneInfo
-from google.cloud import firestore as gcf  # DELETE_FIELD sentinel
+from google.cloud.firestore_v1 import GeoPoint
+from google.cloud.firestore_v1.base_document import BaseDocumentReference
 
 logger = _makeLogger(__file__, True)
-BATCH_LIMIT = 400
-
-def estimateSize(obj):
-	""" Returns dict size in KB """
-	try:
-		return len(json.dumps(obj, default=str).encode("utf-8")) / 1024
-	except Exception as e:
-		logger.warning(f"Failed to estimate size of {type(obj)}: {e}")
+
+COLLECTIONS = ["events", "completions", "forms", "schedules"]
+SAMPLE = float(os.getenv("MIGRATE_SAMPLE", 1))
+TOP_N = int(os.getenv("MIGRATE_TOP_N", 10))
+MAX_FIELDS = 200 # distinct top-level fields tracked before the rest fold into "(other)"
+
+# Histogram buckets: 8 per doubling from 16 B up past Firestore's 1 MiB doc limit, ~9% wide
+_bucketsPerDoubling = 8
+_minBucket = 16
+_numBuckets = _bucketsPerDoubling * 17 + 1
+
+# region SIZES
+
+def nameSize(path):
+	""" Document name: each collection and document ID in the path as a string, + 16 """
+	return sum(len(part.encode("utf-8")) + 1 for part in path.split("/")) + 16
+
+def valueSize(value):
+	if value is None or isinstance(value, bool):
+		return 1
+	if isinstance(value, (int, float, datetime)):
+		return 8
+	if isinstance(value, str):
+		return len(value.encode("utf-8")) + 1
+	if isinstance(value, bytes):
+		return len(value)
+	if isinstance(value, dict):
+		return sum(len(k.encode("utf-8")) + 1 + valueSize(v) for k, v in value.items())
+	if isinstance(value, (list, tuple)):
+		return sum(valueSize(v) for v in value)
+	if isinstance(value, GeoPoint):
+		return 16
+	if isinstance(value, BaseDocumentReference):
+		return nameSize(value.path)
+	return valueSize(str(value))
+
+def valueKind(value):
+	if value is None:
+		return "null"
+	if isinstance(value, datetime):
+		return "timestamp"
+	if isinstance(value, dict):
+		return "map"
+	if isinstance(value, (list, tuple)):
+		return "array"
+	return type(value).__name__
+
+def docSizes(path, data):
+	""" (total bytes, {top-level field: bytes of name + value}) """
+	fields = {k: len(k.encode("utf-8")) + 1 + valueSize(v) for k, v in data.items()}
+	return nameSize(path) + 32 + sum(fields.values()), fields
+
+# endregion
+
+# region PROFILE
+
+def _bucket(size):
+	if size <= _minBucket:
 		return 0
+	return min(_numBuckets - 1, 1 + int(math.log2(size / _minBucket) * _bucketsPerDoubling))
+
+def _bucketBounds(i):
+	if i == 0:
+		return 0, _minBucket
+	return _minBucket * 2 ** ((i - 1) / _bucketsPerDoubling), _minBucket * 2 ** (i / _bucketsPerDoubling)
+
+class SizeProfile:
+	"""
+	Mergeable per-collection accumulator for partitions.scanCollection.
+	"""
+	def __init__(self):
+		self.count = 0
+		self.total = 0
+		self.min = None
+		self.max = None
+		self.histogram = [0] * _numBuckets
+		self.fieldBytes = Counter()
+		self.fieldDocs = Counter()
+		self.kindBytes = Counter()
+		self.ownerBytes = Counter()
+		self.ownerDocs = Counter()
+		self.largest = [] # min-heap of (bytes, docID, ownerID), TOP_N long
+
+	def add(self, snap):
+		data = snap.to_dict() or {}
+		size, fields = docSizes(snap.reference.path, data)
+
+		self.count += 1
+		self.total += size
+		self.min = size if self.min is None else min(self.min, size)
+		self.max = size if self.max is None else max(self.max, size)
+		self.histogram[_bucket(size)] += 1
+
+		self.fieldBytes["(name+overhead)"] += size - sum(fields.values())
+		for k, n in fields.items():
+			key = k if k in self.fieldBytes or len(self.fieldBytes) < MAX_FIELDS else "(other)"
+			self.fieldBytes[key] += n
+			self.fieldDocs[key] += 1
+			self.kindBytes[valueKind(data[k])] += n
+
+		owner = data.get("ownerID") or "(none)"
+		self.ownerBytes[owner] += size
+		self.ownerDocs[owner] += 1
+
+		entry = (size, snap.id, owner)
+		if len(self.largest) < TOP_N:
+			heapq.heappush(self.largest, entry)
+		elif entry > self.largest[0]:
+			heapq.heapreplace(self.largest, entry)
+
+	def merge(self, other):
+		self.count += other.count
+		self.total += other.total
+		for k, pick in (("min", min), ("max", max)):
+			mine, theirs = getattr(self, k), getattr(other, k)
+			setattr(self, k, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+		self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+		for k in ("fieldBytes", "fieldDocs", "kindBytes", "ownerBytes", "ownerDocs"):
+			getattr(self, k).update(getattr(other, k))
+		self.largest = heapq.nlargest(TOP_N, self.largest + other.largest)
+		heapq.heapify(self.largest)
+
+	def percentile(self, p):
+		""" Interpolated within the histogram bucket, clamped to the exact min/max """
+		if not self.count:
+			return 0
+		rank = p / 100 * self.count
+		seen = 0
+		for i, n in enumerate(self.histogram):
+			if n and seen + n >= rank:
+				lo, hi = _bucketBounds(i)
+				value = lo + (hi - lo) * (rank - seen) / n
+				return min(max(value, self.min), self.max)
+			seen += n
+		return self.max
+
+# endregion
+
+def _kb(n):
+	return f"{n / 1024:.2f} KB"
 
-def analyzeCollection(db, name):
-	docs = list(db.collection(name).stream())
+def analyzeCollection(db, name, sample=SAMPLE):
+	profile, counts = scanCollection(db.collection(name), SizeProfile, db=db, sample=sample, logger=logger)
 
-	sizes = []
-	for i in range(0, len(docs), BATCH_LIMIT):
-		chunk = docs[i:i+BATCH_LIMIT]
-		for snap in chunk:
-			size = estimateSize(snap.to_dict() or {})
-			sizes.append(size)
+	if not profile.count:
+		logger.info(f"Collection '{name}' is empty")
+		return profile
 
-	avg = sum(sizes) / len(sizes)
+	scale = counts["ranges"] / max(counts["rangesScanned"], 1)
+	lines = [
+		f"Collection '{name}'",
+		f"{profile.count} docs ({counts['errors']} errors, {counts['failedPartitions']} failed ranges)"
+		+ (f", sampled {counts['rangesScanned']}/{counts['ranges']} ranges: ~{profile.count * scale:.0f} docs, ~{_kb(profile.total * scale)} total" if scale > 1 else f", {_kb(profile.total)} total"),
+		f"avg: {_kb(profile.total / profile.count)}  min: {_kb(profile.min)}  max: {_kb(profile.max)}",
+		f"p50: {_kb(profile.percentile(50))}  p90: {_kb(profile.percentile(90))}  p99: {_kb(profile.percentile(99))}",
+		"fields (share of bytes, avg per doc that has it):",
+	]
+	for field, n in profile.fieldBytes.most_common():
+		docs = profile.fieldDocs.get(field) or profile.count
+		lines.append(f"\t{field:24} {100 * n / profile.total:5.1f}%  {n / docs:8.0f} B")
+	lines.append("value types: " + "  ".join(f"{kind} {100 * n / profile.total:.1f}%" for kind, n in profile.kindBytes.most_common()))
+	lines.append(f"largest {len(profile.largest)} docs:")
+	for size, docID, owner in sorted(profile.largest, reverse=True):
+		lines.append(f"\t{docID} (owner {owner}) {_kb(size)}")
+	lines.append(f"top {TOP_N} owners by bytes:")
+	for owner, n in profile.ownerBytes.most_common(TOP_N):
+		lines.append(f"\t{owner} {_kb(n)} over {profile.ownerDocs[owner]} docs")
 
-	logger.info(
-		f"Collection '{name}'"
-		f"\n{len(sizes)} docs"
-		f"\navg: {avg:.4f} KB"
-		f"\nmin={min(sizes)} KB"
-		f"\nmax={max(sizes)} KB"
-	)
+	logger.info("\n".join(lines))
+	return profile
 
 def run():
 	ensure_app()
 	db = firestore.client()
-	for colName in ["events", "completions", "forms", "schedules"]:
+	for colName in COLLECTIONS:
 		analyzeCollection(db, colName)
 
 if __name__ == "__main__":
-	run()
\ No newline at end of file
+	run()
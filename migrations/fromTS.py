@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import Optional
 
 from ensureApp import ensure_app  # adjust to `ensure_app` if your module is named ensure_app.py
+from partitions import runPartitioned
 from firebase_admin import firestore
 
 # ---------- logging: file-only ----------
@@ -24,19 +25,39 @@ if not any(isinstance(h, logging.FileHandler) and getattr(h, "baseFilename", Non
 	logger.addHandler(fh)
 # ----------------------------------------
 
-BATCH_LIMIT = 400  # keep under 500 write limit
+ts_keys = ["startStamp", "endStamp", "until", "scheduleStart"]
 
-def run(applyChanges: bool):
+def transform(snap, stats):
 	"""
-	Promote <key>TS -> <key> for:
-		keys: startStamp, endStamp, until, scheduleStart
+	Per-doc transform: promote <key>TS -> <key>.
 	Does NOT delete the *TS fields (keeps them as a safety net).
 	"""
+	data = snap.to_dict() or {}
+
+	out = {}
+	for k in ts_keys:
+		ts_field = f"{k}TS"
+		if ts_field in data:
+			val = data.get(ts_field)
+			if isinstance(val, datetime):
+				# always set canonical to the TS value
+				out[k] = val
+				stats["moved"] += 1
+			else:
+				# present but not a datetime -> log and count
+				stats["missing_or_bad_ts"] += 1
+
+	# set only; do NOT delete *TS
+	return out
+
+def run(applyChanges: bool):
+	"""
+	Run the fromTS transform over events and schedules, partitioned by document ID and checkpointed.
+	"""
 	ensure_app()
 	db = firestore.client()
 
 	owner_id = os.getenv("MIGRATE_OWNER_ID") or None
-	ts_keys = ["startStamp", "endStamp", "until", "scheduleStart"]
 
 	collections = (
 		("events", db.collection("events")),
@@ -45,44 +66,9 @@ def run(applyChanges: bool):
 
 	for name, col in collections:
 		q = col.where("ownerID", "==", owner_id) if owner_id else col
-		docs = list(q.stream())
-		num_docs = len(docs)
-		logger.info(f"[toTS] {name}: total_docs={num_docs} mode={'APPLY' if applyChanges else 'DRY-RUN'} owner={owner_id!r}")
-
-		touched = moved = missing_or_bad = 0
-		i = 0
-		while i < num_docs:
-			chunk = docs[i:i + BATCH_LIMIT]
-			batch = db.batch() if applyChanges else None
-
-			for snap in chunk:
-				data = snap.to_dict() or {}
-				touched += 1
-
-				out = {}
-				for k in ts_keys:
-					ts_field = f"{k}TS"
-					if ts_field in data:
-						val = data.get(ts_field)
-						if isinstance(val, datetime):
-							# always set canonical to the TS value
-							out[k] = val
-							moved += 1
-						else:
-							# present but not a datetime -> log and count
-							missing_or_bad += 1
-
-				if out and applyChanges:
-					# set only; do NOT delete *TS
-					batch.set(snap.reference, out, merge=True)
-
-			if applyChanges:
-				batch.commit()
-				logger.info(f"[toTS] {name}: committed batch size={len(chunk)}")
-
-			i += len(chunk)
-
-		logger.info(f"[toTS] {name}: touched={touched} moved={moved} missing_or_bad_ts={missing_or_bad}")
+		logger.info(f"[fromTS] {name}: mode={'APPLY' if applyChanges else 'DRY-RUN'} owner={owner_id!r}")
+		stats = runPartitioned(db, f"fromTS.{name}.{owner_id or 'all'}", col, transform, apply=applyChanges, query=q, logger=logger)
+		logger.info(f"[fromTS] {name}: touched={stats['checked']} moved={stats['moved']} missing_or_bad_ts={stats['missing_or_bad_ts']}")
 
 if __name__ == "__main__":
 	applyChanges = os.getenv("APPLY", "0") == "1"  # 0=dry-run, 1=apply
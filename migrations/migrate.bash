@@ -45,6 +45,13 @@ esac
 
 export FIREBASE_ADMIN_JSON="$(jq -c . < /home/garritr01/Documents/portiaApp/auth/firebaseAdmin.json)" # creds
 export APPLY="$mode" # mode
+
+# runs checkpoint to migrations/logs/checkpoints and resume where they stopped
+read -rp "Discard checkpoints and start over? [y/N] " restart
+case "$restart" in
+  [Yy]*) export MIGRATE_RESTART=1 ;;
+  *)     export MIGRATE_RESTART=0 ;;
+esac
 DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)" # src file parent
 
 case "$migration" in
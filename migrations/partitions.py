@@ -0,0 +1,187 @@
+# partitions.py
+"""
+Split a collection into document ID ranges and work through them in parallel.
+
+	from partitions import runPartitioned, scanCollection
+	stats = runPartitioned(db, "toTS.events", db.collection("events"), transform, apply=True)
+	sizes, counts = scanCollection(db.collection("forms"), SizeStats)
+
+Split points come from a Firestore partition query (collection_group(...).get_partitions),
+falling back to even ranges over the auto-ID alphabet when the client can't partition.
+Each range is [lo, hi) on __name__, so any split points cover the collection exactly once.
+Workers are threads: scans are bound by Firestore round trips, which release the GIL.
+
+runPartitioned runs each range through runner.runMigration with its own checkpoint, and
+saves the split points as <name>.plan so a resumed run reuses the same ranges. Each worker
+thread writes through one WriteEngine for every range it runs (a BulkWriter isn't safe to
+share between threads), so its 500/50/5 ramp keeps climbing across ranges instead of
+restarting at each one; the workers' engines split that budget between them.
+"""
+import os
+import math
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core import exceptions
+from helpers import _makeLogger
+from runner import runMigration, iterPages, loadCheckpoint, saveCheckpoint, clearCheckpoint, PAGE_SIZE
+from writer import WriteEngine
+
+WORKERS = int(os.getenv("MIGRATE_WORKERS", os.cpu_count() or 4))
+PARTITIONS = int(os.getenv("MIGRATE_PARTITIONS", WORKERS * 4)) # more ranges than workers evens out skew
+
+# Firestore auto-ID characters in byte (== document ID) order
+_autoIDChars = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+logger = _makeLogger(__file__)
+
+def keyRangeSplits(count):
+	""" count - 1 split points spread evenly over two-character auto-ID prefixes """
+	base = len(_autoIDChars)
+	splits = []
+	for i in range(1, count):
+		n = i * base * base // count
+		split = _autoIDChars[n // base] + _autoIDChars[n % base]
+		if not splits or splits[-1] != split:
+			splits.append(split)
+	return splits
+
+def partitionSplits(db, name, count):
+	"""
+	Sorted document ID split points for up to count ranges of collection name.
+	"""
+	if count <= 1:
+		return []
+	try:
+		parts = db.collection_group(name).get_partitions(count - 1)
+		splits = sorted({p.end_at.id for p in parts if p.end_at is not None})
+		logger.info(f"[{name}] partition query returned {len(splits) + 1} ranges")
+		return splits
+	except (AttributeError, NotImplementedError, exceptions.GoogleAPICallError) as e:
+		logger.info(f"[{name}] partition query unavailable ({type(e).__name__}), splitting on auto-ID prefixes")
+		return keyRangeSplits(count)
+
+def ranges(splits):
+	""" [(lo, hi)] covering every ID, None for an open end """
+	bounds = [None, *splits, None]
+	return list(zip(bounds[:-1], bounds[1:]))
+
+def rangeQuery(col, query, lo, hi):
+	""" query narrowed to lo <= ID < hi, both given as document IDs of col """
+	if lo is not None:
+		query = query.where("__name__", ">=", col.document(lo))
+	if hi is not None:
+		query = query.where("__name__", "<", col.document(hi))
+	return query
+
+def _pool(items, work, workers):
+	""" [(item, result or None, error or None)] for work(item) across a thread pool """
+	def guarded(item):
+		try:
+			return item, work(item), None
+		except Exception as e:
+			return item, None, e
+
+	with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as pool:
+		return list(pool.map(guarded, items))
+
+def runPartitioned(
+	db, name, col, transform, apply=False, query=None,
+	partitions=PARTITIONS, workers=WORKERS, pageSize=PAGE_SIZE, restart=None, logger=logger,
+):
+	"""
+	runMigration over each ID range of col (narrowing query, col by default) in a worker pool.
+	Returns the merged stats Counter; a range that failed counts under failedPartitions
+	and resumes from its checkpoint on the next run.
+	"""
+	if restart is None:
+		restart = os.getenv("MIGRATE_RESTART", "0") == "1"
+	query = col if query is None else query
+	planName = f"{name}.plan" if apply else f"{name}.dry.plan"
+	if restart:
+		clearCheckpoint(planName)
+
+	plan = loadCheckpoint(planName)
+	if plan is None:
+		plan = {"splits": partitionSplits(db, col.id, partitions)}
+		saveCheckpoint(planName, plan)
+	parts = ranges(plan["splits"])
+	share = min(workers, len(parts))
+	logger.info(f"[{name}] {len(parts)} ranges over {share} workers")
+
+	local, engines, engineLock = threading.local(), [], threading.Lock()
+
+	def workerEngine():
+		""" This worker thread's WriteEngine, made on its first range """
+		engine = getattr(local, "engine", None)
+		if engine is None and apply:
+			with engineLock:
+				engine = local.engine = WriteEngine(db, f"{name}.w{len(engines)}", share=share, logger=logger)
+				engines.append(engine)
+		return engine
+
+	def work(i):
+		lo, hi = parts[i]
+		return runMigration(
+			db, f"{name}.p{i:03d}", rangeQuery(col, query, lo, hi), transform,
+			apply=apply, pageSize=pageSize, restart=restart, engine=workerEngine(), logger=logger,
+		)
+
+	stats = Counter()
+	try:
+		for i, result, error in _pool(range(len(parts)), work, workers):
+			if error is not None:
+				stats["failedPartitions"] += 1
+				logger.error(f"[{name}] range {i} {parts[i]} failed, rerun to resume it: {error}")
+				continue
+			stats.update(result)
+	finally:
+		for engine in engines:
+			engine.close()
+	logger.info(f"[{name}] merged: " + " ".join(f"{k}={v}" for k, v in sorted(stats.items())))
+	return stats
+
+def scanCollection(
+	col, newAccumulator, query=None, db=None,
+	partitions=PARTITIONS, workers=WORKERS, pageSize=PAGE_SIZE, sample=1.0, seed=0, logger=logger,
+):
+	"""
+	Read-only pass over every doc of col (or query) across ID ranges, no checkpoints.
+	newAccumulator() makes one per range, with add(snap) and merge(other); the merged one is
+	returned with a Counter of checked docs, errors, failedPartitions, ranges and rangesScanned.
+
+	sample < 1 splits into proportionally more ranges and reads a seeded random share of them,
+	so reads drop with the rate. Document IDs are random, so sampled ranges are a fair sample
+	and totals scale by ranges / rangesScanned.
+	"""
+	query = col if query is None else query
+	if sample < 1:
+		partitions = math.ceil(partitions / max(sample, 1e-6))
+	parts = ranges(partitionSplits(db or col._client, col.id, partitions))
+	total = len(parts)
+	if sample < 1:
+		rng = random.Random(seed)
+		parts = [part for part in parts if rng.random() < sample] or [rng.choice(parts)]
+
+	def work(part):
+		acc, counts = newAccumulator(), Counter()
+		for page in iterPages(rangeQuery(col, query, *part), pageSize):
+			for snap in page:
+				counts["checked"] += 1
+				try:
+					acc.add(snap)
+				except Exception as e:
+					counts["errors"] += 1
+					logger.warning(f"[{col.id}] {snap.id} failed: {e}")
+		return acc, counts
+
+	merged, counts = newAccumulator(), Counter(ranges=total, rangesScanned=len(parts))
+	for part, result, error in _pool(parts, work, workers):
+		if error is not None:
+			counts["failedPartitions"] += 1
+			logger.error(f"[{col.id}] range {part} failed: {error}")
+			continue
+		merged.merge(result[0])
+		counts.update(result[1])
+	return merged, counts
@@ -0,0 +1,156 @@
+# runner.py
+"""
+Shared runner for per-document migrations.
+
+	from runner import runMigration
+	runMigration(db, "toTS.events", db.collection("events"), transform, apply=True)
+
+transform(snap, stats) gets each document's snapshot and a Counter to tally into, and
+returns a dict of field updates (applied as updates, so DELETE_FIELD and dotted paths work)
+or None to leave the doc alone.
+
+The collection is read one page at a time, ordered by document ID with a cursor query, so
+memory stays at one page however big the collection gets. Each page's updates go through a
+writer.WriteEngine, and once they're flushed the last document ID and the running stats are
+written to logs/checkpoints/<name>.json. A rerun with the same name resumes after that ID; a finished
+run is skipped until restart=True (MIGRATE_RESTART=1) discards the checkpoint.
+
+A crash between a flush and its checkpoint replays that one page, so transforms must be
+idempotent: rerunning them on an already migrated doc should return None. Writes that still
+fail after the engine's retries are counted under failed and not revisited.
+"""
+import os
+import json
+import time
+from collections import Counter
+from helpers import _makeLogger
+from writer import WriteEngine
+
+PAGE_SIZE = int(os.getenv("MIGRATE_PAGE_SIZE", 400))
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "checkpoints")
+
+logger = _makeLogger(__file__)
+
+def checkpointPath(name):
+	return os.path.join(CHECKPOINT_DIR, f"{name}.json")
+
+def loadCheckpoint(name):
+	""" Saved progress for name, None when there's none """
+	try:
+		with open(checkpointPath(name), encoding="utf-8") as f:
+			return json.load(f)
+	except FileNotFoundError:
+		return None
+
+def saveCheckpoint(name, state):
+	""" Write-then-rename, so a crash mid-write leaves the previous checkpoint intact """
+	os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+	path = checkpointPath(name)
+	tmp = path + ".tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(state, f, indent=1)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(tmp, path)
+
+def clearCheckpoint(name):
+	try:
+		os.remove(checkpointPath(name))
+	except FileNotFoundError:
+		pass
+
+def iterPages(query, pageSize=PAGE_SIZE, afterID=None):
+	"""
+	Yield lists of up to pageSize snapshots from query in document ID order, starting after afterID.
+	"""
+	while True:
+		q = query.order_by("__name__").limit(pageSize)
+		if afterID is not None:
+			q = q.start_after({"__name__": afterID})
+		page = list(q.stream())
+		if not page:
+			return
+		yield page
+		if len(page) < pageSize:
+			return
+		afterID = page[-1].id
+
+def _writeStats(engine, since):
+	"""
+	The engine's written/retried/failed counts since the since snapshot of its stats,
+	prefixed so they don't collide with a transform's
+	"""
+	if engine is None:
+		return {}
+	return {f"writes.{k}": v for k, v in (engine.stats - since).items() if k != "queued"}
+
+def runMigration(
+	db, name, query, transform, apply=False, pageSize=PAGE_SIZE, restart=None, share=1, engine=None, logger=logger,
+):
+	"""
+	Run transform over every doc of query, checkpointing under name after each flushed page.
+	Dry runs (apply=False) call transform and count but never write; they checkpoint separately.
+	Writes go through engine when given (left open for the caller's next run, so its ramp
+	carries on), else through a WriteEngine of their own; share is how many runs write side
+	by side (see WriteEngine). Progress goes to logger (the calling migration's). Returns
+	the final stats Counter.
+	"""
+	if restart is None:
+		restart = os.getenv("MIGRATE_RESTART", "0") == "1"
+	name = name if apply else f"{name}.dry"
+	if restart:
+		clearCheckpoint(name)
+
+	state = loadCheckpoint(name) or {"lastID": None, "pages": 0, "stats": {}, "done": False}
+	if state["done"]:
+		logger.info(f"[{name}] already finished at {state['lastID']!r}, set MIGRATE_RESTART=1 to run again")
+		return Counter(state["stats"])
+
+	stats = Counter(state["stats"])
+	if state["lastID"] is not None:
+		logger.info(f"[{name}] resuming after {state['lastID']!r} ({stats['checked']} docs checked so far)")
+	else:
+		logger.info(f"[{name}] starting, mode={'APPLY' if apply else 'DRY-RUN'} pageSize={pageSize}")
+
+	began = time.perf_counter()
+	engine = engine if apply else None
+	ownEngine = apply and engine is None
+	if ownEngine:
+		engine = WriteEngine(db, name, share=share, logger=logger)
+	since = Counter(engine.stats) if engine is not None else Counter()
+	try:
+		for page in iterPages(query, pageSize, state["lastID"]):
+			pending = 0
+			for snap in page:
+				stats["checked"] += 1
+				try:
+					updates = transform(snap, stats)
+				except Exception as e:
+					stats["errors"] += 1
+					logger.warning(f"[{name}] {snap.id} failed: {e}")
+					continue
+				if not updates:
+					continue
+				stats["changed"] += 1
+				if apply:
+					engine.update(snap.reference, updates)
+					pending += 1
+
+			if pending:
+				engine.flush()
+			state.update(lastID=page[-1].id, pages=state["pages"] + 1, stats=dict(stats + Counter(_writeStats(engine, since))))
+			saveCheckpoint(name, state)
+			logger.info(f"[{name}] page {state['pages']}: through {page[-1].id!r}, wrote {pending}")
+	finally:
+		if ownEngine:
+			engine.close()
+		elif engine is not None:
+			engine.flush()
+	stats.update(_writeStats(engine, since))
+	state.update(done=True, stats=dict(stats))
+	saveCheckpoint(name, state)
+	logger.info(
+		f"[{name}] done in {time.perf_counter() - began:.1f}s: "
+		+ " ".join(f"{k}={v}" for k, v in sorted(stats.items()))
+	)
+	return stats
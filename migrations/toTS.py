@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from typing import Optional, Tuple
 
 from ensureApp import ensure_app  # keep your module name
+from partitions import runPartitioned
 from firebase_admin import firestore
 from google.cloud import firestore as gcf  # DELETE_FIELD sentinel
 
@@ -26,8 +27,6 @@ if not any(
 	logger.addHandler(fh)
 # ----------------------------------------
 
-BATCH_LIMIT = 400  # < 500
-
 def _parse_to_dt(v) -> Optional[datetime]:
 	if v is None:
 		return None
@@ -40,10 +39,47 @@ def _parse_to_dt(v) -> Optional[datetime]:
 			return None
 	return None
 
-def run(*, apply_changes: bool, owner_id: Optional[str]) -> Tuple[int, int, int]:
+def makeTransform(keys):
 	"""
-	Copy <key>TS -> <key>. If <key>TS missing, try parsing <key> string.
+	Per-doc transform: copy <key>TS -> <key>. If <key>TS missing, try parsing <key> string.
 	Also removes the corresponding *TS fields in the same write.
+	"""
+	def transform(s, stats):
+		d = s.to_dict() or {}
+
+		# Build the canonical updates...
+		out = {}
+		for k in keys:
+			ts_field = f"{k}TS"
+			val_ts = d.get(ts_field)
+
+			if isinstance(val_ts, datetime):
+				out[k] = val_ts
+				stats["canonical_set"] += 1
+			elif ts_field in d:
+				# TS present but wrong type
+				stats["skipped"] += 1
+			else:
+				# No TS; try to parse canonical string (self-heal)
+				v = d.get(k)
+				dt = _parse_to_dt(v)
+				if dt and dt != v:
+					out[k] = dt
+					stats["canonical_set"] += 1
+				elif v is not None and not dt:
+					stats["skipped"] += 1
+
+		# ...and the deletes for all *TS companions of keys we manage
+		del_map = {f"{k}TS": gcf.DELETE_FIELD for k in keys if f"{k}TS" in d}
+
+		# Applied with update so DELETE_FIELD is honored
+		return {**out, **del_map}
+
+	return transform
+
+def run(*, apply_changes: bool, owner_id: Optional[str]) -> Tuple[int, int, int]:
+	"""
+	Run the toTS transform over events and schedules, partitioned by document ID and checkpointed.
 	Returns (touched_docs, canonical_set_count, skipped).
 	"""
 	ensure_app()
@@ -58,59 +94,16 @@ def run(*, apply_changes: bool, owner_id: Optional[str]) -> Tuple[int, int, int]
 
 	for name, col, keys in work:
 		q = col.where("ownerID", "==", owner_id) if owner_id else col
-		snaps = list(q.stream())
-		logger.info(f"[toTS] {name}: docs={len(snaps)} mode={'APPLY' if apply_changes else 'DRY-RUN'} owner={owner_id!r}")
-
-		touched = set_count = skipped = 0
-
-		for i in range(0, len(snaps), BATCH_LIMIT):
-			chunk = snaps[i:i+BATCH_LIMIT]
-			batch = db.batch() if apply_changes else None
-			pending = 0
-
-			for s in chunk:
-				d = s.to_dict() or {}
-				touched += 1
-
-				# Build the canonical updates...
-				out = {}
-				for k in keys:
-					ts_field = f"{k}TS"
-					val_ts = d.get(ts_field)
-
-					if isinstance(val_ts, datetime):
-						out[k] = val_ts
-						set_count += 1
-					elif ts_field in d:
-						# TS present but wrong type
-						skipped += 1
-					else:
-						# No TS; try to parse canonical string (self-heal)
-						v = d.get(k)
-						dt = _parse_to_dt(v)
-						if dt:
-							out[k] = dt
-							set_count += 1
-						elif v is not None:
-							skipped += 1
-
-				# ...and the deletes for all *TS companions of keys we manage
-				del_map = {f"{k}TS": gcf.DELETE_FIELD for k in keys if f"{k}TS" in d}
-
-				if (out or del_map) and apply_changes:
-					# Use update so DELETE_FIELD is honored
-					payload = {**out, **del_map}
-					batch.update(s.reference, payload)
-					pending += 1
-
-			if apply_changes and pending:
-				batch.commit()
-				logger.info(f"[toTS] {name}: committed batch size={pending}")
-
-		logger.info(f"[toTS] {name}: touched={touched} canonical_set={set_count} skipped={skipped}")
-		touched_total += touched
-		set_count_total += set_count
-		skipped_total += skipped
+		logger.info(f"[toTS] {name}: mode={'APPLY' if apply_changes else 'DRY-RUN'} owner={owner_id!r}")
+		stats = runPartitioned(
+			db, f"toTS.{name}.{owner_id or 'all'}", col, makeTransform(keys),
+			apply=apply_changes, query=q, logger=logger,
+		)
+
+		logger.info(f"[toTS] {name}: touched={stats['checked']} canonical_set={stats['canonical_set']} skipped={stats['skipped']}")
+		touched_total += stats["checked"]
+		set_count_total += stats["canonical_set"]
+		skipped_total += stats["skipped"]
 
 	return touched_total, set_count_total, skipped_total
 
@@ -0,0 +1,137 @@
+# writer.py
+"""
+Write engine for migrations, on top of Firestore's BulkWriter.
+
+	engine = WriteEngine(db, "toTS.events")
+	engine.update(ref, {"startStamp": dt})
+	engine.flush() # blocks until every queued write landed or gave up
+
+BulkWriter sends 20-write batches from a thread pool, so several batches are in flight at
+once, and ramps with the 500/50/5 rule: 500 ops/s to start, +50% every 5 minutes of steady
+traffic, capped by MIGRATE_MAX_OPS when set. share splits that budget between engines running
+side by side (one per partition worker), so together they still ramp from 500.
+
+Writes are not atomic across documents. A write that fails with a contention or availability
+code is retried on its own with the SDK's backoff, up to MIGRATE_MAX_ATTEMPTS; anything else
+fails at once. Failures are logged and counted, never raised.
+"""
+import os
+import time
+import threading
+from collections import Counter
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, SendMode
+from helpers import _makeLogger
+
+MAX_OPS = int(os.getenv("MIGRATE_MAX_OPS", 0)) or None # None lets the ramp climb without a cap
+MAX_ATTEMPTS = int(os.getenv("MIGRATE_MAX_ATTEMPTS", 10))
+REPORT_SECONDS = float(os.getenv("MIGRATE_REPORT_SECONDS", 10))
+
+# gRPC codes worth retrying per document: DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED, ABORTED, INTERNAL, UNAVAILABLE
+retryableCodes = {4, 8, 10, 13, 14}
+
+logger = _makeLogger(__file__)
+
+class WriteEngine:
+	"""
+	BulkWriter with retry policy, counters and write-rate reporting. Counters: queued,
+	written, retried, failed.
+	"""
+	def __init__(self, db, name, share=1, maxOps=MAX_OPS, maxAttempts=MAX_ATTEMPTS, logger=logger):
+		self.name = name
+		self.maxAttempts = maxAttempts
+		self.logger = logger
+		self.stats = Counter()
+		self.failures = [] # (path, code, message), first 100
+		self.peakRate = 0.0
+
+		share = max(1, share)
+		self._writer = db.bulk_writer(options=BulkWriterOptions(
+			initial_ops_per_second=max(1, 500 // share),
+			max_ops_per_second=max(1, maxOps // share) if maxOps else None,
+			mode=SendMode.parallel,
+		))
+		self._writer.on_write_result(self._onResult)
+		self._writer.on_write_error(self._onError)
+
+		self._lock = threading.Lock() # callbacks run on the writer's threads
+		self._began = self._windowStart = time.monotonic()
+		self._windowWrites = 0
+
+	def create(self, reference, data):
+		self.stats["queued"] += 1
+		self._writer.create(reference, data)
+
+	def set(self, reference, data, merge=False):
+		self.stats["queued"] += 1
+		self._writer.set(reference, data, merge=merge)
+
+	def update(self, reference, updates):
+		self.stats["queued"] += 1
+		self._writer.update(reference, updates)
+
+	def delete(self, reference):
+		self.stats["queued"] += 1
+		self._writer.delete(reference)
+
+	def _onResult(self, reference, result, writer):
+		with self._lock:
+			self.stats["written"] += 1
+			self._windowWrites += 1
+			now = time.monotonic()
+			if now - self._windowStart >= REPORT_SECONDS:
+				self._report(now)
+
+	def _onError(self, failure, writer):
+		op = failure.operation
+		with self._lock:
+			if failure.code in retryableCodes and failure.attempts + 1 < self.maxAttempts:
+				self.stats["retried"] += 1
+				return True
+			self.stats["failed"] += 1
+			if len(self.failures) < 100:
+				self.failures.append((op.reference.path, failure.code, failure.message))
+		self.logger.warning(f"[{self.name}] write to {op.reference.path} failed after {failure.attempts + 1} attempts: {failure.code} {failure.message}")
+		return False
+
+	def _report(self, now):
+		""" Log the rate over the window that just ended; caller holds the lock """
+		rate = self._windowWrites / max(now - self._windowStart, 1e-9)
+		self.peakRate = max(self.peakRate, rate)
+		self.logger.info(f"[{self.name}] {rate:.0f} writes/s ({self.stats['written']} written, {self.stats['retried']} retried, {self.stats['failed']} failed)")
+		self._windowStart, self._windowWrites = now, 0
+
+	def _restartExecutor(self):
+		"""
+		BulkWriter.flush returns at once while the executor an earlier flush shut down is
+		still down, and that's only restarted when a full 20-write batch queues. Without this,
+		a page of fewer than 20 writes after the first flush was never sent, not even by close.
+		"""
+		restart = getattr(self._writer, "_ensure_executor", None)
+		if restart is not None:
+			restart()
+
+	def flush(self):
+		self._restartExecutor()
+		self._writer.flush()
+
+	def close(self):
+		""" Flush, stop the writer and log the overall rate. Returns stats """
+		self._restartExecutor()
+		self._writer.close()
+		with self._lock:
+			now = time.monotonic()
+			if self._windowWrites:
+				self._report(now)
+			elapsed = now - self._began
+		self.logger.info(
+			f"[{self.name}] {self.stats['written']} writes in {elapsed:.1f}s: "
+			f"avg {self.stats['written'] / max(elapsed, 1e-9):.0f}/s, peak {self.peakRate:.0f}/s, "
+			f"{self.stats['retried']} retried, {self.stats['failed']} failed"
+		)
+		return self.stats
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
@@ -0,0 +1,26 @@
+# tests/conftest.py
+"""
+Route tests run the app against the in-memory FakeClient, authenticated with stub tokens:
+
+	python -m pytest tests
+"""
+import os
+
+# Read by backend.config on import, so set before anything from backend loads
+os.environ.setdefault("FLASK_ENV", "development")
+os.environ.setdefault("AUTH_STUB", "1")
+
+import pytest
+from backend import createApp
+from backend.cache import _caches
+from backend.fakestore import FakeClient
+
+@pytest.fixture
+def store():
+	for cache in _caches:
+		cache.clear()
+	return FakeClient()
+
+@pytest.fixture
+def client(store):
+	return createApp(db=store).test_client()
@@ -0,0 +1,27 @@
+# tests/test_checklist.py
+import pytest
+
+owner, other = "ownerUser", "otherUser"
+
+def _headers(uID):
+	return {"Authorization": f"Bearer stub:{uID}"}
+
+@pytest.fixture
+def item(store):
+	store.load("checklist", {"item1": {"ownerID": owner, "participants": [owner], "title": "item", "active": True}})
+	return "item1"
+
+@pytest.mark.parametrize("body", [{"active": False}, {"active": "no"}, []])
+def test_update_checks_existence_and_ownership_before_the_body(client, item, body):
+	assert client.put("/checklist/missing", json=body, headers=_headers(owner)).status_code == 404
+	assert client.put(f"/checklist/{item}", json=body, headers=_headers(other)).status_code == 403
+
+def test_update_rejects_a_bad_body_from_the_owner(client, item):
+	r = client.put(f"/checklist/{item}", json={"active": "no"}, headers=_headers(owner))
+	assert r.status_code == 400
+	assert r.get_json()["errors"] == [{"path": "active", "message": "expected bool, got str"}]
+
+def test_update_keeps_the_owner(client, item):
+	r = client.put(f"/checklist/{item}", json={"active": False, "ownerID": other}, headers=_headers(owner))
+	assert r.status_code == 200
+	assert r.get_json()["ownerID"] == owner and r.get_json()["active"] is False
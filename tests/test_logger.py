@@ -0,0 +1,11 @@
+# tests/test_logger.py
+from backend.logger import getLogger, _pipeline
+
+def test_child_logger_record_is_queued_once(monkeypatch):
+	queued = []
+	monkeypatch.setattr(_pipeline(), "enqueue", queued.append)
+
+	getLogger("backend")
+	getLogger("backend.routes.example").info("one line")
+
+	assert [record.getMessage() for record in queued] == ["one line"]
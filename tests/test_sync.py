@@ -0,0 +1,62 @@
+# tests/test_sync.py
+uID = "syncUser"
+headers = {"Authorization": f"Bearer stub:{uID}"}
+compID = "sched1_2025-06-01T09:00:00Z" # client completion IDs repeat for the same occurrence
+
+def _noFlags():
+	return {"form": False, "event": False, "completion": False, "schedules": {}}
+
+def _complete(client):
+	""" Complete the sched1 occurrence: a new event plus its completion """
+	stamps = {"startStamp": "2025-06-01T09:00:00Z", "endStamp": "2025-06-01T09:30:00Z"}
+	r = client.post("/composite", headers=headers, json={
+		"form": {}, "schedules": {},
+		"event": {"path": "a/b", "scheduleID": "sched1", "completionID": compID, **stamps},
+		"completion": {"_id": compID, "path": "a/b", "scheduleID": "sched1", "eventID": None, **stamps},
+		"dirty": {**_noFlags(), "event": True, "completion": True},
+		"toDelete": _noFlags(),
+	})
+	assert r.status_code == 200, r.get_json()
+	return r.get_json()["event"]["_id"]
+
+def _uncomplete(client, eventID):
+	r = client.post("/composite", headers=headers, json={
+		"form": {}, "schedules": {},
+		"event": {"_id": eventID, "scheduleID": "sched1", "completionID": compID},
+		"completion": {"_id": compID, "scheduleID": "sched1", "eventID": eventID},
+		"dirty": _noFlags(),
+		"toDelete": {**_noFlags(), "event": True, "completion": True},
+	})
+	assert r.status_code == 200, r.get_json()
+
+def _syncToken(client):
+	return client.get("/sync", headers=headers).get_json()["syncToken"]
+
+def _syncSince(client, token):
+	body = client.get("/sync", headers=headers, query_string={"since": token}).get_json()
+	assert not body["full"]
+	return body
+
+def test_recreated_doc_is_not_reported_deleted(client):
+	firstEventID = _complete(client)
+	token = _syncToken(client)
+
+	_uncomplete(client, firstEventID)
+	secondEventID = _complete(client)
+
+	body = _syncSince(client, token)
+	assert [c["_id"] for c in body["completions"]] == [compID]
+	assert body["deletions"]["completions"] == []
+	assert [e["_id"] for e in body["events"]] == [secondEventID]
+	assert body["deletions"]["events"] == [firstEventID]
+
+def test_deleted_doc_is_reported(client):
+	eventID = _complete(client)
+	token = _syncToken(client)
+
+	_uncomplete(client, eventID)
+
+	body = _syncSince(client, token)
+	assert body["completions"] == [] and body["events"] == []
+	assert body["deletions"]["completions"] == [compID]
+	assert body["deletions"]["events"] == [eventID]